@@ -1,4 +1,5 @@
 import asyncio
+import math
 import requests
 from xml.etree import ElementTree
 import time
@@ -6,6 +7,16 @@ import time
 from typing import List
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 
+def latency_percentiles(latencies: List[float], percentiles=(50, 90, 95, 99)) -> dict:
+    """Percentis (nearest-rank) das latências por URL, em segundos."""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    return {
+        p: ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+        for p in percentiles
+    }
+
 async def crawl_parallel(urls: List[str], max_concurrent: int = 3):
     print("\n*** Crawling URLs in parallel ***")
 
@@ -21,40 +32,57 @@ async def crawl_parallel(urls: List[str], max_concurrent: int = 3):
     crawler = AsyncWebCrawler(config=browser_config)
     await crawler.start()
 
-    try:
-        # We'll chunk the URLs in batches of 'max_concurrent'
-        success_count = 0
-        fail_count = 0
-        start_time = time.time()
-        print(f"Start Time: {time.ctime(start_time)}")
-        for i in range(0, len(urls), max_concurrent):
-            batch = urls[i : i + max_concurrent]
-            tasks = []
+    # Work queue: each worker picks the next URL as soon as it finishes the
+    # previous one, so a slow page only holds its own slot
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
 
-            for j, url in enumerate(batch):
-                # Unique session_id per concurrent sub-task
-                session_id = f"parallel_session_{i + j}"
-                task = crawler.arun(url=url, config=crawl_config, session_id=session_id)
-                tasks.append(task)
+    success_count = 0
+    fail_count = 0
+    latencies: List[float] = []
 
-            # Gather results
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def worker(worker_id: int):
+        nonlocal success_count, fail_count
+        # One session per worker: the page is reused across the URLs it crawls
+        session_id = f"parallel_session_{worker_id}"
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                result = await crawler.arun(url=url, config=crawl_config, session_id=session_id)
+            except Exception as e:
+                print(f"Error crawling {url}: {e}")
+                fail_count += 1
+                continue
+            finally:
+                latencies.append(time.perf_counter() - started)
+                queue.task_done()
 
-            # Evaluate results
-            for url, result in zip(batch, results):
-                if isinstance(result, Exception):
-                    print(f"Error crawling {url}: {result}")
-                    fail_count += 1
-                elif result.success:
-                    print("Successfully crawled", url)
-                    success_count += 1
-                else:
-                    print(f"Unsuccessful crawl of {url}")
-                    fail_count += 1
+            if result.success:
+                print("Successfully crawled", url)
+                success_count += 1
+            else:
+                print(f"Unsuccessful crawl of {url}")
+                fail_count += 1
+
+    start_time = time.time()
+    try:
+        print(f"Start Time: {time.ctime(start_time)}")
+        workers = min(max_concurrent, len(urls))
+        await asyncio.gather(*(worker(i) for i in range(workers)))
 
         print(f"\nSummary:")
         print(f"  - Successfully crawled: {success_count}")
         print(f"  - Failed: {fail_count}")
+        percentiles = latency_percentiles(latencies)
+        if percentiles:
+            print("  - Latency per URL: " + ", ".join(
+                f"p{p}={value:.2f}s" for p, value in percentiles.items()
+            ) + f", max={max(latencies):.2f}s")
 
     finally:
         end_time = time.time()
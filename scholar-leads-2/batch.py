@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Processamento em lote de leads do Google Scholar.
+
+Lê um arquivo CSV ou JSONL com as colunas `name`, `email` e `institution`
+(também aceita `nome` e `instituicao`), executa busca → filtro → crawler para
+cada linha com um número limitado de workers e grava cada resultado em um
+JSONL de saída assim que fica pronto. Leads já presentes na saída são
+pulados, então basta rodar o mesmo comando de novo para retomar após uma falha.
+Leads já analisados em outras execuções vêm do banco local (`store.py`) sem
+acessar o Scholar; `--refresh` força a busca de novo. Com `--publications`,
+a lista completa de publicações de cada perfil também vai para o banco
+local. O trace de cada lead é gravado assim que ele termina, uma linha por
+lead em `data/traces/batch_*.jsonl`.
+
+Uso:
+    python batch.py leads.csv resultados.jsonl --concurrency 3
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+import warnings
+from typing import Iterator, Optional
+
+from pipeline import processar_lead
+from store import lead_key
+from tools.browser_pool import POOL_SIZE, run_sync
+from tools.tracing import span, tracer
+
+warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
+
+FIELD_ALIASES = {
+    'name': ('name', 'nome', 'researcher_name'),
+    'email': ('email', 'email_domain', 'dominio'),
+    'institution': ('institution', 'instituicao', 'instituição'),
+}
+
+
+def _field(row: dict, field: str) -> Optional[str]:
+    for alias in FIELD_ALIASES[field]:
+        value = row.get(alias)
+        if value and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+def read_leads(path: str) -> Iterator[dict]:
+    """
+    Lê os leads de um arquivo CSV ou JSONL, um de cada vez.
+
+    Args:
+        path: Caminho do arquivo de entrada
+
+    Returns:
+        Iterator[dict]: Leads com as chaves name, email e institution
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            name = _field(row, 'name')
+            if not name:
+                continue
+            yield {
+                'name': name,
+                'email': _field(row, 'email'),
+                'institution': _field(row, 'institution'),
+            }
+
+
+def load_checkpoint(output_path: str, retry_errors: bool = False) -> set:
+    """
+    Lê o JSONL de saída e retorna as chaves dos leads já processados.
+
+    Uma linha incompleta no final (processo interrompido durante a escrita)
+    e registros sem `key` são ignorados.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict) or not record.get('key'):
+                continue
+            if retry_errors and 'error' in record.get('result', {}):
+                continue
+            done.add(record['key'])
+    return done
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = POOL_SIZE,
+                    retry_errors: bool = False, refresh: bool = False, publications: bool = False):
+    """
+    Processa todos os leads do arquivo de entrada com `concurrency` workers.
+
+    Args:
+        input_path: Arquivo CSV ou JSONL com os leads
+        output_path: Arquivo JSONL onde os resultados são acrescentados
+        concurrency: Número de leads processados ao mesmo tempo
+        retry_errors: Reprocessa leads cuja saída anterior foi um erro
+        refresh: Ignora os resultados já salvos no banco local e busca de novo
+        publications: Grava também a lista completa de publicações de cada perfil
+    """
+    done = load_checkpoint(output_path, retry_errors)
+    if done:
+        print(f"♻️  Retomando: {len(done)} leads já processados em {output_path}")
+
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    counters = {'ok': 0, 'error': 0}
+    start = time.time()
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    out = open(output_path, 'a', encoding='utf-8')
+    traces_path = os.path.join(tracer.traces_dir, f"batch_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+    def write_record(record: dict):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        os.fsync(out.fileno())
+
+    async def run_lead(lead: dict):
+        lead_start = time.time()
+        lead_span = None
+        try:
+            # Cada lead é a raiz do próprio trace
+            with span('lead', researcher_name=lead['name']) as lead_span:
+                result = await processar_lead(lead['name'], lead['email'], lead['institution'],
+                                              refresh, publications)
+        except Exception as e:
+            result = {"error": f"Erro ao processar o lead: {str(e)}"}
+        if lead_span is not None and lead_span.trace_id is not None:
+            try:
+                # Um trace por linha do arquivo do lote, gravado assim que o lead termina
+                tracer.flush(lead_span.trace_id, path=traces_path, summary=False)
+            except Exception as e:
+                print(f"Erro ao gravar o trace de {lead['name']}: {str(e)}")
+
+        record = {
+            'key': lead['key'],
+            'lead': {k: lead[k] for k in ('name', 'email', 'institution')},
+            'elapsed': round(time.time() - lead_start, 3),
+            'result': result,
+        }
+        try:
+            write_record(record)
+        except Exception as e:
+            # Resultado que não pôde ser gravado (encoding, disco cheio): tenta registrar o erro no lugar
+            print(f"Erro ao gravar o resultado de {lead['name']}: {str(e)}")
+            result = {"error": f"Erro ao gravar o resultado: {str(e)}"}
+            try:
+                write_record(dict(record, result=result))
+            except Exception:
+                pass
+        status = 'error' if 'error' in result else 'ok'
+        counters[status] += 1
+        total = counters['ok'] + counters['error']
+        print(f"[{total}] {'✅' if status == 'ok' else '❌'} {lead['name']} "
+              f"({time.time() - lead_start:.1f}s)")
+
+    async def worker():
+        while True:
+            lead = await queue.get()
+            try:
+                if lead is None:
+                    return
+                await run_lead(lead)
+            except Exception as e:
+                # Nenhum erro de um lead derruba o worker: a fila continua sendo consumida
+                counters['error'] += 1
+                print(f"❌ {lead['name']}: {str(e)}")
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        for lead in read_leads(input_path):
+            lead['key'] = lead_key(lead['name'], lead['email'], lead['institution'])
+            if lead['key'] in done:
+                continue
+            done.add(lead['key'])
+            await queue.put(lead)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        out.close()
+
+    elapsed = time.time() - start
+    print("\nResumo:")
+    print(f"  - Leads com sucesso: {counters['ok']}")
+    print(f"  - Leads com erro: {counters['error']}")
+    print(f"  - Tempo total: {elapsed:.2f} segundos")
+    tracer.print_totals()
+    if os.path.exists(traces_path):
+        print(f"💾 Traces salvos em: {traces_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Processa leads do Google Scholar em lote.")
+    parser.add_argument("input", help="Arquivo CSV ou JSONL com name, email e institution")
+    parser.add_argument("output", help="Arquivo JSONL de saída (também serve de checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=POOL_SIZE,
+                        help=f"Leads processados ao mesmo tempo (padrão: {POOL_SIZE})")
+    parser.add_argument("--retry-errors", action="store_true",
+                        help="Reprocessa leads que terminaram com erro na execução anterior")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Busca de novo leads que já estão no banco local de resultados")
+    parser.add_argument("--publications", action="store_true",
+                        help="Grava no banco local todas as publicações de cada perfil, não só as 5 principais")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency deve ser pelo menos 1")
+
+    run_sync(run_batch(args.input, args.output, args.concurrency, args.retry_errors, args.refresh,
+                       args.publications))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Benchmark do parsing de afiliação dos coautores.
+
+Gera textos sintéticos de coautor (nome, afiliação e linha de email, em
+inglês e português) nos dois formatos possíveis: com as partes separadas
+por espaço, como `extract_coauthor_info` passa a montar, e coladas, como o
+`text_content()` devolve. Compara o parser anterior de
+`extract_coauthor_info` (re.split sobre uma lista fixa de marcadores) com
+`tools.affiliation.parse_affiliation`. Mede o tempo por texto e a taxa de
+acerto do nome, da instituição e do domínio de email.
+
+Uso:
+    python benchmarks/bench_affiliation.py --strings 50000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from tools.affiliation import institution_matcher, load_institutions, parse_affiliation
+
+FIRST_NAMES = ['Ana', 'João', 'Maria', 'Pedro', 'Luíza', 'Carlos', 'Fernanda', 'José', 'Beatriz',
+               'Rafael', 'John', 'Emily', 'Wei', 'Hans', 'Sofía', 'Ahmed', 'Priya', 'Lucas']
+LAST_NAMES = ['Silva', 'Oliveira', 'Souza', 'Costa', 'Pereira', 'Almeida', 'Gonçalves', 'Ribeiro',
+              'Smith', 'Johnson', 'Zhang', 'Müller', 'García', 'Khan', 'Patel', 'Nakamura']
+UNKNOWN_INSTITUTIONS = ['Universidad de Valparaíso', 'Instituto de Física Teórica', 'Tech Labs Inc',
+                        'Hospital das Clínicas', 'University of Somewhere', 'Acme Research']
+TITLES = ['', '', '', 'Professor, ', 'Professora Adjunta, ', 'PhD Student, ', 'Pesquisador, ',
+          'Associate Professor, ']
+EMAIL_LINES = ['', 'Verified email at {}', 'E-mail confirmado em {}', 'E-mail verificado em {}']
+
+
+def legacy_parse(full_text: str):
+    """Parser anterior de extract_coauthor_info, mantido para comparação."""
+    name, institution, email_domain = full_text, None, None
+    if "E-mail confirmado em" in full_text or "verificado em" in full_text:
+        parts = re.split(r'(E-mail confirmado em|verificado em)', full_text, maxsplit=1)
+        if len(parts) >= 2:
+            name_inst = parts[0].strip()
+            if any(inst_marker in name_inst for inst_marker in ['University', 'Universidade', 'Instituto', 'UFRJ', 'UERJ', 'UFOPA']):
+                name_parts = re.split(r'(University|Universidade|Instituto|UFRJ|UERJ|UFOPA|Professor|Doutor)', name_inst, maxsplit=1)
+                if len(name_parts) >= 2:
+                    name = name_parts[0].strip()
+                    institution = (name_parts[1] + (name_parts[2] if len(name_parts) > 2 else "")).strip()
+            email_part = parts[1] + (parts[2] if len(parts) > 2 else "")
+            domain_match = re.search(r'(?:confirmado|verificado) em ([\w.-]+\.\w+)', email_part)
+            if domain_match:
+                email_domain = domain_match.group(1)
+    return name, institution, email_domain
+
+
+def current_parse(full_text: str):
+    affiliation = parse_affiliation(full_text)
+    return affiliation.name, affiliation.institution, affiliation.email_domain
+
+
+def generate(count: int, separator: str, seed: int = 42) -> list:
+    """Textos sintéticos com o gabarito (nome, instituição presente, domínio)."""
+    rng = random.Random(seed)
+    known = [[canonical, *aliases] for canonical, aliases in load_institutions()]
+    samples = []
+    for _ in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if rng.random() < 0.8:
+            institution = rng.choice(rng.choice(known))
+        else:
+            institution = rng.choice(UNKNOWN_INSTITUTIONS)
+        affiliation = rng.choice(TITLES) + institution if rng.random() < 0.9 else ''
+        domain = rng.choice(['ufrj.br', 'usp.br', 'mit.edu', 'cs.stanford.edu', 'ufjf.br', 'inf.ufpr.br'])
+        email = rng.choice(EMAIL_LINES).format(domain)
+        text = separator.join(part for part in (name, affiliation, email) if part)
+        samples.append((text, name, bool(affiliation), domain if email else None))
+    return samples
+
+
+def evaluate(parse, samples) -> dict:
+    started = time.perf_counter()
+    parsed = [parse(text) for text, *_ in samples]
+    elapsed = time.perf_counter() - started
+    names = institutions = domains = 0
+    for (name, institution, domain), (_, true_name, has_institution, true_domain) in zip(parsed, samples):
+        names += name == true_name
+        institutions += bool(institution) == has_institution
+        domains += (domain or None) == true_domain
+    total = len(samples)
+    return {
+        'us_per_string': elapsed / total * 1e6,
+        'name': names / total * 100,
+        'institution': institutions / total * 100,
+        'email': domains / total * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parsing de afiliação dos coautores.")
+    parser.add_argument("--strings", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{args.strings} textos por formato, {len(institution_matcher)} nomes/siglas no dicionário\n")
+    print(f"{'formato':<10}{'parser':<13}{'µs/texto':>10}{'nome ok':>10}{'instituição ok':>16}{'email ok':>10}")
+    for fmt, separator in (('espaço', ' '), ('colado', '')):
+        samples = generate(args.strings, separator)
+        for label, parse in (('anterior', legacy_parse), ('affiliation', current_parse)):
+            result = evaluate(parse, samples)
+            print(f"{fmt:<10}{label:<13}{result['us_per_string']:>10.2f}{result['name']:>9.1f}%"
+                  f"{result['institution']:>15.1f}%{result['email']:>9.1f}%")
+
+if __name__ == "__main__":
+    main()
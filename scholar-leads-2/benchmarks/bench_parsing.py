@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark do parsing das páginas do Google Scholar.
+
+Compara o BeautifulSoup com `html.parser` (implementação anterior) com a
+camada `tools.html_parser` (lxml + seletores pré-compilados) sobre o HTML
+salvo em `benchmarks/fixtures/`. Cada iteração parseia a página uma vez e
+roda todos os seletores que as ferramentas aplicam naquele tipo de página.
+
+Uso:
+    python benchmarks/bench_parsing.py --iterations 200
+"""
+import argparse
+import os
+import sys
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from bs4 import BeautifulSoup
+
+from tools.html_parser import parse_html, select, text
+
+FIXTURES_DIR = os.path.join(BASE_DIR, 'benchmarks', 'fixtures')
+
+# Seletores aplicados em cada tipo de página (mesmos nomes de tools.html_parser)
+PAGE_SELECTORS = {
+    'search.html': {
+        'author_cards': 'div.gsc_1usr',
+        'card_name_link': 'h3.gs_ai_name a',
+        'card_affiliation': '.gs_ai_aff',
+        'card_email': '.gs_ai_eml',
+        'card_cited_by': '.gs_ai_cby',
+        'card_interests': '.gs_ai_one_int',
+    },
+    'profile.html': {
+        'profile_name': '#gsc_prf_in',
+        'profile_interests': '#gsc_prf_int',
+        'profile_info_lines': 'div.gsc_prf_il',
+        'profile_citations': '#gsc_rsb_st td.gsc_rsb_std',
+        'profile_article_links': '#gsc_a_b .gsc_a_t a',
+        'profile_coauthors': '.gsc_rsb_aa',
+        'profile_coauthors_link': 'a.gsc_rsb_lbl',
+        'user_links': 'a[href*="user="]',
+    },
+    'colleagues.html': {
+        'colleague_links': '.gsc_1usr a[href*="user="]',
+        'user_links': 'a[href*="user="]',
+    },
+    'citation.html': {
+        'article_values': '.gsc_oci_value',
+        'article_pdf_links': 'a[href*=".pdf"]',
+        'article_title_links': 'a.gsc_oci_title_link',
+    },
+}
+
+
+def run_bs4(html: str, selectors: dict) -> list:
+    soup = BeautifulSoup(html, 'html.parser')
+    return [[elem.text for elem in soup.select(css)] for css in selectors.values()]
+
+
+def run_lxml(html: str, selectors: dict) -> list:
+    tree = parse_html(html)
+    return [[text(elem) for elem in select(tree, name)] for name in selectors]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de parsing das páginas do Scholar.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'página':<18}{'bs4 (ms)':>12}{'lxml (ms)':>12}{'ganho':>9}")
+    total_bs4 = total_lxml = 0.0
+    for filename, selectors in PAGE_SELECTORS.items():
+        with open(os.path.join(FIXTURES_DIR, filename), 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        # Os dois parsers precisam extrair exatamente o mesmo conteúdo
+        expected = run_bs4(html, selectors)
+        if run_lxml(html, selectors) != expected:
+            raise SystemExit(f"Resultados diferentes entre bs4 e lxml em {filename}")
+
+        bs4_time = timeit.timeit(lambda: run_bs4(html, selectors), number=args.iterations)
+        lxml_time = timeit.timeit(lambda: run_lxml(html, selectors), number=args.iterations)
+        total_bs4 += bs4_time
+        total_lxml += lxml_time
+        print(f"{filename:<18}{bs4_time / args.iterations * 1000:>12.3f}"
+              f"{lxml_time / args.iterations * 1000:>12.3f}{bs4_time / lxml_time:>8.1f}x")
+
+    print(f"{'total':<18}{total_bs4 / args.iterations * 1000:>12.3f}"
+          f"{total_lxml / args.iterations * 1000:>12.3f}{total_bs4 / total_lxml:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""
+Benchmark offline do pipeline busca → filtro → crawler.
+
+Sobe o servidor de replay (`benchmarks/replay_server.py`) e aponta
+`SCHOLAR_BASE_URL` para ele. Depois roda `resolver_perfil` (busca
+paginada e filtro) e `crawl_scholar_profile` de ponta a ponta para N
+leads, com um número limitado de leads em paralelo. Não acessa a rede.
+
+Mede:
+- vazão (leads/s)
+- latência por lead (p50/p95/máx)
+- pico de RSS
+- lançamentos de navegador por lead
+- requisições HTTP, fallbacks para o navegador e bloqueios detectados
+
+O resultado é gravado em JSON (em `benchmarks/results/` por padrão).
+`--compare` compara com um resultado anterior para detectar regressões.
+
+Uso:
+    python benchmarks/bench_pipeline.py --leads 20 --concurrency 3
+    python benchmarks/bench_pipeline.py --captcha-every 15 --compare benchmarks/results/base.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from benchmarks.replay_server import ReplayServer
+
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+
+# Métricas comparadas com --compare (e se valores maiores são piores)
+COMPARED_METRICS = {
+    'throughput_leads_per_s': False,
+    'latency_p50_ms': True,
+    'latency_p95_ms': True,
+    'peak_rss_mb': True,
+    'browser_launches_per_lead': True,
+}
+
+
+def percentile(values, p: float) -> float:
+    """Percentil nearest-rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def configure_environment(args, server: ReplayServer):
+    """Variáveis lidas pelas ferramentas na importação; precisam vir antes dos imports."""
+    os.environ['SCHOLAR_BASE_URL'] = server.base_url
+    os.environ['SCHOLAR_FETCHER'] = args.fetcher
+    os.environ['SCHOLAR_RATE_LIMIT'] = str(args.rate)
+    os.environ['SCHOLAR_BROWSER_POOL_SIZE'] = str(args.concurrency)
+    os.environ.setdefault('SCHOLAR_TRACING', '0')
+    if args.cache:
+        os.environ['SCHOLAR_PAGE_CACHE'] = os.path.join(RESULTS_DIR, 'bench_cache.sqlite')
+        os.environ['SCHOLAR_SEARCH_CACHE'] = os.path.join(RESULTS_DIR, 'bench_search_cache.sqlite')
+    else:
+        os.environ['SCHOLAR_PAGE_CACHE_DISABLED'] = '1'
+        os.environ['SCHOLAR_SEARCH_CACHE_DISABLED'] = '1'
+
+
+async def run_leads(leads, concurrency: int) -> tuple:
+    from pipeline import resolver_perfil
+    from tools.scholar_crawler_tool import crawl_scholar_profile
+
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for lead in leads:
+        queue.put_nowait(lead)
+
+    async def process(name: str, email: str, institution: str) -> bool:
+        resolucao = await resolver_perfil(name, email, institution)
+        if 'error' in resolucao:
+            return False
+        return 'error' not in json.loads(await crawl_scholar_profile(resolucao['profile_url']))
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            lead = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                ok = await process(*lead)
+            except Exception as e:
+                print(f"Erro no lead {lead[0]}: {str(e)}")
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += 0 if ok else 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nComparação com {baseline_path}:")
+    print(f"  {'métrica':<28}{'antes':>12}{'agora':>12}{'variação':>11}")
+    for metric, higher_is_worse in COMPARED_METRICS.items():
+        before, now = baseline.get(metric), current.get(metric)
+        if not before or now is None:
+            continue
+        change = (now - before) / before * 100
+        worse = change > 0 if higher_is_worse else change < 0
+        flag = ' ⚠️' if worse and abs(change) >= 10 else ''
+        print(f"  {metric:<28}{before:>12.2f}{now:>12.2f}{change:>+10.1f}%{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline do Scholar.")
+    parser.add_argument("--leads", type=int, default=10, help="Número de leads (padrão: 10)")
+    parser.add_argument("--concurrency", type=int, default=3, help="Leads em paralelo (padrão: 3)")
+    parser.add_argument("--fetcher", choices=("auto", "http", "browser"), default="auto")
+    parser.add_argument("--captcha-every", type=int, default=0,
+                        help="O servidor responde com captcha a cada N requisições (0 desliga)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Atraso do servidor por resposta (s)")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="Requisições por segundo permitidas pelo rate limiter (padrão: sem limite prático)")
+    parser.add_argument("--cooldown", type=float, default=0.5, help="Pausa após um bloqueio, em segundos")
+    parser.add_argument("--min-rate", type=float, default=50.0,
+                        help="Taxa mínima após bloqueios consecutivos, em req/s (padrão: 50)")
+    parser.add_argument("--cache", action="store_true", help="Usa os caches de páginas e de buscas")
+    parser.add_argument("--out", default=None, help="Arquivo JSON de saída")
+    parser.add_argument("--compare", default=None, help="Resultado anterior para comparação")
+    args = parser.parse_args()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with ReplayServer(captcha_every=args.captcha_every, latency=args.latency) as server:
+        configure_environment(args, server)
+
+        from tools.browser_pool import browser_pool, run_sync
+        from tools.fetchers import http_fetcher
+        from tools.rate_limiter import HOST_LIMITS, scheduler
+        from tools.scholar_ids import SCHOLAR_HOST
+
+        # Com os limites de produção, cada captcha derruba a taxa até 0.05 req/s
+        # e o benchmark passaria a medir só as pausas
+        limits = HOST_LIMITS[SCHOLAR_HOST]
+        limits.cooldown = args.cooldown
+        limits.min_rate = min(args.min_rate, args.rate)
+
+        leads = [(f"Pesquisador {i}", "ufjf.br", "UFJF") for i in range(args.leads)]
+        started = time.perf_counter()
+        latencies, errors = run_sync(run_leads(leads, args.concurrency))
+        wall = time.perf_counter() - started
+        launches = browser_pool.launches
+        run_sync(browser_pool.close())
+
+    host_stats = scheduler.stats().get(SCHOLAR_HOST, {})
+    result = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {key: value for key, value in vars(args).items() if key not in ('out', 'compare')},
+        'leads': args.leads,
+        'errors': errors,
+        'wall_s': round(wall, 3),
+        'throughput_leads_per_s': round(args.leads / wall, 3),
+        'latency_p50_ms': round(percentile(latencies, 50), 1),
+        'latency_p95_ms': round(percentile(latencies, 95), 1),
+        'latency_max_ms': round(max(latencies, default=0.0), 1),
+        # ru_maxrss é em KB no Linux; os navegadores entram em "children" depois de encerrados
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'peak_rss_children_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'browser_launches': launches,
+        'browser_launches_per_lead': round(launches / args.leads, 3) if args.leads else 0,
+        'http_requests': http_fetcher.requests,
+        'http_fallbacks': http_fetcher.fallbacks,
+        'server_requests': server.requests,
+        'captchas_served': server.captchas,
+        'blocks_detected': host_stats.get('blocks', 0),
+    }
+
+    out_path = args.out or os.path.join(RESULTS_DIR, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print("\nResultado:")
+    for key, value in result.items():
+        if key != 'config':
+            print(f"  {key}: {value}")
+    print(f"💾 Resultado salvo em: {out_path}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Benchmark da pontuação dos perfis candidatos.
+
+Gera N candidatos sintéticos com nomes parecidos (o caso de nomes comuns,
+como "Ana Silva"), um deles o perfil correto, e compara a pontuação
+anterior de `rank_profiles_async` (laço por perfil: Jaccard dos nomes,
+substring de email e instituição em cada linha e varredura dos links de
+coautor) com `tools.profile_scoring.ScoringEngine`. Mede o tempo por
+ranking e em que posição o perfil correto ficou. A linha "engine (cache
+frio)" limpa os textos normalizados antes de cada ranking.
+
+Uso:
+    python benchmarks/bench_scoring.py --candidates 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from tools.profile_scoring import Candidate, ScoringEngine, clear_text_cache
+
+FIRST_NAMES = ['Ana', 'Maria', 'João', 'José', 'Pedro', 'Paula', 'Carlos', 'Fernanda']
+MIDDLE_NAMES = ['Silva', 'Souza', 'Costa', 'Pereira', 'Oliveira', 'Santos', 'Lima', '']
+INSTITUTIONS = ['Universidade Federal de Juiz de Fora', 'Universidade de São Paulo', 'UFRJ',
+                'Universidade Federal de Minas Gerais', 'Universidade Estadual de Campinas']
+DOMAINS = ['ufjf.br', 'usp.br', 'ufrj.br', 'ufmg.br', 'unicamp.br']
+TOPICS = ['Machine Learning', 'Data Mining', 'Computer Vision', 'Bioinformatics', 'Databases', 'Robotics']
+
+
+def _user_id(rng: random.Random) -> str:
+    return ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789') for _ in range(12))
+
+
+def generate(count: int, seed: int = 42):
+    """Candidatos sintéticos; o correto é "Ana Silva Oliveira", da UFJF, coautora de `coauthor_id`."""
+    rng = random.Random(seed)
+    coauthor_id = _user_id(rng)
+    candidates = []
+    for _ in range(count - 1):
+        index = rng.randrange(len(INSTITUTIONS))
+        name = ' '.join(part for part in ('Ana', rng.choice(MIDDLE_NAMES), rng.choice(MIDDLE_NAMES + FIRST_NAMES)) if part)
+        candidates.append(Candidate(
+            url=f"https://scholar.google.com/citations?user={_user_id(rng)}",
+            name=name,
+            affiliation=f"Professor, {INSTITUTIONS[index]}",
+            email_domain=DOMAINS[index] if rng.random() < 0.7 else None,
+            interests=tuple(rng.sample(TOPICS, 3)),
+            citations=rng.randrange(0, 5000),
+            coauthor_ids=frozenset(_user_id(rng) for _ in range(rng.randrange(0, 20))),
+        ))
+    target = Candidate(
+        url=f"https://scholar.google.com/citations?user={_user_id(rng)}",
+        name='Ana Silva Oliveira',
+        affiliation='Professora, Universidade Federal de Juiz de Fora',
+        email_domain='ufjf.br',
+        interests=('Machine Learning', 'Data Mining'),
+        citations=800,
+        coauthor_ids=frozenset([coauthor_id, _user_id(rng)]),
+    )
+    candidates.insert(rng.randrange(count), target)
+    return candidates, target.url, coauthor_id
+
+
+def legacy_rank(candidates, researcher_name, email, institution, coauthor_id):
+    """Pontuação anterior de rank_profiles_async, sobre os mesmos dados extraídos."""
+    results = []
+    for candidate in candidates:
+        score = 0
+        info_lines = [candidate.affiliation.lower(),
+                      f"e-mail confirmado em {candidate.email_domain}" if candidate.email_domain else '']
+        tokens1 = set(researcher_name.lower().strip().split())
+        tokens2 = set(candidate.name.lower().strip().split())
+        union = len(tokens1 | tokens2)
+        score += (len(tokens1 & tokens2) / union if union else 0) * 5
+        for line in info_lines:
+            if 'confirmado em' in line and email.lower() in line:
+                score += 3
+        for line in info_lines:
+            if institution.lower() in line:
+                score += 2
+        hrefs = [f"/citations?user={user_id}&hl=pt-BR" for user_id in candidate.coauthor_ids]
+        for href in hrefs:
+            if coauthor_id in href:
+                score += 5
+        results.append((candidate.url, score))
+    return sorted(results, key=lambda x: x[1], reverse=True)
+
+
+def measure(rank, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        ranking = rank()
+    return (time.perf_counter() - started) / repeat * 1000, ranking
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da pontuação dos perfis candidatos.")
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    candidates, target, coauthor_id = generate(args.candidates)
+    engine = ScoringEngine()
+    query = ('Ana Silva Oliveira', 'ufjf.br', 'UFJF')
+
+    print(f"{args.candidates} candidatos, média de {args.repeat} rankings\n")
+    print(f"{'pontuação':<22}{'ms/ranking':>12}{'posição do correto':>22}")
+    runs = (
+        ('anterior', lambda: legacy_rank(candidates, *query, coauthor_id)),
+        ('anterior sem coautor', lambda: legacy_rank(candidates, *query, '-')),
+        ('engine', lambda: [(p.url, p.score) for p in engine.rank(
+            candidates, *query, coauthor_id=coauthor_id, topics=['machine learning'])]),
+        ('engine (cache frio)', lambda: clear_text_cache() or [(p.url, p.score) for p in engine.rank(
+            candidates, *query, coauthor_id=coauthor_id, topics=['machine learning'])]),
+        ('engine sem coautor', lambda: [(p.url, p.score) for p in engine.rank(
+            candidates, *query, topics=['machine learning'])]),
+    )
+    for label, rank in runs:
+        elapsed, ranking = measure(rank, args.repeat)
+        position = [url for url, _ in ranking].index(target) + 1
+        print(f"{label:<22}{elapsed:>12.2f}{position:>22}")
+
+
+if __name__ == "__main__":
+    main()
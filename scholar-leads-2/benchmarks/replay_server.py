@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Servidor HTTP local que reproduz páginas gravadas do Google Scholar.
+
+Responde às mesmas rotas usadas pelas ferramentas com o HTML salvo em
+`benchmarks/fixtures/`:
+
+    /citations?view_op=search_authors   -> search.html
+    /citations?view_op=list_colleagues  -> colleagues.html
+    /citations?view_op=view_citation    -> citation.html
+    /citations?user=...                 -> profile.html
+
+Com `captcha_every=N`, a cada N requisições a resposta é a página de
+captcha (`captcha.html`), para exercitar a detecção de bloqueio, o
+rate limiter e o fallback para o navegador. Basta apontar
+`SCHOLAR_BASE_URL` para `server.base_url` para as ferramentas usarem o
+servidor no lugar do Scholar.
+
+Uso isolado:
+    python benchmarks/replay_server.py --port 8765 --captcha-every 20
+"""
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+ROUTES = {
+    'search_authors': 'search.html',
+    'list_colleagues': 'colleagues.html',
+    'view_citation': 'citation.html',
+}
+
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> dict:
+    fixtures = {}
+    for filename in set(ROUTES.values()) | {'profile.html', 'captcha.html'}:
+        with open(os.path.join(fixtures_dir, filename), 'rb') as f:
+            fixtures[filename] = f.read()
+    return fixtures
+
+
+def route(path: str) -> str:
+    """Nome do fixture que responde à URL (string vazia quando não há rota)."""
+    parts = urlsplit(path)
+    if parts.path != '/citations':
+        return ''
+    query = dict(parse_qsl(parts.query))
+    view_op = query.get('view_op')
+    if view_op in ROUTES:
+        return ROUTES[view_op]
+    return 'profile.html' if 'user' in query else ''
+
+
+class ReplayServer:
+    """
+    Servidor de replay em uma thread de fundo.
+
+    Args:
+        port: Porta local (0 escolhe uma porta livre)
+        captcha_every: Serve o captcha a cada N requisições (0 desliga)
+        latency: Atraso artificial por resposta, em segundos
+    """
+
+    def __init__(self, port: int = 0, captcha_every: int = 0, latency: float = 0.0):
+        self.captcha_every = captcha_every
+        self.latency = latency
+        self.fixtures = load_fixtures()
+        self.requests = 0
+        self.captchas = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def _next_is_captcha(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            captcha = self.captcha_every > 0 and self.requests % self.captcha_every == 0
+            if captcha:
+                self.captchas += 1
+            return captcha
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                filename = route(self.path)
+                if not filename:
+                    self.send_error(404)
+                    return
+                if server._next_is_captcha():
+                    filename = 'captcha.html'
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.fixtures[filename]
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'ReplayServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de replay das páginas do Scholar.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--captcha-every", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Atraso por resposta em segundos")
+    args = parser.parse_args()
+
+    server = ReplayServer(args.port, args.captcha_every, args.latency).start()
+    print(f"Servindo fixtures em {server.base_url} (SCHOLAR_BASE_URL={server.base_url})")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,14 @@ import yaml
 import sys
 from crewai import Agent, Task, Crew, Process
 from tools.scholar_search_tool import ScholarSearchTool
-from tools.scholar_crawler_tool import ScholarCrawlerTool
+from tools.scholar_crawler_tool import ScholarCrawlerTool, crawl_scholar_profile
+from tools.page_cache import page_cache
+from tools.search_cache import search_cache
+from tools.browser_pool import run_sync
+from tools.rate_limiter import scheduler
+from tools.tracing import SequentialTaskSpans, span, traced, tracer
+from pipeline import resolver_perfil
+from store import result_store
 
 # Garantir que o diretório atual esteja no path do Python
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +25,11 @@ from langchain_openai import ChatOpenAI
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = os.path.join(BASE_DIR, 'config')
 
+# Modo de execução: "auto" usa o pipeline direto e só recorre aos agentes quando
+# a escolha do perfil é ambígua; "direto" nunca usa os agentes; "crew" sempre usa
+MODOS_EXECUCAO = ("auto", "direto", "crew")
+MODO_PADRAO = os.getenv("SCHOLAR_MODO_EXECUCAO", "auto")
+
 def load_yaml(file_path):
     """Carrega arquivo YAML usando caminho absoluto"""
     absolute_path = os.path.join(CONFIG_DIR, os.path.basename(file_path))
@@ -50,9 +62,10 @@ def create_agents():
     
     return [buscador, analista]
 
-def create_tasks(agents, researcher_name, email=None, institution=None):
+def create_tasks(agents, researcher_name, email=None, institution=None, task_spans=None):
     """Criar as tasks da crew"""
     tasks_config = load_yaml('tasks.yaml')
+    task_spans = task_spans or SequentialTaskSpans()
     
     # Task de busca
     task_busca = Task(
@@ -63,7 +76,8 @@ def create_tasks(agents, researcher_name, email=None, institution=None):
         ),
         agent=agents[0],  # buscador
         expected_output=tasks_config['task_busca_perfil']['expected_output'],
-        output_key="perfil_url"  # Captura a saída como variável para a próxima task
+        output_key="perfil_url",  # Captura a saída como variável para a próxima task
+        callback=task_spans.callback('task_busca_perfil')
     )
     
     # Task de análise
@@ -71,13 +85,68 @@ def create_tasks(agents, researcher_name, email=None, institution=None):
         description=tasks_config['task_analise_scholar']['description'],
         agent=agents[1],  # analista
         expected_output=tasks_config['task_analise_scholar']['expected_output'],
-        inputs={"perfil_url": "{{ perfil_url }}"}  # Usa a saída da task anterior
+        inputs={"perfil_url": "{{ perfil_url }}"},  # Usa a saída da task anterior
+        callback=task_spans.callback('task_analise_scholar')
     )
     
     return [task_busca, task_analise]
 
-def executar(nome_pesquisador, email=None, institution=None):
-    """Executar o fluxo do CrewAI"""
+@traced('executar_direto')
+def executar_direto(nome_pesquisador, email=None, institution=None, permitir_ambiguidade=True):
+    """
+    Executa busca → filtro → crawler diretamente, sem chamadas ao LLM.
+    
+    Retorna o JSON do perfil, ou None quando a escolha do perfil é ambígua
+    e `permitir_ambiguidade` é False.
+    """
+    resolucao = run_sync(resolver_perfil(nome_pesquisador, email, institution))
+    if "error" in resolucao:
+        return json.dumps(resolucao, ensure_ascii=False)
+    
+    if resolucao["ambiguous"] and not permitir_ambiguidade:
+        print("\n⚖️  Perfis candidatos empatados, usando os agentes para desambiguar")
+        return None
+    
+    print(f"\n⚡ Perfil escolhido sem LLM: {resolucao['profile_url']}")
+    return run_sync(crawl_scholar_profile(resolucao["profile_url"]))
+
+def executar(nome_pesquisador, email=None, institution=None, modo=MODO_PADRAO, atualizar=False):
+    """
+    Executar o fluxo do CrewAI
+
+    Pesquisadores já analisados são devolvidos do banco local de resultados
+    sem acessar o Scholar, a menos que `atualizar` seja True. Resultados
+    novos são gravados no banco.
+    """
+    if modo not in MODOS_EXECUCAO:
+        raise ValueError(f"Modo de execução inválido: {modo}")
+    
+    root_span = None
+    try:
+        with span('executar', researcher_name=nome_pesquisador, modo=modo) as root_span:
+            salvo = None if atualizar else result_store.lookup(nome_pesquisador, email, institution)
+            if salvo is not None:
+                print(f"\n💾 Perfil já analisado, usando o banco local: {salvo['profile_url']}")
+                return json.dumps(salvo, ensure_ascii=False)
+            resultado = _executar(nome_pesquisador, email, institution, modo)
+            _salvar_resultado(resultado, nome_pesquisador, email, institution)
+    finally:
+        _print_run_stats()
+        # Só o trace desta execução: outras sessões podem estar rodando ao mesmo tempo
+        if root_span is not None and root_span.trace_id is not None:
+            tracer.flush(root_span.trace_id)
+    return resultado
+
+def _salvar_resultado(resultado, nome_pesquisador, email, institution):
+    """Grava o resultado no banco local quando ele é um perfil em JSON."""
+    try:
+        perfil = json.loads(str(resultado))
+    except json.JSONDecodeError:
+        return
+    if isinstance(perfil, dict):
+        result_store.save(perfil, nome_pesquisador, email, institution)
+
+def _executar(nome_pesquisador, email, institution, modo):
     print(f"\n🔍 Iniciando busca para: {nome_pesquisador}")
     
     # Exibir informações adicionais usadas na busca
@@ -88,11 +157,18 @@ def executar(nome_pesquisador, email=None, institution=None):
         if institution:
             print(f"  - Instituição: {institution}")
     
+    if modo != "crew":
+        resultado = executar_direto(nome_pesquisador, email, institution, permitir_ambiguidade=(modo == "direto"))
+        if resultado is not None:
+            print("\n✅ Análise concluída com sucesso!")
+            return resultado
+    
     # Criar agentes
     agents = create_agents()
     
     # Criar tasks
-    tasks = create_tasks(agents, nome_pesquisador, email, institution)
+    task_spans = SequentialTaskSpans()
+    tasks = create_tasks(agents, nome_pesquisador, email, institution, task_spans)
     
     # Configurar LLM
     llm = ChatOpenAI(
@@ -110,11 +186,24 @@ def executar(nome_pesquisador, email=None, institution=None):
         verbose=True
     )
 
-    resultado = crew.kickoff()
+    with span('crew.kickoff') as kickoff_span:
+        task_spans.start(kickoff_span)
+        resultado = crew.kickoff()
     print("\n✅ Análise concluída com sucesso!")
     
     return resultado
 
+def _print_run_stats():
+    if page_cache is not None:
+        stats = page_cache.stats()
+        print(f"📦 Cache de páginas: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+    if search_cache is not None:
+        stats = search_cache.stats()
+        print(f"🔎 Cache de buscas: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+    for host, host_stats in scheduler.stats().items():
+        print(f"🚦 {host}: {host_stats['requests']} requisições, {host_stats['blocks']} bloqueios, "
+              f"taxa atual {host_stats['rate']} req/s")
+
 if __name__ == "__main__":
     nome_pesquisador = input("Digite o nome do pesquisador: ")
     
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+"""
+Expansão da rede de coautoria a partir de perfis semente.
+
+Percorre os coautores em largura até a profundidade K. A fronteira é uma
+fila de prioridade: perfis mais rasos primeiro e, na mesma profundidade,
+os mais citados. A menor profundidade já vista de cada perfil, indexada
+pelo `user=` do Scholar, garante que um perfil só volte à fronteira quando
+for alcançado por um caminho mais curto (e então é expandido de novo, para
+que seus coautores também fiquem com a profundidade correta). Os perfis na
+profundidade K são registrados com os dados do cartão de coautor, mas não
+são expandidos; com K = 0, só as sementes são registradas.
+
+A saída é uma lista de arestas e uma tabela de nós, em CSV ou Parquet
+(Parquet requer pyarrow).
+
+Uso:
+    python graph_crawler.py https://scholar.google.com/citations?user=XXXX --depth 2 --out grafo
+"""
+import argparse
+import asyncio
+import csv
+import heapq
+import itertools
+import os
+from typing import Dict, List, Optional
+
+from crawl4ai import CrawlerRunConfig, CacheMode
+
+from tools.affiliation import email_domain
+from tools.browser_pool import POOL_SIZE, browser_pool, run_sync
+from tools.html_parser import parse_count, parse_html, select, select_one, text
+from tools.scholar_ids import extract_user_id, scholar_url
+
+NODE_FIELDS = ['user_id', 'name', 'institution', 'email_domain', 'citations', 'depth', 'crawled']
+EDGE_FIELDS = ['source', 'target']
+
+
+def parse_profile_node(tree) -> dict:
+    """Atributos do pesquisador a partir da página do perfil."""
+    info_lines = select(tree, 'profile_info_lines')
+    citations = select_one(tree, 'profile_citations')
+    return {
+        'name': text(select_one(tree, 'profile_name')).strip() or None,
+        'institution': text(info_lines[0]).strip() if info_lines else None,
+        'email_domain': email_domain(text(select_one(tree, 'profile_email_line'))),
+        'citations': parse_count(text(citations)) if citations is not None else None,
+    }
+
+
+def parse_coauthor_cards(tree) -> List[dict]:
+    """Coautores da página list_colleagues (cartões com nome, afiliação, email e citações)."""
+    coauthors = []
+    for card in select(tree, 'author_cards'):
+        link = select_one(card, 'card_name_link')
+        user_id = extract_user_id(link.get('href') if link is not None else None)
+        if not user_id:
+            continue
+        coauthors.append({
+            'user_id': user_id,
+            'name': text(link).strip(),
+            'institution': text(select_one(card, 'card_affiliation')).strip() or None,
+            'email_domain': email_domain(text(select_one(card, 'card_email'))),
+            'citations': parse_count(text(select_one(card, 'card_cited_by'))),
+        })
+    return coauthors
+
+
+def parse_sidebar_coauthors(tree) -> List[dict]:
+    """Coautores da barra lateral do perfil (usado quando não há list_colleagues)."""
+    coauthors = []
+    for elem in select(tree, 'profile_coauthors'):
+        link = select_one(elem, 'sidebar_coauthor_link')
+        user_id = extract_user_id(link.get('href') if link is not None else None)
+        if not user_id:
+            continue
+        ext = [text(span).strip() for span in select(elem, 'sidebar_coauthor_ext')]
+        coauthors.append({
+            'user_id': user_id,
+            'name': text(link).strip(),
+            'institution': ext[0] if ext else None,
+            'email_domain': email_domain(ext[1]) if len(ext) > 1 else None,
+            'citations': None,
+        })
+    return coauthors
+
+
+class CoauthorGraphCrawler:
+    """
+    Crawler da rede de coautoria com fronteira de prioridade e profundidade limitada.
+
+    Args:
+        depth: Profundidade máxima (as sementes estão na profundidade 0)
+        concurrency: Perfis baixados ao mesmo tempo
+        max_nodes: Limite opcional de perfis expandidos
+        edges_path: CSV onde as arestas são gravadas conforme são descobertas
+    """
+
+    def __init__(self, depth: int, concurrency: int, edges_path: str, max_nodes: Optional[int] = None):
+        self.depth = depth
+        self.concurrency = concurrency
+        self.max_nodes = max_nodes
+        self.edges_path = edges_path
+        self.nodes: Dict[str, dict] = {}
+        # Menor profundidade em que cada perfil já foi alcançado
+        self.best_depth: Dict[str, int] = {}
+        self.edges = set()
+        self._frontier = []
+        self._counter = itertools.count()
+        self._in_flight = 0
+        self._expanded = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
+
+    def _push(self, user_id: str, depth: int, citations: Optional[int]):
+        # heapq é um min-heap: menor profundidade primeiro e, empatando, mais citações
+        heapq.heappush(self._frontier, (depth, -(citations or 0), next(self._counter), user_id))
+
+    def _reach(self, user_id: str, depth: int, citations: Optional[int]):
+        """Registra que o perfil foi alcançado em `depth`; vai para a fronteira se o caminho é mais curto."""
+        if depth >= self.best_depth.get(user_id, self.depth + 1):
+            return
+        self.best_depth[user_id] = depth
+        if depth < self.depth:
+            self._push(user_id, depth, citations)
+
+    def _pop(self) -> Optional[tuple]:
+        """Próximo (user_id, profundidade) da fronteira, descartando entradas superadas por um caminho mais curto."""
+        while self._frontier:
+            depth, _, _, user_id = heapq.heappop(self._frontier)
+            if depth == self.best_depth[user_id]:
+                return user_id, depth
+        return None
+
+    def _add_node(self, attrs: dict, depth: int) -> dict:
+        node = self.nodes.get(attrs['user_id'])
+        if node is None:
+            node = {field: None for field in NODE_FIELDS}
+            node.update(user_id=attrs['user_id'], depth=depth, crawled=False)
+            self.nodes[attrs['user_id']] = node
+        for field in ('name', 'institution', 'email_domain', 'citations'):
+            if attrs.get(field) is not None:
+                node[field] = attrs[field]
+        node['depth'] = min(node['depth'], depth)
+        return node
+
+    async def _fetch_tree(self, crawler, url: str, session_id: str):
+        result = await crawler.arun(url=url, config=self._crawl_config, session_id=session_id)
+        return parse_html(result.html) if result.success else None
+
+    async def _expand(self, user_id: str, depth: int, edges_writer):
+        profile_url = scholar_url(f"/citations?user={user_id}&hl=pt-BR")
+        colleagues_url = scholar_url(f"/citations?view_op=list_colleagues&hl=pt-BR&user={user_id}")
+        async with browser_pool.acquire() as crawler:
+            profile_tree = await self._fetch_tree(crawler, profile_url, f"graph_{user_id}")
+            if profile_tree is None:
+                print(f"Falha ao carregar o perfil {user_id}")
+                return
+            node = self._add_node(dict(parse_profile_node(profile_tree), user_id=user_id), depth)
+            node['crawled'] = True
+
+            colleagues_tree = await self._fetch_tree(crawler, colleagues_url, f"graph_colleagues_{user_id}")
+        coauthors = parse_coauthor_cards(colleagues_tree) if colleagues_tree is not None else []
+        if not coauthors:
+            coauthors = parse_sidebar_coauthors(profile_tree)
+
+        print(f"[profundidade {depth}] {node['name'] or user_id}: {len(coauthors)} coautores")
+        for coauthor in coauthors:
+            self._add_node(coauthor, depth + 1)
+            edge = (user_id, coauthor['user_id'])
+            if edge not in self.edges and edge[::-1] not in self.edges:
+                self.edges.add(edge)
+                edges_writer.writerow(edge)
+            self._reach(coauthor['user_id'], depth + 1, coauthor['citations'])
+
+    async def _worker(self, edges_writer):
+        while True:
+            async with self._condition:
+                entry = None
+                while self.max_nodes is None or self._expanded < self.max_nodes:
+                    entry = self._pop()
+                    if entry is not None or not self._in_flight:
+                        break
+                    await self._condition.wait()
+                if entry is None:
+                    self._condition.notify_all()
+                    return
+                user_id, depth = entry
+                self._in_flight += 1
+                self._expanded += 1
+            try:
+                await self._expand(user_id, depth, edges_writer)
+            except Exception as e:
+                print(f"Erro ao expandir {user_id}: {str(e)}")
+            finally:
+                async with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+
+    async def run(self, seeds: List[str]):
+        """Expande a rede a partir das sementes (URLs de perfil ou IDs `user=`)."""
+        self._condition = asyncio.Condition()
+        for seed in seeds:
+            user_id = extract_user_id(seed) or seed
+            self._add_node({'user_id': user_id}, 0)
+            self._reach(user_id, 0, None)
+
+        with open(self.edges_path, 'w', encoding='utf-8', newline='') as f:
+            edges_writer = csv.writer(f)
+            edges_writer.writerow(EDGE_FIELDS)
+            await asyncio.gather(*(self._worker(edges_writer) for _ in range(self.concurrency)))
+
+        print(f"\nRede expandida: {self._expanded} perfis baixados, "
+              f"{len(self.nodes)} nós, {len(self.edges)} arestas")
+
+
+def write_nodes_csv(nodes: Dict[str, dict], path: str):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=NODE_FIELDS)
+        writer.writeheader()
+        writer.writerows(nodes.values())
+
+
+def csv_to_parquet(csv_path: str) -> str:
+    """Converte um CSV gerado pelo crawler em Parquet (requer pyarrow)."""
+    try:
+        from pyarrow import csv as pa_csv
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("O formato parquet requer o pacote pyarrow")
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    pq.write_table(pa_csv.read_csv(csv_path), parquet_path)
+    os.remove(csv_path)
+    return parquet_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expande a rede de coautoria do Google Scholar.")
+    parser.add_argument("seeds", nargs="+", help="URLs de perfil ou IDs user= das sementes")
+    parser.add_argument("--depth", type=int, default=1, help="Profundidade máxima (padrão: 1)")
+    parser.add_argument("--concurrency", type=int, default=POOL_SIZE,
+                        help=f"Perfis baixados ao mesmo tempo (padrão: {POOL_SIZE})")
+    parser.add_argument("--max-nodes", type=int, default=None, help="Limite de perfis expandidos")
+    parser.add_argument("--out", default="grafo", help="Diretório de saída (padrão: grafo)")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    edges_path = os.path.join(args.out, 'edges.csv')
+    nodes_path = os.path.join(args.out, 'nodes.csv')
+
+    crawler = CoauthorGraphCrawler(args.depth, args.concurrency, edges_path, args.max_nodes)
+    run_sync(crawler.run(args.seeds))
+    write_nodes_csv(crawler.nodes, nodes_path)
+
+    if args.format == 'parquet':
+        edges_path = csv_to_parquet(edges_path)
+        nodes_path = csv_to_parquet(nodes_path)
+    print(f"💾 Arestas: {edges_path}")
+    print(f"💾 Nós: {nodes_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,50 +2,12 @@
 import sys
 import warnings
 import json
-import os
-from datetime import datetime
 from crew import executar
-
-def normalize_name(name: str) -> str:
-    """
-    Normaliza o nome do pesquisador para criar um caminho seguro para arquivo.
-    
-    Args:
-        name: Nome do pesquisador
-        
-    Returns:
-        str: Nome normalizado e seguro para uso em caminhos de arquivo
-    """
-    # Remove espaços extras e converte para minúsculas
-    normalized = name.strip()
-    
-    # Substitui caracteres especiais e espaços por underscore
-    import re
-    normalized = re.sub(r'[^a-zA-Z0-9\s]', '', normalized)
-    normalized = normalized.replace(' ', '_')
-    
-    return normalized
+from store import result_store
+from tools.scholar_ids import extract_user_id
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
-def save_result(researcher_name: str, data: dict):
-    """Salva o resultado em um arquivo JSON"""
-    # Criar diretório data se não existir
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(base_dir, 'data')
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # Criar nome do arquivo com timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"{normalize_name(researcher_name)}_{timestamp}.json"
-    filepath = os.path.join(data_dir, filename)
-    
-    # Salvar arquivo
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    return filepath
-
 def run():
     """
     Inicia a crew para busca e análise de perfil do Google Scholar.
@@ -75,13 +37,13 @@ def run():
             # Tentar parsear como JSON
             parsed_result = json.loads(result_str)
             
-            # Salvar resultado em arquivo
-            saved_file = save_result(researcher_name, parsed_result)
-            
             # Exibir resultados
             print("\n🔍 Resultado da análise:\n")
             print(json.dumps(parsed_result, indent=2, ensure_ascii=False))
-            print(f"\n💾 Resultado salvo em: {saved_file}")
+            # Erros e respostas sem perfil não são gravados no banco
+            user_id = extract_user_id(parsed_result.get('profile_url')) if isinstance(parsed_result, dict) else None
+            if user_id and 'error' not in parsed_result and result_store.get(user_id) is not None:
+                print(f"\n💾 Resultado salvo no banco local: {result_store.path}")
             
         except json.JSONDecodeError:
             # Se não for JSON, mostrar como texto
@@ -7,6 +7,15 @@ class Article(BaseModel):
     url: HttpUrl = Field(..., description="article URL")
     abstract: Optional[str] = Field(None, description="article abstract/summary extracted from the article page")
 
+class Publication(BaseModel):
+    """Modelo para uma linha da lista completa de publicações do perfil"""
+    title: str = Field(..., description="article title")
+    url: Optional[HttpUrl] = Field(None, description="article URL")
+    authors: Optional[str] = Field(None, description="article authors as shown in the profile")
+    venue: Optional[str] = Field(None, description="publication venue as shown in the profile")
+    citations: int = Field(0, description="number of citations")
+    year: Optional[int] = Field(None, description="publication year")
+
 class Coauthor(BaseModel):
     """Modelo para representar um coautor"""
     name: str = Field(..., description="coauthor name")
@@ -19,6 +28,8 @@ class ScholarProfile(BaseModel):
     name: str = Field(..., description="researcher name")
     profile_url: HttpUrl = Field(..., description="Google Scholar Profile URL")
     research_area: str = Field(..., description="researcher main research area")
+    institution: Optional[str] = Field(None, description="researcher affiliation as shown in the profile")
+    email_domain: Optional[str] = Field(None, description="researcher verified email domain")
     total_citations: int = Field(..., description="total number of citations")
     articles: List[Article] = Field(
         ..., 
@@ -0,0 +1,147 @@
+import json
+import os
+import uuid
+from contextlib import aclosing
+from typing import Optional
+
+from tools.scholar_search_tool import NO_PROFILES_FOUND, ScholarSearchError, iter_search_pages
+from tools.profile_filter_tool import CamposFiltro, confident_match, rank_profiles_async
+from tools.scholar_crawler_tool import PUBLICATIONS_PAGE_SIZE, crawl_scholar_profile, stream_profile_publications
+from tools.scholar_ids import extract_user_id
+from tools.tracing import traced
+from store import result_store
+
+# Diferença mínima de score entre o 1º e o 2º candidato para considerar a escolha segura
+AMBIGUITY_MARGIN = float(os.getenv("SCHOLAR_AMBIGUITY_MARGIN", "1.0"))
+
+
+@traced('resolver_perfil')
+async def resolver_perfil(researcher_name: str, email: Optional[str] = None,
+                          institution: Optional[str] = None, refresh: bool = False) -> dict:
+    """
+    Busca o pesquisador e escolhe o perfil mais provável entre os candidatos.
+
+    As páginas de resultados são lidas uma a uma, até que os cartões vistos
+    bastem para escolher o perfil (`confident_match`) ou acabe o limite de
+    páginas: em nomes comuns o perfil certo muitas vezes não está na primeira.
+
+    Args:
+        researcher_name: Nome do pesquisador
+        email: Domínio de email do pesquisador (opcional)
+        institution: Instituição do pesquisador (opcional)
+        refresh: Ignora o cache de buscas e busca de novo no Scholar
+
+    Returns:
+        dict: {"profile_url", "ambiguous", "ranking"} ou {"error": ...} quando
+        nenhum perfil é encontrado. `ambiguous` indica que os dois melhores
+        candidatos ficaram a menos de AMBIGUITY_MARGIN pontos um do outro.
+    """
+    campos = CamposFiltro(
+        profiles=[],
+        researcher_name=researcher_name,
+        email=email,
+        institution=institution,
+    )
+    candidates = []
+    try:
+        async with aclosing(iter_search_pages(researcher_name, email, institution, refresh=refresh)) as pages:
+            async for page in pages:
+                candidates.extend(page)
+                if candidates and confident_match(campos, candidates):
+                    break
+    except ScholarSearchError as e:
+        return {"error": str(e)}
+    if not candidates:
+        return {"error": NO_PROFILES_FOUND}
+
+    profiles = [candidate.url for candidate in candidates]
+    if len(profiles) == 1:
+        return {"profile_url": profiles[0], "ambiguous": False, "ranking": [(profiles[0], None)]}
+
+    campos.profiles = profiles
+    # Os cartões da busca já trazem nome, afiliação, email e citações: só os
+    # perfis que continuam na disputa são abertos
+    ranking = await rank_profiles_async(campos, candidates)
+    if not ranking:
+        return {"profile_url": profiles[0], "ambiguous": True, "ranking": []}
+
+    ambiguous = len(ranking) > 1 and ranking[0][1] - ranking[1][1] < AMBIGUITY_MARGIN
+    return {"profile_url": ranking[0][0], "ambiguous": ambiguous, "ranking": ranking}
+
+
+@traced('salvar_publicacoes')
+async def salvar_publicacoes(profile_url: str) -> int:
+    """
+    Grava no banco local a lista completa de publicações do perfil.
+
+    As publicações chegam em streaming (`stream_profile_publications`) e são
+    gravadas a cada página, sem montar a lista inteira em memória, sob uma
+    chave de preparo. A lista anterior só é substituída quando o streaming
+    termina; se ele falhar, a lista salva continua a mesma.
+
+    Returns:
+        int: Número de publicações gravadas
+    """
+    user_id = extract_user_id(profile_url)
+    if not user_id:
+        return 0
+    staging_key = f"{user_id}:staging:{uuid.uuid4().hex}"
+    count = 0
+    chunk = []
+    try:
+        async for publication in stream_profile_publications(profile_url):
+            chunk.append(publication)
+            if len(chunk) >= PUBLICATIONS_PAGE_SIZE:
+                count += result_store.add_publications(staging_key, count, chunk)
+                chunk = []
+        count += result_store.add_publications(staging_key, count, chunk)
+    except BaseException:
+        result_store.clear_publications(staging_key)
+        raise
+    result_store.replace_publications(user_id, staging_key)
+    print(f"{count} publicações gravadas para {profile_url}")
+    return count
+
+
+async def processar_lead(researcher_name: str, email: Optional[str] = None,
+                         institution: Optional[str] = None, refresh: bool = False,
+                         publications: bool = False) -> dict:
+    """
+    Executa busca → filtro → crawler para um pesquisador, sem passar pelos agentes.
+
+    Pesquisadores já analisados vêm do banco local de resultados, sem acessar
+    o Scholar; os perfis novos são gravados nele. Buscas repetidas vêm do
+    cache de buscas.
+
+    Args:
+        researcher_name: Nome do pesquisador
+        email: Domínio de email do pesquisador (opcional)
+        institution: Instituição do pesquisador (opcional)
+        refresh: Ignora o resultado salvo e o cache de buscas e busca de novo
+        publications: Modo de publicações completas: grava também todas as
+            publicações do perfil no banco local (`publication_count` no resultado)
+
+    Returns:
+        dict: Perfil estruturado (mesmo formato do ScholarProfile) ou {"error": ...}
+    """
+    saved = None if refresh else result_store.lookup(researcher_name, email, institution)
+    if saved is not None:
+        result = saved
+        # Perfil salvo antes, sem as publicações completas: só a lista é baixada
+        refresh_publications = (publications
+                                and result_store.publication_count(extract_user_id(result["profile_url"])) == 0)
+    else:
+        resolucao = await resolver_perfil(researcher_name, email, institution, refresh=refresh)
+        if "error" in resolucao:
+            return resolucao
+
+        result = json.loads(await crawl_scholar_profile(resolucao["profile_url"]))
+        if result_store.save(result, researcher_name, email, institution) is None:
+            return result
+        refresh_publications = publications
+
+    if refresh_publications:
+        result["publication_count"] = await salvar_publicacoes(result["profile_url"])
+    elif publications:
+        result["publication_count"] = result_store.publication_count(extract_user_id(result["profile_url"]))
+    return result
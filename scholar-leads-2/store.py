@@ -0,0 +1,449 @@
+#!/usr/bin/env python
+"""
+Banco local dos perfis já analisados.
+
+Substitui os arquivos `{nome}_{timestamp}.json` em `data/`. Cada perfil é
+gravado em SQLite pela chave `user=` do Scholar, com upsert, em três tabelas:
+
+- `profiles`: nome, instituição, domínio de email, área e citações, além do
+  JSON completo do resultado
+- `articles`: artigos relevantes do perfil
+- `coauthors`: coautores do perfil
+- `publications`: lista completa de publicações do perfil (modo de
+  publicações completas, `processar_lead(..., publications=True)`)
+
+Índices em nome, instituição e domínio de email (e um índice FTS5 do nome e
+da instituição, quando o SQLite tem FTS5) permitem descobrir em milissegundos
+se um pesquisador já foi analisado. A comparação de nomes usa um
+`tools.name_matching.NameIndex` em memória com todos os perfis e coautores
+salvos. A tabela `leads` guarda qual perfil respondeu cada consulta (nome,
+email, instituição), para que repetir uma consulta não dispare a busca de novo.
+
+Uso:
+    python store.py "maria silva"              # busca textual nos perfis salvos
+    python store.py "M. Silva" --similar       # nomes parecidos, incluindo coautores
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from tools.affiliation import institution_matcher
+from tools.name_matching import NameIndex, NameMatch, name_tokens
+from tools.scholar_ids import _name_key, extract_user_id
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_PATH = os.path.join(BASE_DIR, 'data', 'results.sqlite')
+
+# Resultados mais antigos que isso são crawleados de novo
+DAY = 24 * 60 * 60
+STORE_MAX_AGE = float(os.getenv("SCHOLAR_STORE_MAX_AGE_DAYS", "30")) * DAY
+
+# Similaridade mínima (tools.name_matching) para `lookup` aceitar pelo nome um perfil salvo
+# cujo email ou instituição confirma a consulta; sem email nem instituição, só o nome exato
+LOOKUP_NAME_MIN = float(os.getenv("SCHOLAR_STORE_NAME_MIN", "0.75"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    profile_url TEXT NOT NULL,
+    institution TEXT,
+    email_domain TEXT,
+    research_area TEXT,
+    total_citations INTEGER,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT,
+    abstract TEXT,
+    PRIMARY KEY (user_id, position)
+);
+CREATE TABLE IF NOT EXISTS coauthors (
+    user_id TEXT NOT NULL,
+    coauthor_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    profile_url TEXT,
+    institution TEXT,
+    email_domain TEXT,
+    PRIMARY KEY (user_id, coauthor_key)
+);
+CREATE TABLE IF NOT EXISTS publications (
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT,
+    authors TEXT,
+    venue TEXT,
+    citations INTEGER,
+    year INTEGER,
+    PRIMARY KEY (user_id, position)
+);
+CREATE TABLE IF NOT EXISTS leads (
+    lead_key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_profiles_name ON profiles (name_key);
+CREATE INDEX IF NOT EXISTS idx_profiles_institution ON profiles (institution COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_profiles_email ON profiles (email_domain);
+CREATE INDEX IF NOT EXISTS idx_coauthors_key ON coauthors (coauthor_key);
+CREATE INDEX IF NOT EXISTS idx_coauthors_email ON coauthors (email_domain);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+    user_id UNINDEXED, name, institution, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def lead_key(name: str, email: Optional[str], institution: Optional[str]) -> str:
+    """Chave de uma consulta (nome, email, instituição); também identifica os leads no checkpoint do batch."""
+    return "|".join((part or "").strip().lower() for part in (name, email, institution))
+
+
+def _email_domain(email: Optional[str]) -> Optional[str]:
+    """Aceita tanto o email completo quanto só o domínio."""
+    if not email:
+        return None
+    return email.strip().lower().rsplit('@', 1)[-1]
+
+
+def _fts_query(value: str) -> str:
+    # Cada palavra entre aspas: a consulta exige todas, e aspas/operadores do usuário não quebram o FTS
+    return ' '.join('"' + word.replace('"', '') + '"' for word in value.split() if word.replace('"', ''))
+
+
+class ResultStore:
+    """
+    Banco SQLite com os resultados do crawler, seguro para uso entre threads.
+
+    Args:
+        path: Caminho do arquivo SQLite
+        max_age: Idade máxima, em segundos, de um resultado devolvido por `lookup`
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_age: float = STORE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.fts = False
+        self._lock = threading.Lock()
+        self._conn = None
+        self._names: Optional[NameIndex] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                print("[store] SQLite sem FTS5, busca textual usando LIKE")
+        return self._conn
+
+    def save(self, result: dict, name: Optional[str] = None, email: Optional[str] = None,
+             institution: Optional[str] = None) -> Optional[str]:
+        """
+        Grava (ou atualiza) o perfil do resultado e registra a consulta que o encontrou.
+
+        Args:
+            result: Perfil no formato do ScholarProfile
+            name, email, institution: Consulta que levou ao perfil (opcional)
+
+        Returns:
+            str: ID `user=` do perfil, ou None se o resultado não tem perfil
+        """
+        user_id = extract_user_id(result.get('profile_url'))
+        if not user_id or 'error' in result:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO profiles (user_id, name, name_key, profile_url, institution, email_domain,
+                                          research_area, total_citations, data, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        name = excluded.name,
+                        name_key = excluded.name_key,
+                        profile_url = excluded.profile_url,
+                        institution = excluded.institution,
+                        email_domain = excluded.email_domain,
+                        research_area = excluded.research_area,
+                        total_citations = excluded.total_citations,
+                        data = excluded.data,
+                        updated_at = excluded.updated_at
+                    """,
+                    (user_id, result.get('name') or '', _name_key(result.get('name') or ''),
+                     str(result['profile_url']), result.get('institution'), result.get('email_domain'),
+                     result.get('research_area'), result.get('total_citations'),
+                     json.dumps(result, ensure_ascii=False), now),
+                )
+                # Artigos e coautores acompanham o perfil: a versão nova substitui a anterior
+                conn.execute("DELETE FROM articles WHERE user_id = ?", (user_id,))
+                conn.executemany(
+                    "INSERT INTO articles (user_id, position, title, url, abstract) VALUES (?, ?, ?, ?, ?)",
+                    [(user_id, i, article.get('title') or '', article.get('url'), article.get('abstract'))
+                     for i, article in enumerate(result.get('articles') or [])],
+                )
+                conn.execute("DELETE FROM coauthors WHERE user_id = ?", (user_id,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO coauthors (user_id, coauthor_key, position, name, profile_url, "
+                    "institution, email_domain) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(user_id, self._coauthor_key(coauthor), i, coauthor.get('name') or '',
+                      coauthor.get('profile_url'), coauthor.get('institution'), coauthor.get('email_domain'))
+                     for i, coauthor in enumerate(result.get('coauthors') or [])],
+                )
+                if self.fts:
+                    conn.execute("DELETE FROM profiles_fts WHERE user_id = ?", (user_id,))
+                    conn.execute(
+                        "INSERT INTO profiles_fts (user_id, name, institution) VALUES (?, ?, ?)",
+                        (user_id, result.get('name') or '', result.get('institution') or ''),
+                    )
+                if name:
+                    self._remember_lead(conn, lead_key(name, email, institution), user_id, now)
+            if self._names is not None:
+                self._names.extend(self._coauthor_names(result.get('coauthors') or []))
+                self._names.add(user_id, result.get('name') or '')
+        return user_id
+
+    @staticmethod
+    def _coauthor_key(coauthor: dict) -> str:
+        user_id = extract_user_id(coauthor.get('profile_url'))
+        return user_id if user_id else f"name:{_name_key(coauthor.get('name') or '')}"
+
+    @staticmethod
+    def _coauthor_names(coauthors: Iterable[dict]) -> Iterator[Tuple[str, str]]:
+        for coauthor in coauthors:
+            user_id = extract_user_id(coauthor.get('profile_url'))
+            if user_id:
+                yield user_id, coauthor.get('name') or ''
+
+    def _name_index(self, conn: sqlite3.Connection) -> NameIndex:
+        """Índice de nomes de todos os pesquisadores com ID conhecido: perfis e coautores."""
+        if self._names is None:
+            self._names = NameIndex(
+                (row['coauthor_key'], row['name'])
+                for row in conn.execute("SELECT coauthor_key, name FROM coauthors WHERE coauthor_key NOT LIKE 'name:%'")
+            )
+            # Perfis por último: o nome do próprio perfil prevalece sobre a grafia de quem o cita
+            self._names.extend((row['user_id'], row['name']) for row in conn.execute("SELECT user_id, name FROM profiles"))
+        return self._names
+
+    @staticmethod
+    def _remember_lead(conn: sqlite3.Connection, key: str, user_id: str, now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO leads (lead_key, user_id, resolved_at) VALUES (?, ?, ?)",
+            (key, user_id, now),
+        )
+
+    def get(self, user_id: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """Resultado salvo de um perfil, se existir e não for mais antigo que `max_age`."""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data, updated_at FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None or time.time() - row['updated_at'] > max_age:
+            return None
+        return json.loads(row['data'])
+
+    def lookup(self, name: str, email: Optional[str] = None, institution: Optional[str] = None,
+               max_age: Optional[float] = None) -> Optional[dict]:
+        """
+        Procura um resultado salvo para a consulta, sem acessar o Scholar.
+
+        Primeiro pela mesma consulta já respondida antes; depois pelo nome.
+        Com domínio de email ou instituição, o nome pode ser parecido
+        (tools.name_matching: sem acentos, partículas ou ordem, aceitando
+        iniciais) desde que o perfil salvo confirme o email e a instituição
+        informados. Só com o nome, ele precisa ser igual ao do perfil (sem
+        acentos, caixa e partículas, na mesma ordem): "J. Silva" e "Silva
+        José" não respondem por "José Silva". Pelo nome, só devolve o perfil
+        quando exatamente um candidato atende aos filtros; a resposta não é
+        registrada em `leads`, que só guarda as consultas resolvidas pela
+        busca no Scholar (`save`).
+        """
+        max_age = self.max_age if max_age is None else max_age
+        key = lead_key(name, email, institution)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT user_id FROM leads WHERE lead_key = ?", (key,)).fetchone()
+            if row is None:
+                candidates = self._candidates(conn, name, _email_domain(email), institution, time.time() - max_age)
+                if len(candidates) != 1:
+                    return None
+                row = candidates[0]
+        return self.get(row['user_id'], max_age)
+
+    def _candidates(self, conn: sqlite3.Connection, name: str, domain: Optional[str],
+                    institution: Optional[str], min_updated: float) -> List[sqlite3.Row]:
+        if domain or institution:
+            matches = self._name_index(conn).top_k(name, k=50, min_score=LOOKUP_NAME_MIN)
+        else:
+            # Sem nada que confirme, só o mesmo nome: um nome parecido pode ser outra pessoa
+            tokens = name_tokens(name)
+            matches = [match for match in self._name_index(conn).top_k(name, k=50, min_score=1.0)
+                       if name_tokens(match.name) == tokens]
+        if not matches:
+            return []
+        conditions = [f"p.user_id IN ({', '.join('?' * len(matches))})", "p.updated_at >= ?"]
+        params = [match.key for match in matches] + [min_updated]
+        if domain:
+            # "ufjf.br" também aceita subdomínios como "ice.ufjf.br"
+            conditions.append("(p.email_domain = ? OR p.email_domain LIKE ?)")
+            params += [domain, f"%.{domain}"]
+        if institution:
+            # Siglas e apelidos do dicionário ("UFJF") também casam com o nome completo da instituição
+            match = institution_matcher.search(institution)
+            conditions.append("(p.institution LIKE ? OR p.institution LIKE ?)")
+            params += [f"%{institution.strip()}%", f"%{match.canonical if match else institution.strip()}%"]
+        sql = f"SELECT p.user_id FROM profiles p WHERE {' AND '.join(conditions)} LIMIT 2"
+        return conn.execute(sql, params).fetchall()
+
+    def similar(self, name: str, k: int = 10) -> List[NameMatch]:
+        """Os k pesquisadores salvos (perfis e coautores) com nome mais parecido com `name`."""
+        with self._lock:
+            return self._name_index(self._connection()).top_k(name, k)
+
+    def search(self, text: str, limit: int = 20) -> List[dict]:
+        """Busca textual em nome e instituição dos perfis salvos."""
+        query = _fts_query(text)
+        if not query:
+            return []
+        with self._lock:
+            conn = self._connection()
+            if self.fts:
+                rows = conn.execute(
+                    "SELECT p.user_id, p.name, p.institution, p.email_domain, p.total_citations, p.updated_at "
+                    "FROM profiles_fts JOIN profiles p ON p.user_id = profiles_fts.user_id "
+                    "WHERE profiles_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            else:
+                pattern = f"%{text.strip()}%"
+                rows = conn.execute(
+                    "SELECT user_id, name, institution, email_domain, total_citations, updated_at FROM profiles "
+                    "WHERE name LIKE ? OR institution LIKE ? ORDER BY total_citations DESC LIMIT ?",
+                    (pattern, pattern, limit),
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def coauthors_of(self, user_id: str) -> Iterator[sqlite3.Row]:
+        """Coautores salvos de um perfil, na ordem do resultado."""
+        with self._lock:
+            return iter(self._connection().execute(
+                "SELECT * FROM coauthors WHERE user_id = ? ORDER BY position", (user_id,)
+            ).fetchall())
+
+    def clear_publications(self, user_id: str):
+        """Remove as publicações salvas sob a chave (perfil ou área de preparo)."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM publications WHERE user_id = ?", (user_id,))
+
+    def replace_publications(self, user_id: str, staging_key: str):
+        """
+        Troca as publicações do perfil pelas gravadas sob `staging_key`.
+
+        A lista nova é gravada em partes sob uma chave de preparo e só
+        substitui a anterior aqui, em uma única transação, depois que o
+        streaming terminou: uma falha no meio não apaga a lista salva.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM publications WHERE user_id = ?", (user_id,))
+                conn.execute("UPDATE publications SET user_id = ? WHERE user_id = ?", (user_id, staging_key))
+
+    def add_publications(self, user_id: str, start: int, publications: Iterable) -> int:
+        """
+        Acrescenta publicações (models.Publication) ao perfil a partir da posição `start`.
+
+        A lista completa chega em partes, conforme as páginas do perfil são
+        baixadas; cada parte é gravada em uma transação.
+        """
+        rows = [
+            (user_id, start + i, publication.title, str(publication.url) if publication.url else None,
+             publication.authors, publication.venue, publication.citations, publication.year)
+            for i, publication in enumerate(publications)
+        ]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO publications (user_id, position, title, url, authors, venue, "
+                    "citations, year) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def publication_count(self, user_id: str) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM publications WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            return {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('profiles', 'articles', 'coauthors', 'publications', 'leads')
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._names = None
+
+
+result_store = ResultStore(os.getenv("SCHOLAR_STORE", DEFAULT_STORE_PATH))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca nos perfis já salvos no banco local.")
+    parser.add_argument("query", help="Nome ou instituição")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--similar", action="store_true",
+                        help="Lista os nomes mais parecidos (perfis e coautores) em vez da busca textual")
+    args = parser.parse_args()
+
+    if args.similar:
+        for match in result_store.similar(args.query, args.limit):
+            print(f"{match.key:<14}{match.name:<36}{match.score:>6.2f}")
+        return
+
+    rows = result_store.search(args.query, args.limit)
+    for row in rows:
+        updated = time.strftime('%Y-%m-%d', time.localtime(row['updated_at']))
+        print(f"{row['user_id']:<14}{row['name']:<36}{row['institution'] or '-':<48}"
+              f"{row['email_domain'] or '-':<18}{row['total_citations'] or 0:>8}  {updated}")
+    stats = result_store.stats()
+    print(f"\n{len(rows)} resultado(s); {stats['profiles']} perfis, {stats['leads']} consultas no banco "
+          f"({result_store.path})")
+
+
+if __name__ == "__main__":
+    main()
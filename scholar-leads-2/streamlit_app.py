@@ -2,7 +2,7 @@ import streamlit as st
 import json
 from crew import executar
 import os
-from utils import save_result
+from store import result_store
 
 # Configuração da página
 st.set_page_config(page_title="Google Scholar Leads Search", page_icon="🔍", layout="centered")
@@ -18,6 +18,7 @@ with st.expander("Opções avançadas para melhorar a busca"):
     st.markdown("Estas informações são usadas para melhorar a precisão da busca quando existem múltiplos pesquisadores com o mesmo nome.")
     email_domain = st.text_input("Domínio do email (opcional, ex: ufjf.edu.br):")
     instituicao = st.text_input("Instituição (opcional, ex: UFJF):")
+    atualizar = st.checkbox("Buscar de novo no Google Scholar, mesmo que o pesquisador já tenha sido analisado")
 
 # Botão para iniciar a busca
 if st.button("Buscar e Analisar"):
@@ -29,7 +30,7 @@ if st.button("Buscar e Analisar"):
                 institution = instituicao.strip() if instituicao.strip() else None
                 
                 # Executa o CrewAI
-                resultado = executar(pesquisador, email, institution)
+                resultado = executar(pesquisador, email, institution, atualizar=atualizar)
                 
                 # Converter o resultado para string se necessário
                 if hasattr(resultado, 'raw_output'):
@@ -47,9 +48,6 @@ if st.button("Buscar e Analisar"):
                         st.info("Tente ajustar os termos da busca ou adicionar mais informações como instituição ou email para encontrar o perfil.")
                         st.stop()
                     
-                    # Salvar em arquivo
-                    filepath = save_result(pesquisador, resultado_json)
-                    
                     # Exibir os dados estruturados
                     st.success("✅ Análise concluída com sucesso!")
                     
@@ -228,7 +226,7 @@ if st.button("Buscar e Analisar"):
                     
                     # Arquivo salvo
                     st.divider()
-                    st.caption(f"💾 Resultado salvo em: {filepath}")
+                    st.caption(f"💾 Resultado salvo no banco local: {result_store.path}")
                     
                 except json.JSONDecodeError:
                     st.error(f"❌ Erro ao processar os dados: Não foi possível interpretar o resultado como JSON.")
@@ -0,0 +1,332 @@
+"""
+Parsing de afiliação e email dos coautores.
+
+O texto de um coautor no Scholar junta nome, afiliação e a linha de email
+verificado (ex.: "Ana Costa Universidade Federal do Rio de Janeiro E-mail
+confirmado em ufrj.br"), às vezes sem separador quando vem do
+`text_content()`. Este módulo separa as três partes:
+
+- a linha de email é localizada pelas variantes em inglês ("Verified email
+  at") e português ("E-mail confirmado em", "E-mail verificado em"), e o
+  domínio é lido com um regex pré-compilado;
+- o início da afiliação é a primeira instituição conhecida ou palavra típica
+  de afiliação ("Universidade", "Institute", "Professor"...).
+
+As instituições conhecidas vêm de `config/institutions.txt` (ou de
+`SCHOLAR_INSTITUTIONS_FILE`) e ficam em uma trie de palavras montada uma
+única vez. A comparação ignora acentos, maiúsculas/minúsculas e pontuação,
+exceto nas siglas, que precisam aparecer exatamente como no dicionário.
+As palavras normalizadas e o resultado da trie para o trecho a partir da
+afiliação (título e instituição, repetidos entre coautores) ficam em cache.
+"""
+import functools
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INSTITUTIONS_FILE = os.getenv(
+    "SCHOLAR_INSTITUTIONS_FILE", os.path.join(BASE_DIR, 'config', 'institutions.txt')
+)
+
+# Variantes da linha de email verificado (procuradas no texto em minúsculas). O
+# prefixo opcional ("E-mail confirmado em") é incorporado depois de achar o marcador
+VERIFIED_EMAIL_MARKERS = ('confirmado em', 'verificado em', 'verified email at', 'verified e-mail at')
+_EMAIL_PREFIXES = ('e-mail ', 'email ')
+_DOMAIN_RE = re.compile(r'\s*([\w-]+(?:\.[\w-]+)+)')
+
+# Palavras que costumam abrir a afiliação quando a instituição não está no dicionário
+GENERIC_MARKERS = (
+    'Universidade', 'Universidad', 'University', 'Université', 'Universität', 'Univ.',
+    'Instituto', 'Institute', 'Institut', 'Faculdade', 'Faculty', 'Escola', 'School', 'College',
+    'Centro', 'Center', 'Centre', 'Departamento', 'Department', 'Laboratório', 'Laboratory',
+    'Hospital', 'Fundação', 'Foundation', 'Professor', 'Professora', 'Prof.', 'Doutor', 'Doutora',
+    'Doutorando', 'Doutoranda', 'Mestrando', 'Mestranda', 'Pesquisador', 'Pesquisadora',
+    'Researcher', 'Research', 'PhD', 'Ph.D.', 'Postdoc', 'Pós-doutorando', 'Pós-doutoranda',
+    'Associate', 'Assistant', 'Lecturer', 'Student', 'Estudante', 'Engenheiro', 'Engenheira',
+    'Engineer', 'Scientist', 'Cientista',
+)
+
+# Pontuação ignorada nas bordas de cada palavra (e, com espaços, nas bordas do nome e da afiliação)
+_PUNCTUATION = ',.;:()[]{}"\'-–—/'
+_EDGES = _PUNCTUATION + ' '
+
+# Palavras já separadas e normalizadas, e trechos de afiliação já percorridos na
+# trie, guardados em memória: títulos e instituições se repetem muito entre coautores
+WORD_CACHE_SIZE = 65536
+AFFILIATION_CACHE_SIZE = 16384
+
+
+def _accent_table() -> Dict[int, str]:
+    table = {}
+    for codepoint in range(0xC0, 0x250):
+        base = unicodedata.normalize('NFKD', chr(codepoint))[0]
+        if base != chr(codepoint) and base.isascii() and base.isalpha():
+            table[codepoint] = base
+    return table
+
+
+_ACCENTS = _accent_table()
+
+
+def fold_accents(value: str) -> str:
+    """Remove os acentos de letras latinas ("São" → "Sao")."""
+    return value.translate(_ACCENTS)
+
+
+def _split_camel(word: str) -> List[Tuple[int, str]]:
+    """Separa palavras coladas pelo text_content() ("CostaUniversidade" → "Costa", "Universidade")."""
+    parts, last = [], 0
+    for i in range(1, len(word)):
+        if word[i].isupper() and word[i - 1].islower():
+            parts.append((last, word[last:i]))
+            last = i
+    parts.append((last, word[last:]))
+    return parts
+
+
+@functools.lru_cache(maxsize=WORD_CACHE_SIZE)
+def _word_tokens(word: str) -> Tuple[Tuple[int, str, str], ...]:
+    """Partes de uma palavra como (posição na palavra, parte original, chave sem acento/caixa/pontuação)."""
+    tokens = []
+    # Caminho comum: palavra sem junção "minúscula → maiúscula"
+    parts = ((0, word),) if word.istitle() or word.islower() or word.isupper() else _split_camel(word)
+    for offset, part in parts:
+        stripped = part.strip(_PUNCTUATION)
+        if not stripped:
+            continue
+        key = stripped.lower()
+        start = offset + (part.index(stripped) if len(stripped) != len(part) else 0)
+        tokens.append((start, stripped, key if key.isascii() else fold_accents(key)))
+    return tuple(tokens)
+
+
+def _tokens(value: str) -> List[Tuple[int, str, str]]:
+    """Palavras de `value` como (posição, palavra original, chave sem acento/caixa/pontuação)."""
+    tokens = []
+    position = 0
+    for word in value.split():
+        position = value.find(word, position)
+        parts = _word_tokens(word)
+        if len(parts) == 1 and not parts[0][0]:
+            tokens.append((position, parts[0][1], parts[0][2]))
+        else:
+            tokens.extend((position + offset, part, key) for offset, part, key in parts)
+        position += len(word)
+    return tokens
+
+
+def _is_acronym(alias: str) -> bool:
+    return alias.isupper() and ' ' not in alias
+
+
+class InstitutionMatch(NamedTuple):
+    start: int
+    end: int
+    canonical: Optional[str]  # None para palavras genéricas de afiliação
+
+
+class Affiliation(NamedTuple):
+    name: str
+    institution: Optional[str]
+    canonical: Optional[str]
+    email_domain: Optional[str]
+
+
+def load_institutions(path: str = INSTITUTIONS_FILE) -> List[Tuple[str, List[str]]]:
+    """Lê o dicionário: uma instituição por linha, "Nome canônico|apelido|SIGLA"."""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            names = [name.strip() for name in line.split('|') if name.strip()]
+            entries.append((names[0], names[1:]))
+    return entries
+
+
+# Chave do nó da trie onde fica o valor (canônico, sigla exigida) do nome que termina ali
+_TERMINAL = ''
+
+
+class InstitutionMatcher:
+    """
+    Localiza instituições em textos de afiliação.
+
+    Os nomes e siglas ficam em uma trie de palavras (dicts aninhados). A busca
+    percorre as palavras do texto uma vez e, em cada posição, desce a trie
+    enquanto as palavras seguintes casarem, ficando com o nome mais longo. O
+    custo depende do tamanho do texto, não do tamanho do dicionário.
+
+    Args:
+        entries: Pares (nome canônico, apelidos), como os de `load_institutions`
+        generic_markers: Palavras que abrem uma afiliação desconhecida
+        cache_size: Trechos de afiliação guardados por `locate`
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, List[str]]], generic_markers: Iterable[str] = GENERIC_MARKERS,
+                 cache_size: int = AFFILIATION_CACHE_SIZE):
+        self._trie: dict = {}
+        self.size = 0
+        self._locate_tail = functools.lru_cache(maxsize=cache_size)(
+            functools.partial(self._locate, skip_leading=False)
+        )
+        for canonical, aliases in entries:
+            for alias in [canonical, *aliases]:
+                # Siglas só casam escritas exatamente como no dicionário
+                self._insert(alias, (canonical, alias if _is_acronym(alias) else None))
+        for marker in generic_markers:
+            self._insert(marker, (None, None))
+
+    def _insert(self, alias: str, value: Tuple[Optional[str], Optional[str]]):
+        node = self._trie
+        for _, _, key in _tokens(alias):
+            node = node.setdefault(key, {})
+        current = node.get(_TERMINAL)
+        if current is None or self._priority(value) > self._priority(current):
+            self.size += current is None or current[0] is None
+            node[_TERMINAL] = value
+
+    @staticmethod
+    def _priority(value: Tuple[Optional[str], Optional[str]]) -> int:
+        # Nome sem restrição de caixa > sigla exata > palavra genérica
+        if value[0] is None:
+            return 0
+        return 1 if value[1] is not None else 2
+
+    @classmethod
+    def from_file(cls, path: str = INSTITUTIONS_FILE) -> 'InstitutionMatcher':
+        try:
+            entries = load_institutions(path)
+        except OSError as e:
+            print(f"[affiliation] Dicionário de instituições indisponível ({path}): {str(e)}")
+            entries = []
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def finditer(self, value: str) -> Iterator[InstitutionMatch]:
+        """Instituições e palavras de afiliação em `value`, da esquerda para a direita."""
+        tokens = _tokens(value)
+        trie = self._trie
+        count = len(tokens)
+        i = 0
+        while i < count:
+            node = trie.get(tokens[i][2])
+            best = None
+            j = i
+            while node is not None:
+                terminal = node.get(_TERMINAL)
+                if terminal is not None and (terminal[1] is None or self._exact(value, tokens, i, j, terminal[1])):
+                    best = (j, terminal[0])
+                j += 1
+                if j == count:
+                    break
+                node = node.get(tokens[j][2])
+            if best is None:
+                i += 1
+                continue
+            last = tokens[best[0]]
+            yield InstitutionMatch(tokens[i][0], last[0] + len(last[1]), best[1])
+            i = best[0] + 1
+
+    @staticmethod
+    def _exact(value: str, tokens, first: int, last: int, acronym: str) -> bool:
+        end = tokens[last][0] + len(tokens[last][1])
+        return value[tokens[first][0]:end] == acronym
+
+    def _first_root(self, value: str) -> Optional[int]:
+        """Posição da primeira palavra que inicia algum nome do dicionário."""
+        trie = self._trie
+        position = 0
+        for word in value.split():
+            position = value.find(word, position)
+            for offset, _, key in _word_tokens(word):
+                if key in trie:
+                    return position + offset
+            position += len(word)
+        return None
+
+    def _locate(self, value: str, skip_leading: bool) -> Tuple[Optional[int], Optional[str]]:
+        start, canonical = None, None
+        for match in self.finditer(value):
+            if start is None:
+                # Afiliação no início do texto não deixaria nome nenhum
+                if skip_leading and match.start == 0:
+                    continue
+                start = match.start
+            if match.canonical is not None:
+                canonical = match.canonical
+                break
+        return start, canonical
+
+    def locate(self, value: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Início da afiliação em `value` e a primeira instituição conhecida a partir dele.
+
+        A afiliação começa na primeira instituição ou palavra de afiliação que
+        não abre o texto. Só as palavras antes da primeira palavra da trie (o
+        nome) são lidas a cada chamada: o resultado para o trecho seguinte
+        (título e instituição, que se repetem entre coautores) fica em cache.
+        """
+        first = self._first_root(value)
+        if first is None:
+            return None, None
+        if first == 0:
+            return self._locate(value, skip_leading=True)
+        start, canonical = self._locate_tail(value[first:])
+        return (None if start is None else first + start), canonical
+
+    def search(self, value: str) -> Optional[InstitutionMatch]:
+        """Primeira instituição conhecida em `value`."""
+        for match in self.finditer(value):
+            if match.canonical is not None:
+                return match
+        return None
+
+
+institution_matcher = InstitutionMatcher.from_file()
+
+
+def _find_verified_email(value: str) -> Tuple[int, Optional[str]]:
+    """Posição da linha de email verificado (-1 se não houver) e o domínio."""
+    lowered = value.lower()
+    for marker in VERIFIED_EMAIL_MARKERS:
+        position = lowered.find(marker)
+        if position < 0:
+            continue
+        match = _DOMAIN_RE.match(value, position + len(marker))
+        for prefix in _EMAIL_PREFIXES:
+            if lowered.endswith(prefix, 0, position):
+                position -= len(prefix)
+                break
+        return position, match.group(1).lower() if match else None
+    return -1, None
+
+
+def email_domain(value: Optional[str]) -> Optional[str]:
+    """Domínio da linha "Verified email at" / "E-mail confirmado em"."""
+    return _find_verified_email(value or '')[1]
+
+
+def parse_affiliation(full_text: str, matcher: Optional[InstitutionMatcher] = None) -> Affiliation:
+    """
+    Separa nome, afiliação e domínio de email do texto de um coautor.
+
+    Sem afiliação reconhecível, o texto inteiro (sem a linha de email) é o nome.
+    """
+    matcher = matcher or institution_matcher
+    full_text = full_text.strip()
+    position, domain = _find_verified_email(full_text)
+    if position >= 0:
+        full_text = full_text[:position].rstrip()
+
+    start, canonical = matcher.locate(full_text)
+    if start is None:
+        return Affiliation(full_text, None, None, domain)
+    name = full_text[:start].rstrip(_EDGES)
+    institution = full_text[start:].strip(_EDGES) or None
+    return Affiliation(name, institution, canonical, domain)
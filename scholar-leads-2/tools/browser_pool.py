@@ -0,0 +1,279 @@
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+from tools.page_cache import page_cache, page_type
+from tools.fetchers import http_fetcher, is_blocked
+from tools.rate_limiter import scheduler
+from tools.tracing import span
+
+# Configuração do pool (pode ser sobrescrita por variáveis de ambiente)
+POOL_SIZE = int(os.getenv("SCHOLAR_BROWSER_POOL_SIZE", "3"))
+MAX_PAGES_PER_BROWSER = int(os.getenv("SCHOLAR_BROWSER_MAX_PAGES", "50"))
+
+
+def default_browser_config() -> BrowserConfig:
+    """Configuração padrão do navegador usada por todas as ferramentas."""
+    return BrowserConfig(
+        headless=True,
+        verbose=False,
+        extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"],
+    )
+
+
+class PooledCrawler:
+    """
+    Um slot do pool: mantém um AsyncWebCrawler quente e conta as páginas
+    carregadas para reciclar o navegador depois de MAX_PAGES_PER_BROWSER.
+
+    As ferramentas usam `arun` exatamente como usariam o AsyncWebCrawler.
+    Páginas presentes no cache local e páginas estáticas do Scholar baixadas
+    via HTTP não tocam no navegador, que só é iniciado quando é realmente
+    necessário. Toda requisição de rede passa pelo agendador por host, e
+    páginas de captcha são marcadas como falha e nunca vão para o cache.
+    """
+
+    def __init__(self, slot_id: int, max_pages: int):
+        self.slot_id = slot_id
+        self.max_pages = max_pages
+        self.crawler: Optional[AsyncWebCrawler] = None
+        self.pages = 0
+        self.broken = False
+        self.sessions = set()
+        self.launches = 0
+
+    async def _ensure_started(self):
+        if self.crawler is None:
+            print(f"[pool] Iniciando navegador do slot {self.slot_id}")
+            self.crawler = AsyncWebCrawler(config=default_browser_config())
+            await self.crawler.start()
+            self.pages = 0
+            self.broken = False
+            self.launches += 1
+
+    def is_healthy(self) -> bool:
+        """Verifica se o navegador continua conectado e dentro do limite de páginas."""
+        if self.crawler is None:
+            return True
+        if self.broken or self.pages >= self.max_pages:
+            return False
+        if not getattr(self.crawler, "ready", True):
+            return False
+        browser_manager = getattr(self.crawler.crawler_strategy, "browser_manager", None)
+        browser = getattr(browser_manager, "browser", None)
+        if browser is not None and not browser.is_connected():
+            return False
+        return True
+
+    async def arun(self, url: str, config=None, session_id: Optional[str] = None, **kwargs):
+        with span('crawler.arun', url=url, page_type=page_type(url)) as arun_span:
+            return await self._fetch(url, config, session_id, arun_span, **kwargs)
+
+    async def _fetch(self, url: str, config, session_id: Optional[str], arun_span, **kwargs):
+        if page_cache is not None:
+            cached = page_cache.get(url)
+            if cached is not None:
+                arun_span.set('backend', 'cache')
+                arun_span.set('cache_hit', True)
+                arun_span.set('bytes', len(cached.html))
+                return cached
+
+        if http_fetcher.accepts(url):
+            with span('rate_limit.wait'):
+                await scheduler.acquire(url)
+            with span('fetch.http') as fetch_span:
+                page = await http_fetcher.fetch(url)
+                fetch_span.set('status_code', page.status_code)
+                fetch_span.set('bytes', len(page.html))
+            if page.status_code:
+                scheduler.report(url, blocked=is_blocked(page.html, page.status_code))
+            if page.success or not http_fetcher.browser_fallback:
+                if page_cache is not None and page.success:
+                    page_cache.put(url, page.html)
+                arun_span.set('backend', 'http')
+                arun_span.set('success', page.success)
+                return page
+            print(f"[pool] Recorrendo ao navegador para {url}")
+
+        await self._ensure_started()
+        if session_id:
+            self.sessions.add(session_id)
+        self.pages += 1
+        with span('rate_limit.wait'):
+            await scheduler.acquire(url)
+        with span('fetch.browser', slot=self.slot_id) as fetch_span:
+            try:
+                result = await self.crawler.arun(url=url, config=config, session_id=session_id, **kwargs)
+            except Exception:
+                # Erros de navegador (ex.: "Target closed") invalidam o slot
+                self.broken = True
+                raise
+            fetch_span.set('bytes', len(result.html or ''))
+
+        blocked = is_blocked(result.html, getattr(result, 'status_code', None))
+        scheduler.report(url, blocked=blocked)
+        if blocked:
+            print(f"[pool] Página de bloqueio recebida para {url}")
+            result.success = False
+        elif page_cache is not None and result.success:
+            page_cache.put(url, result.html)
+        arun_span.set('backend', 'browser')
+        arun_span.set('blocked', blocked)
+        arun_span.set('success', result.success)
+        return result
+
+    async def release_sessions(self):
+        """Fecha as abas abertas pelas sessões usadas durante o empréstimo."""
+        if self.crawler is None:
+            self.sessions.clear()
+            return
+        for session_id in list(self.sessions):
+            try:
+                await self.crawler.crawler_strategy.kill_session(session_id)
+            except Exception as e:
+                print(f"[pool] Erro ao fechar sessão {session_id}: {str(e)}")
+        self.sessions.clear()
+
+    async def close(self):
+        if self.crawler is not None:
+            try:
+                await self.crawler.close()
+            except Exception as e:
+                print(f"[pool] Erro ao fechar navegador do slot {self.slot_id}: {str(e)}")
+            self.crawler = None
+
+
+class BrowserPool:
+    """
+    Pool de navegadores compartilhado pelo processo inteiro.
+
+    Os slots são criados sob demanda, emprestados com `acquire()` e devolvidos
+    ao final do bloco `async with`. Um slot que falha na verificação de saúde
+    (desconectado, com erro ou acima do limite de páginas) é reciclado antes
+    de ser emprestado novamente.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_pages: int = MAX_PAGES_PER_BROWSER):
+        self.size = size
+        self.max_pages = max_pages
+        self._slots = [PooledCrawler(i, max_pages) for i in range(size)]
+        self._available: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _queue(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._available is None or self._loop is not loop:
+            if self._loop is not None and self._loop is not loop:
+                # Navegadores do Playwright ficam presos ao loop que os criou
+                print("[pool] Loop de eventos mudou, descartando navegadores antigos")
+                self._slots = [PooledCrawler(i, self.max_pages) for i in range(self.size)]
+            self._loop = loop
+            self._available = asyncio.Queue()
+            for slot in self._slots:
+                self._available.put_nowait(slot)
+        return self._available
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Empresta um slot do pool e devolve ao final do bloco."""
+        queue = self._queue()
+        slot = await queue.get()
+        try:
+            if not slot.is_healthy():
+                print(f"[pool] Reciclando navegador do slot {slot.slot_id} ({slot.pages} páginas)")
+                await slot.close()
+            yield slot
+        finally:
+            await slot.release_sessions()
+            queue.put_nowait(slot)
+
+    @property
+    def launches(self) -> int:
+        """Total de navegadores iniciados pelo pool."""
+        return sum(slot.launches for slot in self._slots)
+
+    async def close(self):
+        for slot in self._slots:
+            await slot.close()
+
+
+browser_pool = BrowserPool()
+
+# Loop de eventos de longa duração, rodando em uma thread de fundo. Todas as
+# corrotinas das ferramentas rodam nele: os navegadores do pool, o cliente
+# HTTP e os buckets do rate limiter ficam presos ao loop que os criou, e um
+# único loop permite que leads de threads diferentes compartilhem esses
+# recursos e sobreponham seu I/O.
+SHUTDOWN_TIMEOUT = 30.0
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    """Loop compartilhado do processo (iniciado na primeira chamada)."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="scholar-loop", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def submit(coro) -> concurrent.futures.Future:
+    """
+    Agenda uma corrotina no loop compartilhado e retorna um Future de threads.
+
+    O contextvars da thread chamadora vai junto com a corrotina, então o span
+    atual do rastreamento continua sendo o pai dos spans criados nela.
+    """
+    loop = shared_loop()
+    # run_coroutine_threadsafe usa call_soon_threadsafe, que captura o contexto da chamadora
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def run_sync(coro):
+    """
+    Executa uma corrotina no loop compartilhado e espera o resultado.
+
+    Pode ser chamada de qualquer thread, inclusive de uma que já tenha um
+    loop rodando (handlers assíncronos do Streamlit/Gradio). Dentro do
+    próprio loop compartilhado ela travaria; nesse caso use `await`
+    (ex.: `tool._arun(...)`).
+    """
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync chamado de dentro do loop compartilhado; use await")
+    future = submit(coro)
+    try:
+        return future.result()
+    except BaseException:
+        # Ctrl+C na thread chamadora também cancela a corrotina no loop
+        future.cancel()
+        raise
+
+
+async def _close_resources():
+    await browser_pool.close()
+    await http_fetcher.close()
+
+
+@atexit.register
+def _shutdown():
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_close_resources(), _loop).result(SHUTDOWN_TIMEOUT)
+    except Exception as e:
+        print(f"[pool] Erro ao encerrar recursos: {str(e)}")
+    _loop.call_soon_threadsafe(_loop.stop)
+    _loop_thread.join(SHUTDOWN_TIMEOUT)
+    if not _loop.is_running():
+        _loop.close()
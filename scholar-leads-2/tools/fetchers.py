@@ -0,0 +1,147 @@
+import asyncio
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from tools.page_cache import page_type
+from tools.scholar_ids import SCHOLAR_HOST
+
+# Backend de download: "auto" tenta HTTP e recorre ao navegador quando a página
+# vem incompleta ou bloqueada; "http" e "browser" forçam um único backend
+FETCHER_MODE = os.getenv("SCHOLAR_FETCHER", "auto")
+
+# Hosts cujas páginas são renderizadas no servidor e podem ser baixadas sem navegador
+STATIC_HOSTS = {SCHOLAR_HOST}
+
+HTTP_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/124.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+}
+
+# Trechos que indicam captcha ou bloqueio por excesso de requisições
+BLOCKED_MARKERS = (
+    'gs_captcha', 'g-recaptcha', 'recaptcha/api', '/sorry/index',
+    'unusual traffic', 'tráfego incomum', 'não é um robô', 'not a robot',
+)
+
+# Elemento que sempre existe em uma página completa de cada tipo
+COMPLETE_MARKERS = {
+    'search': 'gsc_sa_ccl',
+    'profile': 'gsc_prf_in',
+    'colleagues': 'gsc_1usr',
+    'article': 'gsc_oci_title',
+}
+
+
+def is_blocked(html: Optional[str], status_code: Optional[int] = None) -> bool:
+    """Detecta páginas de captcha, de bloqueio ou respostas 429/503."""
+    if status_code in (429, 503):
+        return True
+    if not html:
+        return False
+    sample = html[:20000].lower()
+    return any(marker in sample for marker in BLOCKED_MARKERS)
+
+
+def looks_complete(url: str, html: Optional[str]) -> bool:
+    """Verifica se o HTML tem o conteúdo esperado para o tipo de página."""
+    if not html:
+        return False
+    kind = 'colleagues' if 'list_colleagues' in url else page_type(url)
+    return COMPLETE_MARKERS[kind] in html
+
+
+class HttpPage:
+    """Resultado de um download HTTP, com os mesmos campos usados pelas ferramentas."""
+
+    from_cache = False
+
+    def __init__(self, url: str, status_code: int, html: str, success: bool):
+        self.url = url
+        self.status_code = status_code
+        self.html = html
+        self.success = success
+
+
+class HttpFetcher:
+    """
+    Baixa páginas estáticas do Scholar com um cliente HTTP assíncrono.
+
+    Um único cliente httpx (HTTP/2, pool de conexões keep-alive) é
+    compartilhado por todas as ferramentas do processo.
+    """
+
+    def __init__(self, mode: str = FETCHER_MODE, max_connections: int = 20, timeout: float = 15.0):
+        self.mode = mode
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.fallbacks = 0
+
+    def accepts(self, url: str) -> bool:
+        """Indica se a URL deve ser tentada via HTTP antes do navegador."""
+        if self.mode == 'browser':
+            return False
+        return urlsplit(url).hostname in STATIC_HOSTS
+
+    @property
+    def browser_fallback(self) -> bool:
+        return self.mode != 'http'
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers=HTTP_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def fetch(self, url: str) -> HttpPage:
+        """
+        Baixa a página via HTTP.
+
+        `success` só é verdadeiro quando a resposta é 200, não é um captcha e
+        contém o elemento esperado para o tipo de página; caso contrário o
+        chamador pode recorrer ao navegador.
+        """
+        self.requests += 1
+        try:
+            response = await self._get_client().get(url)
+        except httpx.HTTPError as e:
+            print(f"[http] Erro ao baixar {url}: {str(e)}")
+            return HttpPage(url, 0, "", False)
+
+        html = response.text
+        success = (
+            response.status_code == 200
+            and not is_blocked(html, response.status_code)
+            and looks_complete(url, html)
+        )
+        if not success:
+            self.fallbacks += 1
+            print(f"[http] Resposta incompleta ou bloqueada ({response.status_code}) para {url}")
+        return HttpPage(str(response.url), response.status_code, html, success)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_fetcher = HttpFetcher()
@@ -0,0 +1,141 @@
+"""
+Camada de parsing das páginas do Google Scholar.
+
+Usa o parser em C do lxml no lugar do `html.parser` do BeautifulSoup. Os
+seletores são compilados uma única vez na importação do módulo, e cada página
+é parseada uma vez só: a árvore retornada por `parse_html` é reutilizada por
+todos os extratores.
+"""
+import re
+from typing import List, Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from tools.tracing import span
+
+
+def _css(selector: str) -> CSSSelector:
+    return CSSSelector(selector, translator='html')
+
+
+# Seletores CSS usados pelas ferramentas, compilados para XPath na importação
+SELECTORS = {
+    # Perfil
+    'profile_name': _css('#gsc_prf_in'),
+    'profile_interests': _css('#gsc_prf_int'),
+    'profile_info_lines': _css('div.gsc_prf_il'),
+    'profile_email_line': _css('#gsc_prf_ivh'),
+    'profile_citations': _css('#gsc_rsb_st td.gsc_rsb_std'),
+    'profile_article_links': _css('#gsc_a_b .gsc_a_t a'),
+    'profile_article_rows': _css('#gsc_a_b tr.gsc_a_tr'),
+    # Colunas de uma linha da lista de artigos
+    'article_row_title': _css('a.gsc_a_at'),
+    'article_row_details': _css('.gsc_a_t div.gs_gray'),
+    'article_row_citations': _css('a.gsc_a_ac'),
+    'article_row_year': _css('.gsc_a_y span'),
+    'profile_coauthors': _css('.gsc_rsb_aa'),
+    'profile_coauthors_link': _css('a.gsc_rsb_lbl'),
+    'user_links': _css('a[href*="user="]'),
+    'sidebar_coauthor_link': _css('.gsc_rsb_a_desc a'),
+    'sidebar_coauthor_ext': _css('.gsc_rsb_a_ext'),
+    'list_colleagues_link': _css('a[href*="list_colleagues"]'),
+    # Página list_colleagues
+    'colleague_links': _css('.gsc_1usr a[href*="user="]'),
+    # Cartões de autor (busca de autores e list_colleagues)
+    'author_cards': _css('div.gsc_1usr'),
+    'card_name_link': _css('h3.gs_ai_name a'),
+    'card_affiliation': _css('.gs_ai_aff'),
+    'card_email': _css('.gs_ai_eml'),
+    'card_cited_by': _css('.gs_ai_cby'),
+    'card_interests': _css('.gs_ai_one_int'),
+    # Botão "Próxima" da busca de autores (paginação)
+    'search_next_button': _css('button.gsc_pgn_pnx'),
+    # Página de detalhes do artigo (view_citation)
+    'article_values': _css('.gsc_oci_value'),
+    'article_pdf_links': _css('a[href*=".pdf"]'),
+    'article_title_links': _css('a.gsc_oci_title_link'),
+}
+
+# Seletores do resumo na página original do artigo (editoras), em ordem de prioridade
+EXTERNAL_ABSTRACT_SELECTORS = tuple(
+    _css(selector) for selector in ('abstract', 'paper-abstract', 'abstractSection', '#abstract', '.abstract')
+)
+
+XPATHS = {
+    # Rótulo "Descrição" da página do artigo e o valor que vem logo depois
+    'description_label': etree.XPath("//div[count(*)=0][.='Descrição' or .='Description']"),
+    'next_value_sibling': etree.XPath(
+        "following-sibling::div[contains(concat(' ', normalize-space(@class), ' '), ' gsc_oci_value ')][1]"
+    ),
+    'text_containing': etree.XPath("//text()[contains(., $needle)]"),
+    'next_paragraph': etree.XPath("(descendant::p | following::p)[1]"),
+    'next_div': etree.XPath("(descendant::div | following::div)[1]"),
+    'first_link': etree.XPath("descendant-or-self::a[@href][1]"),
+}
+
+
+def parse_html(html: str):
+    """Parseia o HTML uma única vez; a árvore é compartilhada pelos extratores."""
+    if not html:
+        return lxml_html.fromstring("<html></html>")
+    with span('parse', bytes=len(html)):
+        return lxml_html.fromstring(html)
+
+
+def select(tree, name: str) -> List:
+    """Aplica um seletor pré-compilado e retorna todos os elementos encontrados."""
+    return SELECTORS[name](tree)
+
+
+def select_one(tree, name: str):
+    """Aplica um seletor pré-compilado e retorna o primeiro elemento, ou None."""
+    found = SELECTORS[name](tree)
+    return found[0] if found else None
+
+
+def xpath(tree, name: str, **variables) -> List:
+    """Aplica uma expressão XPath pré-compilada."""
+    return XPATHS[name](tree, **variables)
+
+
+def text(element, separator: Optional[str] = None) -> str:
+    """
+    Texto completo do elemento (equivalente a `.text` do BeautifulSoup).
+
+    Com `separator`, os nós de texto são unidos pelo separador, para que
+    textos de tags vizinhas não fiquem colados ("NomeUniversidade").
+    """
+    if element is None:
+        return ""
+    if separator is not None:
+        return separator.join(part.strip() for part in element.itertext() if part.strip())
+    return element.text_content()
+
+
+_COUNT_RE = re.compile(r'\d+')
+
+
+def parse_count(value: Optional[str]) -> Optional[int]:
+    """Primeiro número do texto, ignorando separadores de milhar ("Citado por 1.234" / "Cited by 1,234")."""
+    match = _COUNT_RE.search((value or '').replace('.', '').replace(',', ''))
+    return int(match.group()) if match else None
+
+
+def first_href(element) -> Optional[str]:
+    """href do próprio elemento ou do primeiro <a> dentro dele."""
+    links = XPATHS['first_link'](element)
+    return links[0].get('href') if links else None
+
+
+def text_parent(text_node):
+    """Elemento que contém o nó de texto (considerando textos após uma tag)."""
+    parent = text_node.getparent()
+    if text_node.is_tail and parent is not None:
+        return parent.getparent()
+    return parent
+
+
+def page_title(tree) -> Optional[str]:
+    return tree.findtext('.//title')
@@ -0,0 +1,239 @@
+"""
+Comparação de nomes de pesquisadores.
+
+Os nomes são normalizados antes de qualquer comparação: sem acentos, em
+minúsculas, sem pontuação e sem partículas ("da", "de", "dos"...). A
+comparação não depende da ordem das palavras e aceita iniciais ("J. Silva"
+casa com "João da Silva") e pequenas diferenças de grafia ("Souza"/"Sousa").
+
+Para procurar um nome entre muitos (todos os pesquisadores e coautores do
+banco local), o `NameIndex` guarda uma assinatura MinHash dos trigramas de
+cada nome. A busca compara a assinatura da consulta com todas de uma vez
+(NumPy), pré-seleciona os mais parecidos e reordena esses com
+`name_similarity`.
+"""
+import re
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+PARTICLES = frozenset({
+    'da', 'das', 'de', 'del', 'della', 'der', 'di', 'do', 'dos', 'du', 'e', 'la', 'le', 'van', 'von', 'y',
+})
+
+# Pontuação de um par inicial/nome ("J"/"João") e similaridade mínima de bigramas entre duas palavras
+INITIAL_MATCH = 0.8
+FUZZY_MIN = 0.6
+
+NGRAM_SIZE = 3
+# Listas de uma palavra maiores que isso não entram na pré-seleção ("silva" está em metade dos nomes)
+MAX_POSTINGS = 500
+NUM_PERM = 64
+# Nomes por lote em minhash_many (cada lote ocupa ~NUM_PERM × 8 bytes por trigrama)
+MINHASH_BATCH = 2000
+# Primo de Mersenne 2^31 - 1: a*x + b cabe em 64 bits para hashes de 32 bits
+_PRIME = (1 << 31) - 1
+_random = np.random.RandomState(20240601)
+_HASH_A = _random.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_HASH_B = _random.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Nome sem acentos, em minúsculas e só com letras, dígitos e espaços ("João D'Ávila" → "joao d avila")."""
+    name = name or ''
+    if not name.isascii():
+        decomposed = unicodedata.normalize('NFKD', name)
+        name = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD_RE.sub(' ', name.lower()).strip()
+
+
+def name_tokens(name: Optional[str]) -> List[str]:
+    """Palavras do nome normalizado, sem as partículas."""
+    return [token for token in normalize_name(name).split() if token not in PARTICLES]
+
+
+def search_name(name: str) -> str:
+    """Nome para a busca de autores do Scholar: sem partículas e sem os pontos das iniciais."""
+    words = [word.strip('.,;') for word in name.split()]
+    return ' '.join(word for word in words if word and word.lower() not in PARTICLES) or name.strip()
+
+
+def ngrams(value: str, size: int = NGRAM_SIZE) -> Set[str]:
+    """N-gramas de caracteres (trigramas por padrão), com espaço nas bordas para marcar início e fim."""
+    padded = f" {value} "
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+def _dice(first: str, second: str) -> float:
+    # Bigramas: em palavras curtas os trigramas punem demais uma letra trocada ("souza"/"sousa")
+    grams1, grams2 = ngrams(first, 2), ngrams(second, 2)
+    return 2 * len(grams1 & grams2) / (len(grams1) + len(grams2))
+
+
+def _pop_match(tokens: List[str], predicate) -> bool:
+    for i, token in enumerate(tokens):
+        if predicate(token):
+            tokens.pop(i)
+            return True
+    return False
+
+
+def name_similarity(name1: str, name2: str) -> float:
+    """
+    Similaridade entre dois nomes, de 0 a 1.
+
+    As palavras são pareadas primeiro por igualdade, depois por inicial
+    (valendo INITIAL_MATCH) e por fim por similaridade de bigramas. O
+    resultado é o coeficiente de Dice sobre os pares: palavras sobrando em
+    qualquer dos nomes diminuem o score.
+    """
+    tokens1, tokens2 = name_tokens(name1), name_tokens(name2)
+    if not tokens1 or not tokens2:
+        return 0.0
+
+    remaining = list(tokens2)
+    matched = 0.0
+    unmatched = []
+    for token in tokens1:
+        if token in remaining:
+            remaining.remove(token)
+            matched += 1
+        else:
+            unmatched.append(token)
+
+    fuzzy = []
+    for token in unmatched:
+        if _pop_match(remaining, lambda other: (len(token) == 1 or len(other) == 1) and token[0] == other[0]):
+            matched += INITIAL_MATCH
+        else:
+            fuzzy.append(token)
+
+    for token in fuzzy:
+        if not remaining:
+            break
+        score, index = max((_dice(token, other), i) for i, other in enumerate(remaining))
+        if score >= FUZZY_MIN:
+            remaining.pop(index)
+            matched += score
+
+    return 2 * matched / (len(tokens1) + len(tokens2))
+
+
+def _gram_hashes(tokens: List[str]) -> np.ndarray:
+    key = ' '.join(sorted(tokens))
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in ngrams(key)), dtype=np.uint64)
+
+
+def minhash(name: str) -> np.ndarray:
+    """Assinatura MinHash (NUM_PERM valores) dos trigramas do nome, independente da ordem das palavras."""
+    hashes = _gram_hashes(name_tokens(name))
+    return ((_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % _PRIME).min(axis=1)
+
+
+def minhash_many(names: List[List[str]]) -> np.ndarray:
+    """Assinaturas de vários nomes, já em palavras (len(names) × NUM_PERM), calculadas em uma única operação."""
+    if not names:
+        return np.empty((0, NUM_PERM), dtype=np.uint64)
+    per_name = [_gram_hashes(tokens) for tokens in names]
+    offsets = np.cumsum([0] + [len(hashes) for hashes in per_name[:-1]])
+    hashes = np.concatenate(per_name)
+    permuted = (_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % _PRIME
+    return np.minimum.reduceat(permuted, offsets, axis=1).T
+
+
+class NameMatch(NamedTuple):
+    key: str
+    name: str
+    score: float
+
+
+class NameIndex:
+    """
+    Índice em memória de nomes, para buscar os k mais parecidos com uma consulta.
+
+    Args:
+        entries: Pares (chave, nome), por exemplo (ID `user=`, nome do perfil)
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        self._keys: List[str] = []
+        self._names: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._pending: List[np.ndarray] = []
+        self._signatures = np.empty((0, NUM_PERM), dtype=np.uint64)
+        # Palavras completas (não iniciais) → posições, para não perder nomes abreviados
+        self._postings: Dict[str, List[int]] = {}
+        self.extend(entries)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, name: str):
+        """Adiciona (ou renomeia) a chave."""
+        self.extend([(key, name)])
+
+    def extend(self, entries: Iterable[Tuple[str, str]]):
+        """Adiciona vários nomes; as assinaturas são calculadas juntas."""
+        added = []
+        for key, name in entries:
+            position = self._positions.get(key)
+            if position is not None:
+                if self._names[position] == name:
+                    continue
+                # Renomeado: a entrada antiga some das buscas e a nova vai para o fim
+                self._names[position] = ''
+            tokens = name_tokens(name)
+            if not tokens:
+                continue
+            position = len(self._keys)
+            self._positions[key] = position
+            for token in set(tokens):
+                if len(token) > 1:
+                    self._postings.setdefault(token, []).append(position)
+            self._keys.append(key)
+            self._names.append(name)
+            added.append(tokens)
+        for start in range(0, len(added), MINHASH_BATCH):
+            self._pending.append(minhash_many(added[start:start + MINHASH_BATCH]))
+
+    def _all_signatures(self) -> np.ndarray:
+        if self._pending:
+            self._signatures = np.vstack([self._signatures, *self._pending])
+            self._pending = []
+        return self._signatures
+
+    def top_k(self, name: str, k: int = 10, min_score: float = 0.0) -> List[NameMatch]:
+        """
+        Os k nomes mais parecidos com `name`, do mais para o menos parecido.
+
+        Pré-seleciona pelas assinaturas MinHash (Jaccard estimado dos trigramas)
+        e pela palavra menos frequente do nome, se ela for rara; reordena os pré-selecionados
+        com `name_similarity`.
+        """
+        tokens = name_tokens(name)
+        if not tokens or not self._keys:
+            return []
+        signatures = self._all_signatures()
+        estimates = (signatures == minhash(name)).mean(axis=1)
+        shortlist = min(len(estimates), max(k * 10, 50))
+        candidates = set(np.argpartition(-estimates, shortlist - 1)[:shortlist].tolist())
+
+        postings = [self._postings.get(token, ()) for token in tokens if len(token) > 1]
+        rarest = min(postings, key=len, default=())
+        if len(rarest) <= MAX_POSTINGS:
+            candidates.update(rarest)
+
+        matches = []
+        for position in candidates:
+            stored = self._names[position]
+            if not stored:
+                continue
+            score = name_similarity(name, stored)
+            if score >= min_score:
+                matches.append(NameMatch(self._keys[position], stored, score))
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:k]
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, 'data', 'page_cache.sqlite')
+
+# Validade de cada tipo de página, em segundos
+HOUR = 60 * 60
+DAY = 24 * HOUR
+PAGE_TTLS = {
+    'search': HOUR,
+    'profile': DAY,
+    'article': 30 * DAY,
+}
+
+# Parâmetros que não mudam o conteúdo da página (marcadores de origem do link)
+IGNORED_PARAMS = {'oi', 'oe'}
+
+
+def normalize_url(url: str) -> str:
+    """Normaliza a URL para servir de chave: host minúsculo, sem fragmento e com query ordenada."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if key not in IGNORED_PARAMS
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+
+def page_type(url: str) -> str:
+    """Classifica a URL entre busca, perfil e artigo para escolher o TTL."""
+    query = dict(parse_qsl(urlsplit(url).query))
+    view_op = query.get('view_op')
+    if view_op == 'search_authors':
+        return 'search'
+    if view_op == 'view_citation':
+        return 'article'
+    if 'user' in query:
+        # Perfil principal e página list_colleagues
+        return 'profile'
+    # Páginas externas de artigos (DOI, editoras)
+    return 'article'
+
+
+class CachedPage:
+    """Resultado servido pelo cache, com os mesmos campos usados pelas ferramentas."""
+
+    success = True
+    status_code = 200
+    from_cache = True
+
+    def __init__(self, url: str, html: str):
+        self.url = url
+        self.html = html
+
+
+class PageCache:
+    """
+    Cache local de páginas em SQLite, endereçado por conteúdo.
+
+    A tabela `pages` mapeia a URL normalizada para o hash do HTML, e a
+    tabela `blobs` guarda cada HTML comprimido uma única vez, mesmo que
+    várias URLs tenham o mesmo conteúdo.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttls: Optional[dict] = None):
+        self.path = path
+        self.ttls = dict(PAGE_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url_key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    page_type TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    html BLOB NOT NULL
+                );
+            """)
+        return self._conn
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Retorna a página em cache se ainda estiver dentro do TTL do seu tipo."""
+        key = normalize_url(url)
+        ttl = self.ttls[page_type(url)]
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT b.html, p.fetched_at FROM pages p JOIN blobs b ON b.content_hash = p.content_hash "
+                "WHERE p.url_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or time.time() - row[1] > ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedPage(url, zlib.decompress(row[0]).decode('utf-8'))
+
+    def put(self, url: str, html: str):
+        """Guarda o HTML de uma página carregada com sucesso."""
+        if not html:
+            return
+        data = html.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (content_hash, html) VALUES (?, ?)",
+                (content_hash, zlib.compress(data)),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url_key, url, page_type, content_hash, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), url, page_type(url), content_hash, time.time()),
+            )
+            conn.commit()
+
+    def purge_expired(self):
+        """Remove páginas vencidas e blobs que não são mais referenciados."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for kind, ttl in self.ttls.items():
+                conn.execute("DELETE FROM pages WHERE page_type = ? AND fetched_at < ?", (kind, now - ttl))
+            conn.execute("DELETE FROM blobs WHERE content_hash NOT IN (SELECT content_hash FROM pages)")
+            conn.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+page_cache = None if os.getenv("SCHOLAR_PAGE_CACHE_DISABLED") else PageCache(
+    os.getenv("SCHOLAR_PAGE_CACHE", DEFAULT_CACHE_PATH)
+)
@@ -1,10 +1,27 @@
 from crewai.tools import BaseTool
-from typing import Type, List, Optional
+from typing import Type, List, Optional, Sequence, Tuple
 from pydantic import BaseModel, Field
 import asyncio
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-from bs4 import BeautifulSoup
-import re
+from crawl4ai import CrawlerRunConfig, CacheMode
+import os
+from tools.browser_pool import browser_pool, run_sync
+from tools.html_parser import parse_html, select, select_one, text
+from tools.name_matching import name_similarity
+from tools.profile_scoring import Candidate, RankedProfile, candidate_from_tree, scoring_engine
+from tools.scholar_ids import extract_user_id, scholar_url
+from tools.tracing import traced
+
+# Pontuação atribuída ao perfil confirmado pela verificação de coautoria
+COAUTHOR_VERIFIED_SCORE = float('inf')
+
+# Vantagem do primeiro colocado pelos cartões da busca que dispensa abrir os perfis,
+# e quantos perfis abrir quando ela não é atingida
+EARLY_EXIT_MARGIN = float(os.getenv("SCHOLAR_EARLY_EXIT_MARGIN", "2.0"))
+FULL_PROFILE_TOP_K = int(os.getenv("SCHOLAR_FULL_PROFILE_TOP_K", "3"))
+
+# Score pelos cartões a partir do qual o líder dispensa buscar mais páginas de resultados
+# (nome completo e instituição ou email), desde que lidere por EARLY_EXIT_MARGIN
+CONFIDENT_SCORE = float(os.getenv("SCHOLAR_CONFIDENT_SCORE", "8.0"))
 
 class ProfileFilterInput(BaseModel):
     """Input schema para a ferramenta ProfileFilter."""
@@ -14,6 +31,15 @@ class ProfileFilterInput(BaseModel):
     institution: Optional[str] = Field(None, description="Instituição do pesquisador (opcional)")
     coauthor: Optional[str] = Field(None, description="URL do perfil de um coautor conhecido (opcional)")
 
+class CamposFiltro(BaseModel):
+    """Estrutura de dados para a filtragem de perfis."""
+    profiles: List[str]
+    researcher_name: str
+    email: Optional[str] = None
+    institution: Optional[str] = None
+    coauthor: Optional[str] = None
+    topics: Optional[List[str]] = None
+
 class ProfileFilterTool(BaseTool):
     name: str = "Profile Filter"
     description: str = (
@@ -27,6 +53,13 @@ class ProfileFilterTool(BaseTool):
              email: Optional[str] = None, 
              institution: Optional[str] = None, 
              coauthor: Optional[str] = None) -> str:
+        return run_sync(self._arun(profiles, researcher_name, email, institution, coauthor))
+
+    @traced('tool.profile_filter')
+    async def _arun(self, profiles: List[str], researcher_name: str,
+                    email: Optional[str] = None,
+                    institution: Optional[str] = None,
+                    coauthor: Optional[str] = None) -> str:
         """
         Filtra perfis do Google Scholar para encontrar o mais relevante.
         
@@ -44,14 +77,6 @@ class ProfileFilterTool(BaseTool):
         if len(profiles) == 1:
             return profiles[0]
         
-        # Estrutura de dados para a filtragem
-        class CamposFiltro(BaseModel):
-            profiles: List[str]
-            researcher_name: str
-            email: Optional[str] = None
-            institution: Optional[str] = None
-            coauthor: Optional[str] = None
-        
         # Cria campos para a filtragem
         campos = CamposFiltro(
             profiles=profiles,
@@ -61,16 +86,7 @@ class ProfileFilterTool(BaseTool):
             coauthor=coauthor
         )
         
-        # Executar a filtragem assíncrona
-        result = asyncio.run(filter_profiles_async(campos))
-        return result
-
-async def extract_user_id(url: str) -> Optional[str]:
-    """Extrai o ID do usuário da URL do Google Scholar."""
-    match = re.search(r'user=([^&]+)', url)
-    if match:
-        return match.group(1)
-    return None
+        return await filter_profiles_async(campos)
 
 async def check_coauthor_relation(crawler, coauthor_url: str, researcher_name: str, profile_urls: List[str]) -> Optional[str]:
     """
@@ -81,7 +97,7 @@ async def check_coauthor_relation(crawler, coauthor_url: str, researcher_name: s
     crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
     
     # Extrai ID do coautor
-    coauthor_id = await extract_user_id(coauthor_url)
+    coauthor_id = extract_user_id(coauthor_url)
     if not coauthor_id:
         return None
     
@@ -90,31 +106,31 @@ async def check_coauthor_relation(crawler, coauthor_url: str, researcher_name: s
     result = await crawler.arun(url=coauthor_url, config=crawl_config, session_id=session_id)
     
     if result.success:
-        soup = BeautifulSoup(result.html, 'html.parser')
-        coauthor_elements = soup.select('a[href*="user="]')
+        tree = parse_html(result.html)
+        coauthor_elements = select(tree, 'user_links')
         
         # Cria um dicionário para mapear IDs de usuário para suas URLs completas
         profile_id_map = {}
         for url in profile_urls:
-            user_id = await extract_user_id(url)
+            user_id = extract_user_id(url)
             if user_id:
                 profile_id_map[user_id] = url
         
         # Checa coautores visíveis na página principal
         for element in coauthor_elements:
-            coauthor_name = element.text.strip()
+            coauthor_name = text(element).strip()
             # Compara o nome do pesquisador com o nome do coautor
             if name_similarity(researcher_name, coauthor_name) > 0.5:
                 print(f"Potencial match encontrado: {coauthor_name}")
                 coauthor_href = element.get('href', '')
-                user_id = await extract_user_id("https://scholar.google.com" + coauthor_href)
+                user_id = extract_user_id(scholar_url(coauthor_href))
                 if user_id and user_id in profile_id_map:
                     return profile_id_map[user_id]
         
         # Verifica se há um link para "Ver todos os coautores"
-        view_all_link = soup.select_one('a[href*="list_colleagues"]')
-        if view_all_link and view_all_link.get('href'):
-            all_coauthors_url = "https://scholar.google.com" + view_all_link['href']
+        view_all_link = select_one(tree, 'list_colleagues_link')
+        if view_all_link is not None and view_all_link.get('href'):
+            all_coauthors_url = scholar_url(view_all_link.get('href'))
             print(f"Verificando lista completa de coautores: {all_coauthors_url}")
             
             # Busca na página completa de coautores
@@ -122,50 +138,102 @@ async def check_coauthor_relation(crawler, coauthor_url: str, researcher_name: s
             result_all = await crawler.arun(url=all_coauthors_url, config=crawl_config, session_id=session_id_all)
             
             if result_all.success:
-                soup_all = BeautifulSoup(result_all.html, 'html.parser')
-                all_coauthor_elements = soup_all.select('.gsc_1usr a[href*="user="]')
+                tree_all = parse_html(result_all.html)
+                all_coauthor_elements = select(tree_all, 'colleague_links')
                 
                 for element in all_coauthor_elements:
-                    coauthor_name = element.text.strip()
+                    coauthor_name = text(element).strip()
                     if name_similarity(researcher_name, coauthor_name) > 0.5:
                         print(f"Match encontrado na lista completa: {coauthor_name}")
                         coauthor_href = element.get('href', '')
-                        user_id = await extract_user_id("https://scholar.google.com" + coauthor_href)
+                        user_id = extract_user_id(scholar_url(coauthor_href))
                         if user_id and user_id in profile_id_map:
                             return profile_id_map[user_id]
     
     return None
 
-def name_similarity(name1: str, name2: str) -> float:
-    """Calcula a similaridade entre dois nomes."""
-    name1 = name1.lower().strip()
-    name2 = name2.lower().strip()
+async def filter_profiles_async(campos, candidates: Optional[Sequence[Candidate]] = None):
+    """Filtra perfis de forma assíncrona usando CRAW4AI."""
+    ranking = await rank_profiles_async(campos, candidates)
+    if ranking:
+        best_profile, best_score = ranking[0]
+        print(f"Melhor perfil: {best_profile} (score: {best_score})")
+        return best_profile
     
-    tokens1 = set(name1.split())
-    tokens2 = set(name2.split())
+    # Se nenhum critério ajudou, retorna o primeiro perfil
+    return campos.profiles[0]
+
+def _full_profile_urls(ranked: List[RankedProfile], check_coauthor: bool) -> List[str]:
+    """
+    Perfis que precisam da página completa depois da pontuação pelos cartões da busca.
+
+    Nenhum quando o primeiro lidera por EARLY_EXIT_MARGIN pontos ou mais. Senão,
+    os FULL_PROFILE_TOP_K primeiros entre os que estão a menos dessa margem do
+    líder (todos, se há coautor a verificar, que só aparece na página
+    completa), mais os empatados com o último deles.
+    """
+    if not check_coauthor and (len(ranked) == 1 or ranked[0].score - ranked[1].score >= EARLY_EXIT_MARGIN):
+        return []
+    contenders = [profile for profile in ranked
+                  if check_coauthor or ranked[0].score - profile.score < EARLY_EXIT_MARGIN]
+    selected = contenders[:FULL_PROFILE_TOP_K]
+    selected += [profile for profile in contenders[FULL_PROFILE_TOP_K:] if profile.score == selected[-1].score]
+    return [profile.url for profile in selected]
+
+def confident_match(campos, candidates: Sequence[Candidate]) -> bool:
+    """
+    Indica se os cartões já vistos bastam para escolher o perfil.
+
+    O líder pela pontuação dos cartões precisa de CONFIDENT_SCORE pontos e
+    de EARLY_EXIT_MARGIN pontos de vantagem sobre o segundo colocado.
+    """
+    ranked = scoring_engine.rank(
+        candidates,
+        campos.researcher_name,
+        email=campos.email,
+        institution=campos.institution,
+        topics=campos.topics,
+    )
+    if not ranked or ranked[0].score < CONFIDENT_SCORE:
+        return False
+    return len(ranked) == 1 or ranked[0].score - ranked[1].score >= EARLY_EXIT_MARGIN
+
+def _print_ranking(ranked: List[RankedProfile]):
+    for profile in ranked:
+        print(f"Score de {profile.url}: {profile.score:.2f} ({profile.explain()})")
+
+@traced('rank_profiles')
+async def rank_profiles_async(campos, candidates: Optional[Sequence[Candidate]] = None) -> List[Tuple[str, float]]:
+    """
+    Pontua os perfis candidatos e retorna a lista (url, score) em ordem decrescente.
     
-    intersection = len(tokens1.intersection(tokens2))
-    union = len(tokens1.union(tokens2))
+    Com `candidates` (os registros da busca, um por URL de `campos.profiles`),
+    a pontuação começa pelos dados dos cartões da busca e só baixa a página
+    completa dos perfis escolhidos por `_full_profile_urls`. O ranking final
+    pontua todos os perfis juntos, pela mesma engine: a página completa de
+    quem foi aberto e o cartão da busca dos demais (e de quem não carregou).
+    Sem `candidates`, baixa a página de todos os perfis.
     
-    return intersection / union if union > 0 else 0
-
-async def filter_profiles_async(campos):
-    """Filtra perfis de forma assíncrona usando CRAW4AI."""
+    Quando o perfil é confirmado pela verificação de coautoria, a lista contém
+    apenas esse perfil, com score COAUTHOR_VERIFIED_SCORE.
+    """
     print(f"Filtrando {len(campos.profiles)} perfis para {campos.researcher_name}")
     
-    # Configurar o crawler
-    browser_config = BrowserConfig(
-        headless=True,
-        verbose=False,
-        extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"],
-    )
     crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
+    coauthor_id = extract_user_id(campos.coauthor) if campos.coauthor else None
     
-    # Inicializa o crawler
-    crawler = AsyncWebCrawler(config=browser_config)
-    await crawler.start()
+    def rank(profiles: Sequence[Candidate]) -> List[RankedProfile]:
+        return scoring_engine.rank(
+            profiles,
+            campos.researcher_name,
+            email=campos.email,
+            institution=campos.institution,
+            coauthor_id=coauthor_id,
+            topics=campos.topics,
+        )
     
-    try:
+    # Empresta um navegador do pool compartilhado
+    async with browser_pool.acquire() as crawler:
         # 1. Primeiro, verifica se conseguimos encontrar o perfil pelo coautor
         if campos.coauthor:
             matched_profile = await check_coauthor_relation(
@@ -174,75 +242,43 @@ async def filter_profiles_async(campos):
                 campos.researcher_name, 
                 campos.profiles
             )
-            
+        
             if matched_profile:
                 print(f"Perfil encontrado via verificação de coautoria: {matched_profile}")
-                return matched_profile
+                return [(matched_profile, COAUTHOR_VERIFIED_SCORE)]
         
-        # 2. Se não encontrou por coautoria, usa sistema de pontuação
-        scores = {url: 0 for url in campos.profiles}
+        # 2. Pontuação pelos cartões da busca; se a liderança é clara, nenhuma página é aberta
+        card_ranking: List[RankedProfile] = []
+        urls = campos.profiles
+        cards = {candidate.url: candidate for candidate in candidates or ()}
+        if cards:
+            card_ranking = rank(list(cards.values()))
+            urls = _full_profile_urls(card_ranking, check_coauthor=coauthor_id is not None)
+            if not urls:
+                print("Liderança clara pelos cartões da busca, sem abrir os perfis")
+                _print_ranking(card_ranking)
+                return [(profile.url, profile.score) for profile in card_ranking]
+            print(f"Abrindo {len(urls)} de {len(cards)} perfis para desempatar")
         
-        # Processamento em paralelo
-        async def score_profile(url):
-            session_id = f"score_{await extract_user_id(url)}"
-            result = await crawler.arun(url=url, config=crawl_config, session_id=session_id)
-            score = 0
-            
-            if result.success:
-                soup = BeautifulSoup(result.html, 'html.parser')
-                
-                # Pontuação pelo nome
-                name_elem = soup.select_one('#gsc_prf_in')
-                if name_elem:
-                    profile_name = name_elem.text.strip()
-                    name_score = name_similarity(campos.researcher_name, profile_name) * 5
-                    score += name_score
-                    print(f"Score de nome para {url}: {name_score}")
-                
-                # Pontuação pelo email
-                if campos.email:
-                    email_elements = soup.select('div.gsc_prf_il')
-                    for elem in email_elements:
-                        if "verificado em" in elem.text.lower() and campos.email.lower() in elem.text.lower():
-                            score += 3
-                            print(f"Match de email em {url}")
-                
-                # Pontuação pela instituição
-                if campos.institution:
-                    institution_elements = soup.select('div.gsc_prf_il')
-                    for elem in institution_elements:
-                        if campos.institution.lower() in elem.text.lower():
-                            score += 2
-                            print(f"Match de instituição em {url}")
-                
-                # Pontuação por coautor (verificação reversa)
-                if campos.coauthor:
-                    coauthor_id = await extract_user_id(campos.coauthor)
-                    if coauthor_id:
-                        coauthor_elements = soup.select('a[href*="user="]')
-                        for elem in coauthor_elements:
-                            href = elem.get('href', '')
-                            if coauthor_id in href:
-                                score += 5
-                                print(f"Match de coautor na página de {url}")
-            
-            return url, score
+        # 3. Páginas completas, baixadas em paralelo; a pontuação roda de uma vez sobre todas
+        @traced('extract.score')
+        async def fetch_candidate(url):
+            session_id = f"score_{extract_user_id(url)}"
+            try:
+                result = await crawler.arun(url=url, config=crawl_config, session_id=session_id)
+                if result.success:
+                    return candidate_from_tree(url, parse_html(result.html))
+            except Exception as e:
+                print(f"Erro ao abrir o perfil {url}: {str(e)}")
+            # Sem a página, fica com o que o cartão da busca mostrava
+            return cards.get(url, Candidate(url))
         
-        # Executa a pontuação em paralelo
-        tasks = [score_profile(url) for url in campos.profiles]
-        results = await asyncio.gather(*tasks)
-        
-        for url, score in results:
-            scores[url] = score
-        
-        # Encontra o perfil com maior pontuação
-        if scores:
-            best_profile = max(scores.items(), key=lambda x: x[1])[0]
-            print(f"Melhor perfil: {best_profile} (score: {scores[best_profile]})")
-            return best_profile
-        
-        # Se nenhum critério ajudou, retorna o primeiro perfil
-        return campos.profiles[0]
+        full_profiles = await asyncio.gather(*(fetch_candidate(url) for url in urls))
+    
+    # Um só ranking: a página completa de quem foi aberto, o cartão da busca dos demais
+    fetched = dict(zip(urls, full_profiles))
+    ranked = rank([fetched.get(url, card) for url, card in cards.items()] if cards else full_profiles)
+    _print_ranking(ranked)
     
-    finally:
-        await crawler.close() 
\ No newline at end of file
+    # A ordenação é estável: em caso de empate, vale a ordem da busca
+    return [(profile.url, profile.score) for profile in ranked]
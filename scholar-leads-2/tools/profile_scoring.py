@@ -0,0 +1,269 @@
+"""
+Pontuação dos perfis candidatos na desambiguação de nomes.
+
+Cada perfil vira um `Candidate` (nome, afiliação, domínio de email,
+interesses, citações e IDs dos coautores), extraído uma única vez da árvore
+HTML. O `ScoringEngine` monta uma matriz de features (candidatos × features)
+com operações do NumPy sobre todos os candidatos de uma vez e calcula os
+scores como o produto da matriz pelo vetor de pesos. O ranking devolve, para
+cada perfil, a contribuição de cada feature no score.
+
+Features:
+- name_jaccard: Jaccard entre as palavras dos nomes (sem acentos, caixa e partículas)
+- name_containment: fração das palavras do nome buscado presentes no perfil
+- name_initials: fração das iniciais do nome buscado presentes no perfil ("M S Oliveira")
+- affiliation: instituição buscada na afiliação do perfil (texto ou nome canônico)
+- email_domain: domínio de email verificado igual ao buscado (ou subdomínio dele)
+- coauthor: coautor conhecido entre os coautores do perfil
+- citations: log das citações, normalizado pelo maior valor entre os candidatos
+- topics: Jaccard entre os temas buscados e os interesses do perfil
+
+Os pesos padrão podem ser alterados por `SCHOLAR_SCORE_WEIGHTS`, no formato
+"email_domain=4,citations=0".
+"""
+import functools
+import os
+import re
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.affiliation import email_domain, fold_accents, institution_matcher
+from tools.html_parser import parse_count, select, select_one, text
+from tools.name_matching import name_tokens
+from tools.scholar_ids import extract_user_id, scholar_url
+
+FEATURES = (
+    'name_jaccard', 'name_containment', 'name_initials', 'affiliation',
+    'email_domain', 'coauthor', 'citations', 'topics',
+)
+
+# Nome, email, instituição e coautor mantêm os pesos da pontuação anterior
+DEFAULT_WEIGHTS = {
+    'name_jaccard': 5.0,
+    'name_containment': 1.0,
+    'name_initials': 0.5,
+    'affiliation': 2.0,
+    'email_domain': 3.0,
+    'coauthor': 5.0,
+    'citations': 0.5,
+    'topics': 1.0,
+}
+
+_WORD_RE = re.compile(r'\w+')
+
+# Textos normalizados guardados em memória (nomes, afiliações e interesses dos candidatos):
+# os mesmos cartões são pontuados a cada página da busca e de novo no ranking final
+TEXT_CACHE_SIZE = 16384
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Lê pesos no formato "feature=peso,feature=peso"."""
+    weights = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        feature, _, value = item.partition('=')
+        feature = feature.strip()
+        if feature not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Feature de pontuação desconhecida: {feature}")
+        weights[feature] = float(value)
+    return weights
+
+
+SCORE_WEIGHTS = {**DEFAULT_WEIGHTS, **parse_weights(os.getenv("SCHOLAR_SCORE_WEIGHTS", ""))}
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _fold(value: Optional[str]) -> str:
+    """Texto sem acento e em minúsculas."""
+    lowered = (value or '').lower()
+    return lowered if lowered.isascii() else fold_accents(lowered)
+
+
+def _words(value: Optional[str]) -> FrozenSet[str]:
+    return frozenset(_WORD_RE.findall(_fold(value)))
+
+
+def _initials(words: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(word[0] for word in words)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _name_sets(name: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Palavras e iniciais do nome normalizado, calculadas uma vez por nome."""
+    words = frozenset(name_tokens(name))
+    return words, _initials(words)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _interest_words(interests: Tuple[str, ...]) -> FrozenSet[str]:
+    return _words(' '.join(interests))
+
+
+def clear_text_cache():
+    """Esvazia os caches de textos normalizados (usado pelo benchmark para medir a primeira pontuação)."""
+    for cached in (_fold, _name_sets, _interest_words):
+        cached.cache_clear()
+
+
+class Candidate(NamedTuple):
+    url: str
+    name: str = ''
+    affiliation: str = ''
+    email_domain: Optional[str] = None
+    interests: Tuple[str, ...] = ()
+    citations: int = 0
+    coauthor_ids: FrozenSet[str] = frozenset()
+
+
+def candidate_from_tree(url: str, tree) -> Candidate:
+    """Extrai os dados usados na pontuação da página de um perfil."""
+    name = select_one(tree, 'profile_name')
+    info_lines = select(tree, 'profile_info_lines')
+    interests = select_one(tree, 'profile_interests')
+    citations = select_one(tree, 'profile_citations')
+    try:
+        total_citations = int(text(citations)) if citations is not None else 0
+    except ValueError:
+        total_citations = 0
+    return Candidate(
+        url=url,
+        name=text(name).strip() if name is not None else '',
+        affiliation=text(info_lines[0]).strip() if info_lines else '',
+        email_domain=email_domain(text(select_one(tree, 'profile_email_line'))),
+        interests=tuple(part.strip() for part in text(interests).split(',') if part.strip()),
+        citations=total_citations,
+        coauthor_ids=frozenset(filter(None, (extract_user_id(link.get('href')) for link in select(tree, 'user_links')))),
+    )
+
+
+def candidate_from_card(card) -> Optional[Candidate]:
+    """
+    Extrai o candidato de um cartão da busca de autores.
+
+    O cartão traz nome, afiliação, domínio de email, citações e interesses,
+    mas não os coautores: a feature `coauthor` só existe na página do perfil.
+    """
+    link = select_one(card, 'card_name_link')
+    if link is None or extract_user_id(link.get('href')) is None:
+        return None
+    return Candidate(
+        url=scholar_url(link.get('href')),
+        name=text(link).strip(),
+        affiliation=text(select_one(card, 'card_affiliation')).strip(),
+        email_domain=email_domain(text(select_one(card, 'card_email'))),
+        interests=tuple(text(interest).strip() for interest in select(card, 'card_interests')),
+        citations=parse_count(text(select_one(card, 'card_cited_by'))) or 0,
+    )
+
+
+class RankedProfile(NamedTuple):
+    url: str
+    score: float
+    # Contribuição de cada feature (valor × peso), na ordem de FEATURES
+    values: Tuple[float, ...]
+
+    @property
+    def contributions(self) -> Dict[str, float]:
+        return dict(zip(FEATURES, self.values))
+
+    def explain(self) -> str:
+        """Contribuições não nulas, da maior para a menor ("email_domain=3.00, name_jaccard=2.50")."""
+        parts = sorted(self.contributions.items(), key=lambda item: item[1], reverse=True)
+        return ', '.join(f"{feature}={value:.2f}" for feature, value in parts if value) or 'nenhum critério'
+
+
+def _overlap(candidate_sets: Sequence[FrozenSet[str]], query: FrozenSet[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Interseção e tamanho de cada conjunto candidato em relação a `query`."""
+    intersection = np.array([len(words & query) for words in candidate_sets], dtype=np.float64)
+    sizes = np.array(list(map(len, candidate_sets)), dtype=np.float64)
+    return intersection, sizes
+
+
+def _jaccard(intersection: np.ndarray, sizes: np.ndarray, query_size: int) -> np.ndarray:
+    union = sizes + query_size - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+class ScoringEngine:
+    """
+    Pontua e ordena perfis candidatos.
+
+    Args:
+        weights: Peso de cada feature (as ausentes valem 0)
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        self.weights = np.array([weights.get(feature, 0.0) for feature in FEATURES], dtype=np.float64)
+
+    def features(self, candidates: Sequence[Candidate], researcher_name: str, email: Optional[str] = None,
+                 institution: Optional[str] = None, coauthor_id: Optional[str] = None,
+                 topics: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Matriz (candidatos × FEATURES) com valores entre 0 e 1."""
+        count = len(candidates)
+        matrix = np.zeros((count, len(FEATURES)), dtype=np.float64)
+        if not count:
+            return matrix
+        column = {feature: i for i, feature in enumerate(FEATURES)}
+
+        query_words, query_initials = _name_sets(researcher_name)
+        if query_words:
+            name_sets = [_name_sets(candidate.name) for candidate in candidates]
+            intersection, sizes = _overlap([words for words, _ in name_sets], query_words)
+            matrix[:, column['name_jaccard']] = _jaccard(intersection, sizes, len(query_words))
+            matrix[:, column['name_containment']] = intersection / len(query_words)
+            initials, _ = _overlap([initials for _, initials in name_sets], query_initials)
+            matrix[:, column['name_initials']] = initials / len(query_initials)
+
+        if institution and institution.strip():
+            affiliations = np.array([_fold(candidate.affiliation) for candidate in candidates])
+            matched = np.char.find(affiliations, _fold(institution)) >= 0
+            # Siglas e apelidos ("UFJF") casam com o nome canônico da afiliação
+            known = institution_matcher.search(institution)
+            if known is not None:
+                matched |= np.char.find(affiliations, _fold(known.canonical)) >= 0
+            matrix[:, column['affiliation']] = matched
+
+        if email and email.strip():
+            domain = email.strip().lower().rsplit('@', 1)[-1]
+            domains = np.array([candidate.email_domain or '' for candidate in candidates])
+            matrix[:, column['email_domain']] = (domains == domain) | np.char.endswith(domains, '.' + domain)
+
+        if coauthor_id:
+            matrix[:, column['coauthor']] = [coauthor_id in candidate.coauthor_ids for candidate in candidates]
+
+        citations = np.log1p(np.array([max(candidate.citations, 0) for candidate in candidates], dtype=np.float64))
+        if citations.max() > 0:
+            matrix[:, column['citations']] = citations / citations.max()
+
+        topic_words = frozenset().union(*(_words(topic) for topic in topics or ()))
+        if topic_words:
+            interests = [_interest_words(tuple(candidate.interests)) for candidate in candidates]
+            intersection, sizes = _overlap(interests, topic_words)
+            matrix[:, column['topics']] = _jaccard(intersection, sizes, len(topic_words))
+
+        return matrix
+
+    def rank(self, candidates: Sequence[Candidate], researcher_name: str, email: Optional[str] = None,
+             institution: Optional[str] = None, coauthor_id: Optional[str] = None,
+             topics: Optional[Sequence[str]] = None) -> List[RankedProfile]:
+        """
+        Ordena os candidatos pelo score, do maior para o menor.
+
+        A ordenação é estável: em caso de empate, vale a ordem de `candidates`.
+        """
+        matrix = self.features(candidates, researcher_name, email, institution, coauthor_id, topics)
+        contributions = matrix * self.weights
+        scores = contributions.sum(axis=1)
+        order = np.argsort(-scores, kind='stable')
+        # Uma conversão para listas do Python, em vez de indexar o array linha a linha
+        rows, score_list = contributions.tolist(), scores.tolist()
+        return [
+            RankedProfile(candidates[i].url, score_list[i], tuple(rows[i]))
+            for i in order.tolist()
+        ]
+
+
+scoring_engine = ScoringEngine(SCORE_WEIGHTS)
@@ -0,0 +1,126 @@
+"""
+Agendador de requisições por host (token bucket com ajuste AIMD).
+
+Cada host tem um balde de tokens reabastecido a `rate` requisições por
+segundo. Cada resposta normal aumenta a taxa em um passo fixo (aumento
+aditivo). Quando aparece uma página de captcha ou um 429/503, a taxa cai
+pela metade (redução multiplicativa) e o host entra em pausa. A pausa dobra
+a cada bloqueio consecutivo. O objetivo é manter vazão sustentada sem
+disparar o bloqueio do Scholar.
+"""
+import asyncio
+import os
+import time
+from typing import Dict
+from urllib.parse import urlsplit
+
+from tools.scholar_ids import SCHOLAR_HOST
+
+
+class HostLimits:
+    """Parâmetros de taxa de um host."""
+
+    def __init__(self, rate: float, max_rate: float, min_rate: float, burst: int = 1,
+                 increase_step: float = 0.05, decrease_factor: float = 0.5,
+                 cooldown: float = 30.0, max_cooldown: float = 600.0):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+
+SCHOLAR_RATE = float(os.getenv("SCHOLAR_RATE_LIMIT", "1.0"))
+
+HOST_LIMITS = {
+    SCHOLAR_HOST: HostLimits(rate=SCHOLAR_RATE, max_rate=SCHOLAR_RATE * 2, min_rate=0.05),
+}
+DEFAULT_LIMITS = HostLimits(rate=4.0, max_rate=8.0, min_rate=0.2, burst=4, cooldown=10.0)
+
+
+class HostBucket:
+    """Balde de tokens de um único host."""
+
+    def __init__(self, host: str, limits: HostLimits):
+        self.host = host
+        self.limits = limits
+        self.rate = limits.rate
+        self.tokens = float(limits.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.consecutive_blocks = 0
+        self.requests = 0
+        self.blocks = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.limits.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # O lock mantém a fila de espera em ordem de chegada
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.requests += 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        self.consecutive_blocks = 0
+        self.rate = min(self.limits.max_rate, self.rate + self.limits.increase_step)
+
+    def on_blocked(self):
+        self.blocks += 1
+        self.consecutive_blocks += 1
+        self.rate = max(self.limits.min_rate, self.rate * self.limits.decrease_factor)
+        cooldown = min(self.limits.max_cooldown, self.limits.cooldown * 2 ** (self.consecutive_blocks - 1))
+        self.paused_until = time.monotonic() + cooldown
+        self.tokens = 0.0
+        print(f"[rate] Bloqueio detectado em {self.host}: pausa de {cooldown:.1f}s, "
+              f"nova taxa {self.rate:.2f} req/s")
+
+
+class PolitenessScheduler:
+    """Distribui as requisições entre os baldes de cada host."""
+
+    def __init__(self):
+        self._buckets: Dict[str, HostBucket] = {}
+
+    def _bucket(self, url: str) -> HostBucket:
+        host = urlsplit(url).hostname or ''
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = HostBucket(host, HOST_LIMITS.get(host, DEFAULT_LIMITS))
+            self._buckets[host] = bucket
+        return bucket
+
+    async def acquire(self, url: str):
+        """Espera até que uma requisição para o host da URL seja permitida."""
+        await self._bucket(url).acquire()
+
+    def report(self, url: str, blocked: bool):
+        """Informa o resultado da requisição para ajustar a taxa do host."""
+        bucket = self._bucket(url)
+        if blocked:
+            bucket.on_blocked()
+        else:
+            bucket.on_success()
+
+    def stats(self) -> dict:
+        return {
+            host: {'requests': b.requests, 'blocks': b.blocks, 'rate': round(b.rate, 3)}
+            for host, b in self._buckets.items()
+        }
+
+
+scheduler = PolitenessScheduler()
@@ -1,12 +1,30 @@
 from crewai.tools import BaseTool
-from typing import Type
+from typing import AsyncIterator, Optional, Type
 from pydantic import BaseModel, Field
 import asyncio
 import json
+import os
 import re
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-from bs4 import BeautifulSoup
-from models import ScholarProfile, Article, Coauthor
+from crawl4ai import CrawlerRunConfig, CacheMode
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from models import ScholarProfile, Article, Coauthor, Publication
+from tools.affiliation import email_domain, parse_affiliation
+from tools.browser_pool import browser_pool, run_sync
+from tools.scholar_ids import CoauthorIndex, scholar_url
+from tools.tracing import traced
+from tools.html_parser import (
+    EXTERNAL_ABSTRACT_SELECTORS, first_href, page_title, parse_html, select, select_one, text,
+    text_parent, xpath,
+)
+
+# Número de artigos analisados e quantas páginas de artigo são abertas ao mesmo tempo
+MAX_ARTICLES = 5
+ABSTRACT_CONCURRENCY = int(os.getenv("SCHOLAR_ABSTRACT_CONCURRENCY", "5"))
+
+# Tamanho máximo de página aceito pelo endpoint "mostrar mais" do perfil
+PUBLICATIONS_PAGE_SIZE = 100
+# Ordenações suportadas pelo Scholar na lista de publicações
+PUBLICATION_SORTS = {'citations': None, 'year': 'pubdate'}
 
 class ScholarProfileInput(BaseModel):
     """Input schema para a ferramenta ScholarCrawler."""
@@ -21,136 +39,130 @@ class ScholarCrawlerTool(BaseTool):
     args_schema: Type[BaseModel] = ScholarProfileInput
     
     def _run(self, profile_url: str) -> str:
-        result = asyncio.run(crawl_scholar_profile(profile_url))
-        return result
+        return run_sync(self._arun(profile_url))
+
+    @traced('tool.scholar_crawler')
+    async def _arun(self, profile_url: str) -> str:
+        return await crawl_scholar_profile(profile_url)
 
 async def extract_coauthor_info(crawler, coauthor_element):
     """Extrai informações detalhadas de um coautor acessando seu perfil individual."""
-    # Obter o texto completo
-    full_text = coauthor_element.text.strip()
+    # Obter o texto completo (nome, afiliação e email vêm em tags separadas)
+    full_text = text(coauthor_element, separator=' ')
     
     # Inicializar valores padrão
     name = full_text
     profile_url = None
-    institution = None
-    email_domain = None
-    
-    # Tentar extrair a URL do perfil
-    # Primeiro, verificar se o próprio elemento tem um atributo href
-    href = coauthor_element.get('href')
     
-    # Se não tiver, procurar por um elemento <a> dentro dele
-    if not href and hasattr(coauthor_element, 'find'):
-        a_element = coauthor_element.find('a')
-        if a_element and a_element.get('href'):
-            href = a_element.get('href')
+    # Tentar extrair a URL do perfil: href do próprio elemento ou do primeiro <a> dentro dele
+    href = first_href(coauthor_element)
     
     if href:
         # Certifique-se de que href contém "user="
         if 'user=' in href:
-            profile_url = f"https://scholar.google.com{href}"
+            profile_url = scholar_url(href)
             print(f"URL do perfil encontrada: {profile_url}")
         else:
             print(f"Link encontrado mas não é perfil de usuário: {href}")
     else:
         print(f"Nenhum link encontrado para o coautor: {name}")
     
-    # Tentar separar nome, instituição e email
-    if "E-mail confirmado em" in full_text or "verificado em" in full_text:
-        # Padrão: Nome + Instituição + Email
-        parts = re.split(r'(E-mail confirmado em|verificado em)', full_text, maxsplit=1)
-        if len(parts) >= 2:
-            # Primeira parte é nome + possível instituição
-            name_inst = parts[0].strip()
-            
-            # Verificar se há informação de instituição
-            if any(inst_marker in name_inst for inst_marker in ['University', 'Universidade', 'Instituto', 'UFRJ', 'UERJ', 'UFOPA']):
-                # Tentar separar nome da instituição
-                name_parts = re.split(r'(University|Universidade|Instituto|UFRJ|UERJ|UFOPA|Professor|Doutor)', name_inst, maxsplit=1)
-                if len(name_parts) >= 2:
-                    name = name_parts[0].strip()
-                    institution = (name_parts[1] + (name_parts[2] if len(name_parts) > 2 else "")).strip()
-            
-            # Extrair domínio de email
-            email_part = parts[1] + (parts[2] if len(parts) > 2 else "")
-            domain_match = re.search(r'(?:confirmado|verificado) em ([\w.-]+\.\w+)', email_part)
-            if domain_match:
-                email_domain = domain_match.group(1)
+    # Separar nome, instituição e domínio do email verificado
+    affiliation = parse_affiliation(full_text)
     
     return Coauthor(
-        name=name,
+        name=affiliation.name,
         profile_url=profile_url,
-        institution=institution,
-        email_domain=email_domain
+        institution=affiliation.institution,
+        email_domain=affiliation.email_domain
     )
 
-async def extract_article_abstract(crawler, article_url):
-    """Extrai o resumo de um artigo acessando sua página de detalhes."""
+def coauthor_from_card(card) -> Optional[Coauthor]:
+    """Cria o Coautor a partir de um cartão da página list_colleagues."""
+    link = select_one(card, 'card_name_link')
+    if link is None or 'user=' not in (link.get('href') or ''):
+        return None
+    return Coauthor(
+        name=text(link).strip(),
+        profile_url=scholar_url(link.get('href')),
+        institution=text(select_one(card, 'card_affiliation')).strip() or None,
+        email_domain=email_domain(text(select_one(card, 'card_email')))
+    )
+
+@traced('extract.abstract')
+async def extract_article_abstract(crawler, article_url, session_id="article_abstract"):
+    """Extrai o resumo de um artigo acessando sua página de detalhes.
+
+    Cada chamada concorrente deve usar um `session_id` próprio para abrir
+    sua própria aba no navegador.
+    """
     print(f"Extraindo resumo do artigo: {article_url}")
     
     try:
         crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
-        result = await crawler.arun(url=article_url, config=crawl_config, session_id="article_abstract")
+        result = await crawler.arun(url=article_url, config=crawl_config, session_id=session_id)
         
         if result.success:
-            soup = BeautifulSoup(result.html, 'html.parser')
+            tree = parse_html(result.html)
+            title = page_title(tree) or 'Artigo'
             abstract = None
             
             # Método 1: Extrair do campo de descrição específico do Google Scholar
             # Este é o seletor mais preciso, focado na estrutura do Google Scholar
-            descr_label = soup.find('div', string='Descrição') or soup.find('div', string='Description')
-            if descr_label and descr_label.parent:
+            for descr_label in xpath(tree, 'description_label'):
+                if descr_label.getparent() is None:
+                    continue
                 # O resumo geralmente está no próximo elemento após o label
-                next_sibling = descr_label.find_next_sibling('div', {'class': 'gsc_oci_value'})
+                next_sibling = xpath(descr_label, 'next_value_sibling')
                 if next_sibling:
-                    abstract = next_sibling.text.strip()
-                    print(f"Resumo extraído do campo de descrição para: {soup.title.text if soup.title else 'Artigo'}")
+                    abstract = text(next_sibling[0]).strip()
+                    print(f"Resumo extraído do campo de descrição para: {title}")
                     return abstract
             
             # Método 2: Extração por ID específico
-            abstract_elem = soup.find(id='gsc_oci_desc')
-            if abstract_elem and abstract_elem.text.strip():
-                abstract = abstract_elem.text.strip()
-                print(f"Resumo extraído por ID para: {soup.title.text if soup.title else 'Artigo'}")
+            abstract_elem = tree.get_element_by_id('gsc_oci_desc', None)
+            if abstract_elem is not None and text(abstract_elem).strip():
+                abstract = text(abstract_elem).strip()
+                print(f"Resumo extraído por ID para: {title}")
                 return abstract
             
             # Método 3: Buscar qualquer valor em gsc_oci_value que tenha conteúdo extenso
-            values = soup.select('.gsc_oci_value')
-            for value in values:
-                text = value.text.strip()
+            for value in select(tree, 'article_values'):
+                value_text = text(value).strip()
                 # Verificar se o texto parece um resumo (pelo menos 100 caracteres)
-                if len(text) > 100 and not text.count("\n") > 5:  # Evitar listas de referências
-                    abstract = text
-                    print(f"Resumo extraído de gsc_oci_value para: {soup.title.text if soup.title else 'Artigo'}")
+                if len(value_text) > 100 and not value_text.count("\n") > 5:  # Evitar listas de referências
+                    abstract = value_text
+                    print(f"Resumo extraído de gsc_oci_value para: {title}")
                     return abstract
             
             # Método 4: Buscar em "Resumo" ou "Abstract" em qualquer parte da página
             for string in ['Resumo', 'Abstract', 'Resumé', 'Summary', 'Descrição', 'Description']:
-                elem = soup.find(string=lambda text: text and string in text)
-                if elem and elem.parent:
-                    next_text = elem.parent.find_next('p') or elem.parent.find_next('div')
-                    if next_text and len(next_text.text.strip()) > 50:
-                        abstract = next_text.text.strip()
-                        print(f"Resumo extraído após '{string}' para: {soup.title.text if soup.title else 'Artigo'}")
+                matches = xpath(tree, 'text_containing', needle=string)
+                parent = text_parent(matches[0]) if matches else None
+                if parent is not None:
+                    next_text = xpath(parent, 'next_paragraph') or xpath(parent, 'next_div')
+                    if next_text and len(text(next_text[0]).strip()) > 50:
+                        abstract = text(next_text[0]).strip()
+                        print(f"Resumo extraído após '{string}' para: {title}")
                         return abstract
             
             # Método 5: Buscar o link para o PDF ou página do artigo
-            pdf_links = soup.select('a[href*=".pdf"]') or soup.select('a.gsc_oci_title_link')
+            pdf_links = select(tree, 'article_pdf_links') or select(tree, 'article_title_links')
             for link in pdf_links:
                 href = link.get('href')
                 if href and (href.endswith('.pdf') or 'doi.org' in href or any(domain in href for domain in ['ieee.org', 'springer.com', 'acm.org'])):
                     print(f"Link para artigo original encontrado: {href}")
                     try:
                         ext_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, timeout=15000)
-                        ext_result = await crawler.arun(url=href, config=ext_config, session_id="original_article")
+                        ext_result = await crawler.arun(url=href, config=ext_config, session_id=f"{session_id}_original")
                         if ext_result.success:
-                            ext_soup = BeautifulSoup(ext_result.html, 'html.parser')
+                            ext_tree = parse_html(ext_result.html)
                             # Procurar abstract na página original
-                            for selector in ['abstract', 'paper-abstract', 'abstractSection', '#abstract', '.abstract']:
-                                abstract_section = ext_soup.select_one(selector)
+                            for selector in EXTERNAL_ABSTRACT_SELECTORS:
+                                abstract_section = selector(ext_tree)
                                 if abstract_section:
-                                    abstract = abstract_section.text.strip()
-                                    print(f"Resumo extraído da fonte original para: {soup.title.text if soup.title else 'Artigo'}")
+                                    abstract = text(abstract_section[0]).strip()
+                                    print(f"Resumo extraído da fonte original para: {title}")
                                     return abstract
                     except Exception as e:
                         print(f"Erro ao acessar artigo original: {str(e)}")
@@ -164,100 +176,114 @@ async def extract_article_abstract(crawler, article_url):
         print(f"Erro ao extrair resumo: {str(e)}")
         return None
 
-async def crawl_scholar_profile(profile_url: str) -> str:
+async def crawl_scholar_profile(profile_url: str, max_articles: int = MAX_ARTICLES,
+                                abstract_concurrency: int = ABSTRACT_CONCURRENCY) -> str:
     print("\n*** Crawleando perfil do Google Scholar ***")
     
-    # Configurar o crawler
-    browser_config = BrowserConfig(
-        headless=True,
-        verbose=False,
-        extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"],
-    )
     crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
 
-    crawler = AsyncWebCrawler(config=browser_config)
-
-    await crawler.start()
+    # Empresta um navegador do pool compartilhado
+    async with browser_pool.acquire() as crawler:
+        return await _crawl_profile_page(crawler, profile_url, crawl_config, max_articles, abstract_concurrency)
 
+@traced('extract.profile')
+async def _crawl_profile_page(crawler, profile_url: str, crawl_config,
+                              max_articles: int, abstract_concurrency: int) -> str:
+    """Extrai os dados do perfil usando um navegador já emprestado do pool."""
     try:
         session_id = "scholar_session"
         result = await crawler.arun(url=profile_url, config=crawl_config, session_id=session_id)
         
         if result.success:
-            # Usar BeautifulSoup para parsear o HTML
-            soup = BeautifulSoup(result.html, 'html.parser')
+            # Parsear o HTML uma única vez; todos os extratores usam a mesma árvore
+            tree = parse_html(result.html)
 
             # Extrair nome do pesquisador
-            name = soup.select_one('#gsc_prf_in')
-            name = name.text if name else "Unknown"
+            name = select_one(tree, 'profile_name')
+            name = text(name) if name is not None else "Unknown"
             print(f"Nome do pesquisador: {name}")
             
+            # Afiliação (primeira linha abaixo do nome) e domínio do email verificado
+            info_lines = select(tree, 'profile_info_lines')
+            institution = (text(info_lines[0]).strip() or None) if info_lines else None
+            profile_email_domain = email_domain(text(select_one(tree, 'profile_email_line')))
+            
             # Extrair área principal (primeiro interesse de pesquisa listado)
-            research_interests = soup.select_one('#gsc_prf_int')
-            research_area = research_interests.text.split(',')[0] if research_interests else "Not found"
+            research_interests = select_one(tree, 'profile_interests')
+            research_area = text(research_interests).split(',')[0] if research_interests is not None else "Not found"
             print(f"Área de pesquisa: {research_area}")
             
             # Extrair número total de citações
-            total_citations = soup.select_one('#gsc_rsb_st td.gsc_rsb_std')
-            total_citations = int(total_citations.text) if total_citations else 0
+            total_citations = select_one(tree, 'profile_citations')
+            total_citations = int(text(total_citations)) if total_citations is not None else 0
             print(f"Total de citações: {total_citations}")
 
-            # Extrair artigos (limitado a 5)
-            article_elements = soup.select('#gsc_a_b .gsc_a_t a')[:5]
+            # Extrair artigos (limitado a max_articles)
+            article_elements = select(tree, 'profile_article_links')[:max_articles]
             print(f"Encontrados {len(article_elements)} artigos")
             
-            # Para cada artigo, extrair informações básicas e resumo
-            articles = []
-            for article in article_elements:
-                title = article.text
-                url = f"https://scholar.google.com{article['href']}" if article.get('href') else ""
+            # Os resumos são extraídos em paralelo, cada artigo na sua própria aba,
+            # limitados pelo semáforo; o gather preserva a ordem original
+            semaphore = asyncio.Semaphore(max(1, abstract_concurrency))
+            
+            async def build_article(index, article):
+                title = text(article)
+                url = scholar_url(article.get('href')) if article.get('href') else ""
                 
                 # Extrair o resumo do artigo
                 abstract = None
                 if url:
-                    abstract = await extract_article_abstract(crawler, url)
+                    async with semaphore:
+                        abstract = await extract_article_abstract(crawler, url, session_id=f"article_abstract_{index}")
                     if abstract:
                         print(f"Resumo extraído com sucesso para: {title}")
                     else:
                         print(f"Não foi possível extrair resumo para: {title}")
                 
                 # Criar objeto Article, garantindo que abstract seja None quando não encontrado
-                articles.append(Article(
+                return Article(
                     title=title, 
                     url=url, 
                     abstract=abstract
-                ))
+                )
             
-            # Extrair coautores 
-            coauthors = []
-            coauthor_elements = soup.select('.gsc_rsb_aa')
+            articles = list(await asyncio.gather(
+                *(build_article(i, article) for i, article in enumerate(article_elements))
+            ))
+            
+            # Extrair coautores (indexados pelo ID user= para deduplicação em O(1))
+            coauthors = CoauthorIndex()
+            coauthor_elements = select(tree, 'profile_coauthors')
             print(f"Encontrados {len(coauthor_elements)} coautores na página principal")
             
             # Processar cada coautor
             for elem in coauthor_elements:
                 coauthor = await extract_coauthor_info(crawler, elem)
-                coauthors.append(coauthor)
+                coauthors.add(coauthor)
                 print(f"Coautor adicionado: {coauthor.name}")
             
             # Verificar se há um link para "ver todos os coautores"
-            view_all_link = soup.select_one('a.gsc_rsb_lbl')
-            if view_all_link and any(term in view_all_link.text.lower() for term in ['coauthor', 'coautor', 'co-author']):
-                all_coauthors_url = f"https://scholar.google.com{view_all_link['href']}"
+            view_all_link = select_one(tree, 'profile_coauthors_link')
+            if view_all_link is not None and any(term in text(view_all_link).lower() for term in ['coauthor', 'coautor', 'co-author']):
+                all_coauthors_url = scholar_url(view_all_link.get('href'))
                 print(f"Buscando página completa de coautores: {all_coauthors_url}")
                 
                 result_all = await crawler.arun(url=all_coauthors_url, config=crawl_config, session_id="all_coauthors")
                 if result_all.success:
-                    soup_all = BeautifulSoup(result_all.html, 'html.parser')
-                    # Os links dos coautores estão em elementos <a> dentro de blocos específicos
-                    coauthor_links = soup_all.select('a[href*="user="]')
+                    tree_all = parse_html(result_all.html)
+                    # Cada coautor tem um cartão com nome, afiliação e email; sem
+                    # cartões, usa os links de perfil da página
+                    cards = select(tree_all, 'author_cards')
+                    print(f"Encontrados {len(cards)} cartões de coautores na página completa")
                     
-                    print(f"Encontrados {len(coauthor_links)} links de coautores na página completa")
+                    if cards:
+                        candidates = [coauthor_from_card(card) for card in cards]
+                    else:
+                        candidates = [await extract_coauthor_info(crawler, link) for link in select(tree_all, 'user_links')]
                     
-                    for link in coauthor_links:
-                        # Verificar se este coautor já foi processado
-                        if link.get('href') and not any(href.endswith(link['href']) for href in [c.profile_url for c in coauthors if c.profile_url]):
-                            coauthor = await extract_coauthor_info(crawler, link)
-                            coauthors.append(coauthor)
+                    for coauthor in candidates:
+                        # Coautores já processados são mesclados com o registro anterior
+                        if coauthor is not None and coauthors.add(coauthor):
                             print(f"Coautor adicional: {coauthor.name}")
 
             # Criar o modelo estruturado
@@ -265,9 +291,11 @@ async def crawl_scholar_profile(profile_url: str) -> str:
                 name=name,
                 profile_url=profile_url,
                 research_area=research_area,
+                institution=institution,
+                email_domain=profile_email_domain,
                 total_citations=total_citations,
                 articles=articles,
-                coauthors=coauthors
+                coauthors=list(coauthors)
             )
             
             return scholar_data.model_dump_json()
@@ -278,5 +306,86 @@ async def crawl_scholar_profile(profile_url: str) -> str:
         print(f"Erro ao processar o perfil: {str(e)}")
         return json.dumps({"error": f"Erro ao processar o perfil: {str(e)}"})
 
-    finally:
-        await crawler.close()
\ No newline at end of file
+def _paged_profile_url(profile_url: str, cstart: int, page_size: int, sort_by: str) -> str:
+    """Monta a URL de uma página da lista de publicações (parâmetros cstart/pagesize)."""
+    parts = urlsplit(profile_url)
+    query = {key: value for key, value in parse_qsl(parts.query) if key not in ('cstart', 'pagesize', 'sortby')}
+    query['cstart'] = str(cstart)
+    query['pagesize'] = str(page_size)
+    if PUBLICATION_SORTS[sort_by]:
+        query['sortby'] = PUBLICATION_SORTS[sort_by]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+def _parse_int(value: str) -> Optional[int]:
+    digits = re.sub(r'\D', '', value or '')
+    return int(digits) if digits else None
+
+def parse_publication_row(row) -> Optional[Publication]:
+    """Converte uma linha `tr.gsc_a_tr` da lista de artigos em Publication."""
+    title_link = select_one(row, 'article_row_title')
+    if title_link is None:
+        return None
+    href = title_link.get('href')
+    details = [text(elem).strip() for elem in select(row, 'article_row_details')]
+    citations = select_one(row, 'article_row_citations')
+    year = select_one(row, 'article_row_year')
+    return Publication(
+        title=text(title_link).strip(),
+        url=scholar_url(href) if href else None,
+        authors=details[0] if details else None,
+        venue=details[1] if len(details) > 1 else None,
+        citations=_parse_int(text(citations)) or 0,
+        year=_parse_int(text(year)),
+    )
+
+async def stream_profile_publications(profile_url: str, max_articles: Optional[int] = None,
+                                      sort_by: str = 'citations',
+                                      page_size: int = PUBLICATIONS_PAGE_SIZE) -> AsyncIterator[Publication]:
+    """
+    Percorre todas as publicações do perfil, página por página.
+
+    As linhas são entregues uma a uma conforme cada página é baixada, sem
+    montar a lista completa em memória. A ordenação é feita pelo próprio
+    Scholar, então a sequência já chega ordenada. Cada página empresta um
+    navegador do pool só durante o próprio download: um consumidor lento não
+    segura o slot, e pode ele mesmo usar o pool entre as publicações.
+
+    Args:
+        profile_url: URL do perfil no Google Scholar
+        max_articles: Limite opcional de publicações
+        sort_by: "citations" (padrão do Scholar) ou "year"
+        page_size: Linhas por página (máximo de 100)
+
+    Yields:
+        Publication: Uma publicação por vez
+    """
+    if sort_by not in PUBLICATION_SORTS:
+        raise ValueError(f"Ordenação inválida: {sort_by}")
+    page_size = max(1, min(page_size, PUBLICATIONS_PAGE_SIZE))
+    crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
+
+    cstart = 0
+    yielded = 0
+    while True:
+        page_url = _paged_profile_url(profile_url, cstart, page_size, sort_by)
+        async with browser_pool.acquire() as crawler:
+            result = await crawler.arun(url=page_url, config=crawl_config, session_id="profile_publications")
+        if not result.success:
+            print(f"Falha ao carregar publicações a partir de {cstart}: {page_url}")
+            return
+
+        rows = select(parse_html(result.html), 'profile_article_rows')
+        print(f"Página de publicações {cstart}-{cstart + len(rows)}")
+        for row in rows:
+            publication = parse_publication_row(row)
+            if publication is None:
+                continue
+            yield publication
+            yielded += 1
+            if max_articles is not None and yielded >= max_articles:
+                return
+
+        # Página incompleta: não há mais publicações
+        if len(rows) < page_size:
+            return
+        cstart += page_size
@@ -0,0 +1,81 @@
+import os
+import re
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from models import Coauthor
+
+# Endereço do Google Scholar; os benchmarks apontam para o servidor local de replay
+SCHOLAR_BASE_URL = os.getenv("SCHOLAR_BASE_URL", "https://scholar.google.com").rstrip('/')
+SCHOLAR_HOST = urlsplit(SCHOLAR_BASE_URL).hostname
+
+_USER_ID_RE = re.compile(r'[?&]user=([^&#]+)')
+
+
+def scholar_url(path: str) -> str:
+    """URL absoluta do Scholar a partir de um caminho ou href relativo."""
+    return SCHOLAR_BASE_URL + path
+
+
+def extract_user_id(url) -> Optional[str]:
+    """Extrai o ID do usuário (parâmetro `user=`) de uma URL ou href do Google Scholar."""
+    match = _USER_ID_RE.search(str(url or ''))
+    if match:
+        return match.group(1)
+    return None
+
+
+def _name_key(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+class CoauthorIndex:
+    """
+    Conjunto de coautores indexado pelo ID `user=` do Scholar.
+
+    Busca e inserção são O(1). Coautores sem perfil são indexados pelo nome
+    normalizado. Quando o mesmo coautor aparece de novo (por exemplo, na
+    barra lateral e depois na página list_colleagues), o registro posterior
+    completa os campos que faltavam no anterior. A ordem de inserção é
+    preservada.
+    """
+
+    def __init__(self):
+        self._items: Dict[str, Coauthor] = {}
+
+    @staticmethod
+    def key(coauthor: Coauthor) -> str:
+        user_id = extract_user_id(coauthor.profile_url)
+        return user_id if user_id else f"name:{_name_key(coauthor.name)}"
+
+    def add(self, coauthor: Coauthor) -> bool:
+        """Adiciona ou mescla o coautor; retorna True se ele ainda não estava no índice."""
+        key = self.key(coauthor)
+        existing = self._items.get(key)
+        if existing is None:
+            self._items[key] = coauthor
+            return True
+
+        updates = {
+            field: value for field, value in coauthor.model_dump().items()
+            if value and not getattr(existing, field)
+        }
+        # Nome mais limpo: o anterior tinha texto extra (instituição/email) colado ao nome
+        new_name = coauthor.name.strip()
+        if new_name and existing.name != new_name and existing.name.startswith(new_name):
+            updates['name'] = new_name
+        if updates:
+            self._items[key] = existing.model_copy(update=updates)
+        return False
+
+    def get(self, user_id: str) -> Optional[Coauthor]:
+        return self._items.get(user_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Coauthor]:
+        return iter(self._items.values())
@@ -1,10 +1,25 @@
 from crewai.tools import BaseTool
-from typing import Type, Optional
+from typing import AsyncIterator, List, Tuple, Type, Optional
 from pydantic import BaseModel, Field
-import asyncio
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-from bs4 import BeautifulSoup
+from contextlib import aclosing
+from crawl4ai import CrawlerRunConfig, CacheMode
+import os
+import re
 import urllib.parse
+from tools.browser_pool import browser_pool, run_sync
+from tools.html_parser import parse_html, select, select_one
+from tools.name_matching import search_name
+from tools.profile_scoring import Candidate, candidate_from_card
+from tools.scholar_ids import scholar_url
+from tools.search_cache import query_key, search_cache
+from tools.tracing import span, traced
+
+# Páginas de resultados (10 perfis cada) percorridas no máximo por busca
+SEARCH_MAX_PAGES = int(os.getenv("SCHOLAR_SEARCH_MAX_PAGES", "3"))
+
+# O botão "Próxima" navega por JavaScript: window.location='/citations?...\x3d...\x26...'
+_LOCATION_RE = re.compile(r"window\.location='([^']+)'")
+_HEX_ESCAPE_RE = re.compile(r'\\x([0-9a-fA-F]{2})')
 
 class ScholarSearchInput(BaseModel):
     """Input schema para a ferramenta ScholarSearch."""
@@ -20,70 +35,148 @@ class ScholarSearchTool(BaseTool):
     args_schema: Type[BaseModel] = ScholarSearchInput
     
     def _run(self, researcher_name: str, email: Optional[str] = None, institution: Optional[str] = None) -> str:
+        return run_sync(self._arun(researcher_name, email, institution))
+
+    @traced('tool.scholar_search')
+    async def _arun(self, researcher_name: str, email: Optional[str] = None, institution: Optional[str] = None) -> str:
         if not researcher_name:
             raise ValueError("Nome do pesquisador não fornecido")
-        result = asyncio.run(search_scholar_profile(researcher_name, email, institution))
-        return result
+        try:
+            candidates = await search_scholar_profile(researcher_name, email, institution)
+        except ScholarSearchError as e:
+            return str(e)
+        if not candidates:
+            return NO_PROFILES_FOUND
+        # Retorna todos os perfis encontrados, um por linha
+        return "\n".join(candidate.url for candidate in candidates)
+
+class ScholarSearchError(RuntimeError):
+    """A página de busca não pôde ser carregada."""
+
+NO_PROFILES_FOUND = "Nenhum perfil encontrado para o pesquisador."
+
+def next_page_url(tree) -> Optional[str]:
+    """
+    URL da próxima página de resultados da busca de autores.
+
+    Lida do botão "Próxima", que carrega os tokens de paginação
+    (`after_author` e `astart`). None na última página.
+    """
+    button = select_one(tree, 'search_next_button')
+    if button is None or button.get('disabled') is not None:
+        return None
+    match = _LOCATION_RE.search(button.get('onclick') or '')
+    if not match:
+        return None
+    path = _HEX_ESCAPE_RE.sub(lambda escape: chr(int(escape.group(1), 16)), match.group(1))
+    return scholar_url(path) if 'after_author=' in path else None
+
+async def _fetch_search_page(url: str, page: int):
+    crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
+    # Um navegador por página: entre uma página e outra quem consome o iterador
+    # pode precisar do pool (para abrir perfis, por exemplo)
+    async with browser_pool.acquire() as crawler:
+        try:
+            result = await crawler.arun(url=url, config=crawl_config, session_id="scholar_search")
+        except Exception as e:
+            print(f"Erro durante a busca (página {page}): {str(e)}")
+            raise ScholarSearchError(f"Erro ao buscar perfis: {str(e)}") from e
+
+    if not result.success:
+        raise ScholarSearchError("Falha ao realizar a busca no Google Scholar.")
+    return parse_html(result.html)
+
+async def _search_page(url: str, key: str, page: int, refresh: bool) -> Tuple[List[Candidate], Optional[str]]:
+    """Candidatos e URL da página seguinte, do cache de buscas ou do Scholar."""
+    if search_cache is not None and not refresh:
+        cached = search_cache.get(key, page)
+        if cached is not None:
+            print(f"Página {page} da busca servida pelo cache")
+            return cached.candidates, cached.next_url
+
+    tree = await _fetch_search_page(url, page)
+    candidates = [candidate for candidate in map(candidate_from_card, select(tree, 'author_cards'))
+                  if candidate is not None]
+    next_url = next_page_url(tree)
+    if search_cache is not None:
+        search_cache.put(key, page, candidates, next_url)
+    return candidates, next_url
+
+async def iter_search_pages(researcher_name: str, email: Optional[str] = None,
+                            institution: Optional[str] = None,
+                            max_pages: int = SEARCH_MAX_PAGES,
+                            refresh: bool = False) -> AsyncIterator[List[Candidate]]:
+    """
+    Percorre as páginas de resultados da busca de autores, uma por vez.
 
-async def search_scholar_profile(researcher_name: str, email: Optional[str] = None, institution: Optional[str] = None):
+    Cada página só é baixada quando a anterior já foi consumida, seguindo os
+    tokens `after_author`/`astart` do botão "Próxima"; quem consome o
+    iterador para quando já tem confiança no perfil. Produz os candidatos
+    ainda não vistos de cada página, na ordem da busca, e termina na última
+    página, depois de `max_pages` páginas ou numa página sem perfis novos.
+
+    As páginas vêm do cache de buscas quando a mesma consulta (normalizada)
+    já foi feita; `refresh` ignora o cache e busca de novo.
+
+    Raises:
+        ScholarSearchError: Se a primeira página falhar (falhas nas seguintes
+        apenas encerram a paginação)
+    """
     print(f"\n*** Buscando perfil para: {researcher_name} ***")
     if email:
         print(f"Email: {email}")
     if institution:
         print(f"Instituição: {institution}")
 
-    # Configurar o crawler
-    browser_config = BrowserConfig(
-        headless=True,
-        verbose=False,
-        extra_args=["--disable-gpu", "--disable-dev-shm-usage", "--no-sandbox"],
-    )
-    crawl_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS)
-
-    # Construir a query de busca concatenando as informações disponíveis
-    search_query = researcher_name
+    # Construir a query de busca concatenando as informações disponíveis; o nome
+    # vai sem partículas ("da", "dos") e sem pontos nas iniciais, para também
+    # achar perfis que escrevem o nome sem eles
+    search_query = search_name(researcher_name)
     if institution:
         search_query += f" {institution}"
     if email:
         search_query += f" {email}"
-    
-    # Criar URL de busca para primeira página
+    print(f"Buscando perfis com a query: {search_query}")
+
     encoded_query = urllib.parse.quote(search_query)
-    search_url = f"https://scholar.google.com/citations?view_op=search_authors&mauthors={encoded_query}&hl=pt-BR"
-
-    crawler = AsyncWebCrawler(config=browser_config)
-    await crawler.start()
-
-    try:
-        # Buscar na primeira página
-        print(f"Buscando perfis com a query: {search_query}")
-        session_id = "scholar_search"
-        result = await crawler.arun(url=search_url, config=crawl_config, session_id=session_id)
-        
-        if result.success:
-            soup = BeautifulSoup(result.html, 'html.parser')
-            profile_links = soup.select('div.gsc_1usr a[href*="user="]')
-            
-            profiles = []
-            for link in profile_links:
-                if link.get('href'):
-                    profile_url = "https://scholar.google.com" + link['href']
-                    profiles.append(profile_url)
-            
-            print(f"Encontrados {len(profiles)} perfis na busca")
-            
-            # Verificar se encontramos algum perfil
-            if profiles:
-                # Retorna todos os perfis encontrados, um por linha
-                return "\n".join(profiles)
-            else:
-                return "Nenhum perfil encontrado para o pesquisador."
-        else:
-            return "Falha ao realizar a busca no Google Scholar."
-    
-    except Exception as e:
-        print(f"Erro durante a busca: {str(e)}")
-        return f"Erro ao buscar perfis: {str(e)}"
-    
-    finally:
-        await crawler.close() 
\ No newline at end of file
+    url = scholar_url(f"/citations?view_op=search_authors&mauthors={encoded_query}&hl=pt-BR")
+    key = query_key(researcher_name, email, institution)
+    seen = set()
+    page = 0
+    while url and page < max_pages:
+        page += 1
+        with span('search.page', page=page) as page_span:
+            try:
+                page_candidates, url = await _search_page(url, key, page, refresh)
+            except ScholarSearchError:
+                if page == 1:
+                    raise
+                print(f"Paginação interrompida na página {page}")
+                return
+            candidates = [candidate for candidate in page_candidates if candidate.url not in seen]
+            seen.update(candidate.url for candidate in candidates)
+            page_span.set('profiles', len(candidates))
+
+        print(f"Encontrados {len(candidates)} perfis na página {page}")
+        if not candidates and page > 1:
+            return
+        yield candidates
+
+@traced('search')
+async def search_scholar_profile(researcher_name: str, email: Optional[str] = None,
+                                 institution: Optional[str] = None) -> List[Candidate]:
+    """
+    Busca o pesquisador na busca de autores do Scholar (só a primeira página).
+
+    Returns:
+        List[Candidate]: Um registro por cartão de resultado, com nome,
+        afiliação, domínio de email, citações e interesses, na ordem da busca
+        (lista vazia se nenhum perfil foi encontrado)
+
+    Raises:
+        ScholarSearchError: Se a busca falhar
+    """
+    async with aclosing(iter_search_pages(researcher_name, email, institution, max_pages=1)) as pages:
+        async for candidates in pages:
+            return candidates
+    return []
@@ -0,0 +1,152 @@
+"""
+Cache das buscas de autores, por consulta.
+
+A chave é a consulta normalizada: nome, email e instituição sem acentos,
+em minúsculas, sem pontuação e com as palavras em ordem alfabética (o nome
+também sem partículas), de modo que "Silva, Maria da" e "maria silva"
+caiam na mesma entrada. Cada página de resultados da consulta guarda os
+candidatos extraídos dos cartões e a URL da página seguinte.
+
+Uma primeira página sem perfis também é guardada (cache negativo), com
+validade menor. Falhas da busca não são guardadas. O cache é um arquivo
+SQLite local, compartilhado entre processos (interface, lote e agentes).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from tools.name_matching import name_tokens, normalize_name
+from tools.page_cache import PAGE_TTLS
+from tools.profile_scoring import Candidate
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SEARCH_CACHE_PATH = os.path.join(BASE_DIR, 'data', 'search_cache.sqlite')
+
+# Validade das páginas com perfis e das buscas sem nenhum perfil, em segundos. As
+# páginas com perfis valem o mesmo que o HTML da busca no cache de páginas
+SEARCH_CACHE_TTL = float(os.getenv("SCHOLAR_SEARCH_CACHE_TTL", str(PAGE_TTLS['search'])))
+SEARCH_CACHE_NEGATIVE_TTL = float(os.getenv("SCHOLAR_SEARCH_CACHE_NEGATIVE_TTL", str(PAGE_TTLS['search'] / 4)))
+
+
+def _sorted_words(words: List[str]) -> str:
+    return ' '.join(sorted(words))
+
+
+def query_key(researcher_name: str, email: Optional[str] = None, institution: Optional[str] = None) -> str:
+    """Chave da consulta, independente de acentos, caixa, espaços e ordem das palavras."""
+    return '|'.join((
+        _sorted_words(name_tokens(researcher_name)),
+        (email or '').strip().lower(),
+        _sorted_words(normalize_name(institution).split()),
+    ))
+
+
+class CachedSearchPage(NamedTuple):
+    candidates: List[Candidate]
+    next_url: Optional[str]
+
+
+def _dump_candidates(candidates: List[Candidate]) -> str:
+    return json.dumps([
+        {**candidate._asdict(), 'coauthor_ids': sorted(candidate.coauthor_ids)}
+        for candidate in candidates
+    ], ensure_ascii=False)
+
+
+def _load_candidates(data: str) -> List[Candidate]:
+    return [
+        Candidate(**{**item, 'interests': tuple(item['interests']), 'coauthor_ids': frozenset(item['coauthor_ids'])})
+        for item in json.loads(data)
+    ]
+
+
+class SearchCache:
+    """
+    Cache local de páginas da busca de autores em SQLite, por consulta normalizada.
+
+    A tabela `searches` tem uma linha por (chave da consulta, página).
+    """
+
+    def __init__(self, path: str = DEFAULT_SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 negative_ttl: float = SEARCH_CACHE_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    query_key TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    candidates TEXT NOT NULL,
+                    next_url TEXT,
+                    empty INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (query_key, page)
+                );
+            """)
+        return self._conn
+
+    def get(self, key: str, page: int = 1) -> Optional[CachedSearchPage]:
+        """Página da consulta em cache, se ainda estiver dentro da validade."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT candidates, next_url, empty, fetched_at FROM searches WHERE query_key = ? AND page = ?",
+                (key, page),
+            ).fetchone()
+            if row is None or time.time() - row[3] > (self.negative_ttl if row[2] else self.ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return CachedSearchPage(_load_candidates(row[0]), row[1])
+
+    def put(self, key: str, page: int, candidates: List[Candidate], next_url: Optional[str] = None):
+        """Guarda os candidatos de uma página carregada com sucesso (lista vazia = nenhum perfil)."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO searches (query_key, page, candidates, next_url, empty, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, page, _dump_candidates(candidates), next_url, not candidates, time.time()),
+            )
+            conn.commit()
+
+    def invalidate(self, key: str):
+        """Remove todas as páginas da consulta."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM searches WHERE query_key = ?", (key,))
+            conn.commit()
+
+    def purge_expired(self):
+        """Remove as páginas vencidas."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM searches WHERE empty = 0 AND fetched_at < ?", (now - self.ttl,))
+            conn.execute("DELETE FROM searches WHERE empty = 1 AND fetched_at < ?", (now - self.negative_ttl,))
+            conn.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+search_cache = None if os.getenv("SCHOLAR_SEARCH_CACHE_DISABLED") else SearchCache(
+    os.getenv("SCHOLAR_SEARCH_CACHE", DEFAULT_SEARCH_CACHE_PATH)
+)
@@ -0,0 +1,316 @@
+"""
+Rastreamento das etapas do pipeline (spans aninhados).
+
+Cada etapa abre um span com `span("nome", **atributos)`. O span pai é
+herdado por contextvars, então o aninhamento acompanha o fluxo
+executar → task → ferramenta → crawler.arun → parse → extração, inclusive
+entre tarefas asyncio. Os spans guardam a duração e atributos como bytes
+baixados e hits de cache.
+
+Os spans finalizados ficam separados por trace, e cada execução tem o seu
+(a raiz é o span sem pai). Ao fim da execução, `tracer.flush(trace_id)`
+grava só os spans dela em JSON no formato OTLP do OpenTelemetry (em
+`SCHOLAR_TRACES_DIR`, padrão `data/traces`) e imprime um resumo por etapa,
+sem misturar execuções simultâneas (sessões do Streamlit, threads). O
+resumo mostra o tempo total e o tempo próprio, sem os spans filhos. Defina
+`SCHOLAR_TRACING=0` para desligar.
+"""
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACING_ENABLED = os.getenv("SCHOLAR_TRACING", "1") != "0"
+TRACES_DIR = os.getenv("SCHOLAR_TRACES_DIR", os.path.join(BASE_DIR, "data", "traces"))
+SERVICE_NAME = "scholar-leads"
+
+# Atributos somados no resumo por etapa
+SUMMED_ATTRIBUTES = ("bytes", "cache_hit")
+
+
+class Span:
+    """Uma etapa cronometrada."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def add(self, key: str, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """Span usado quando o rastreamento está desligado."""
+
+    trace_id = None
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar('scholar_current_span', default=None)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Tracer:
+    """Coleta os spans finalizados, por trace, e os exporta ao fim de cada execução."""
+
+    def __init__(self, service_name: str = SERVICE_NAME, traces_dir: str = TRACES_DIR):
+        self.service_name = service_name
+        self.traces_dir = traces_dir
+        self._traces: Dict[str, List[Span]] = {}
+        # Resumo dos traces exportados com flush(summary=False), impresso por print_totals()
+        self._totals: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        return Span(name, trace_id, parent.span_id if parent is not None else None, attributes)
+
+    def end(self, span: Span):
+        span.end_ns = time.time_ns()
+        with self._lock:
+            self._traces.setdefault(span.trace_id, []).append(span)
+
+    def record(self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attributes) -> Span:
+        """Registra um span já concluído (para etapas cronometradas por callbacks)."""
+        span = self.start(name, parent, **attributes)
+        span.start_ns = start_ns
+        span.end_ns = end_ns
+        with self._lock:
+            self._traces.setdefault(span.trace_id, []).append(span)
+        return span
+
+    def adopt(self, parent: Span, previous_parent: Span):
+        """
+        Passa para `parent` os filhos já finalizados de `previous_parent` que
+        começaram e terminaram dentro do intervalo de `parent`.
+        """
+        with self._lock:
+            for span in self._traces.get(parent.trace_id, ()):
+                if (span is not parent and span.parent_id == previous_parent.span_id
+                        and parent.start_ns <= span.start_ns and span.end_ns <= parent.end_ns):
+                    span.parent_id = parent.span_id
+
+    def drain(self, trace_id: Optional[str] = None) -> List[Span]:
+        """Retira os spans do trace (ou de todos os traces) do buffer."""
+        with self._lock:
+            if trace_id is not None:
+                return self._traces.pop(trace_id, [])
+            traces, self._traces = self._traces, {}
+        return [span for spans in traces.values() for span in spans]
+
+    def export(self, spans: List[Span], path: Optional[str] = None, append: bool = False) -> str:
+        """
+        Grava os spans em JSON no formato OTLP (resourceSpans/scopeSpans/spans).
+
+        Com `append`, acrescenta o trace como uma linha de `path` (JSONL, como
+        o exportador de arquivo do OpenTelemetry Collector).
+        """
+        if path is None:
+            path = os.path.join(self.traces_dir, f"trace_{time.strftime('%Y%m%d_%H%M%S')}_{spans[0].trace_id[:8]}.json")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': _otlp_value(self.service_name)}]},
+                'scopeSpans': [{
+                    'scope': {'name': 'scholar-leads.tracing'},
+                    'spans': [
+                        {
+                            'traceId': span.trace_id,
+                            'spanId': span.span_id,
+                            'parentSpanId': span.parent_id or '',
+                            'name': span.name,
+                            'kind': 1,
+                            'startTimeUnixNano': str(span.start_ns),
+                            'endTimeUnixNano': str(span.end_ns),
+                            'attributes': [
+                                {'key': key, 'value': _otlp_value(value)}
+                                for key, value in span.attributes.items() if value is not None
+                            ],
+                            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+                        }
+                        for span in sorted(spans, key=lambda s: s.start_ns)
+                    ],
+                }],
+            }],
+        }
+        with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+            if append:
+                f.write("\n")
+        return path
+
+    @staticmethod
+    def summarize(spans: List[Span]) -> List[dict]:
+        """Agrega os spans por nome: chamadas, tempo total, tempo próprio, bytes e hits de cache."""
+        children_ms: Dict[str, float] = {}
+        for span in spans:
+            if span.parent_id:
+                children_ms[span.parent_id] = children_ms.get(span.parent_id, 0.0) + span.duration_ms
+
+        stages: Dict[str, dict] = {}
+        for span in spans:
+            stage = stages.setdefault(span.name, {
+                'name': span.name, 'count': 0, 'total_ms': 0.0, 'self_ms': 0.0, 'errors': 0,
+                **{attr: 0 for attr in SUMMED_ATTRIBUTES},
+            })
+            stage['count'] += 1
+            stage['total_ms'] += span.duration_ms
+            # Filhos concorrentes podem somar mais que o pai; o tempo próprio não fica negativo
+            stage['self_ms'] += max(0.0, span.duration_ms - children_ms.get(span.span_id, 0.0))
+            stage['errors'] += 1 if span.error else 0
+            for attr in SUMMED_ATTRIBUTES:
+                stage[attr] += int(span.attributes.get(attr) or 0)
+        return sorted(stages.values(), key=lambda s: s['self_ms'], reverse=True)
+
+    @staticmethod
+    def _print_stages(stages: List[dict]):
+        print("\n⏱️  Tempo por etapa (total = soma das chamadas; próprio = sem as etapas filhas):")
+        print(f"  {'etapa':<24}{'chamadas':>9}{'total (ms)':>13}{'próprio (ms)':>14}{'bytes':>12}{'cache':>7}")
+        for stage in stages:
+            print(f"  {stage['name']:<24}{stage['count']:>9}{stage['total_ms']:>13.1f}"
+                  f"{stage['self_ms']:>14.1f}{stage['bytes']:>12}{stage['cache_hit']:>7}")
+
+    def flush(self, trace_id: Optional[str] = None, path: Optional[str] = None,
+              summary: bool = True) -> Optional[str]:
+        """
+        Exporta os spans do trace (ou de todos, sem `trace_id`) e imprime o resumo por etapa.
+
+        Com `path`, o trace é acrescentado a esse arquivo JSONL. Com `summary`
+        False, o resumo não é impresso, mas é somado ao de `print_totals` (um
+        lote exporta cada lead assim e imprime o resumo só no fim).
+        """
+        spans = self.drain(trace_id)
+        if not spans:
+            return None
+        path = self.export(spans, path, append=path is not None)
+        stages = self.summarize(spans)
+        if not summary:
+            with self._lock:
+                for stage in stages:
+                    total = self._totals.setdefault(stage['name'], dict.fromkeys(stage, 0))
+                    for key, value in stage.items():
+                        total[key] = value if key == 'name' else total[key] + value
+            return path
+        self._print_stages(stages)
+        print(f"💾 Trace salvo em: {path}")
+        return path
+
+    def print_totals(self):
+        """Imprime e zera o resumo somado dos traces exportados com `flush(summary=False)`."""
+        with self._lock:
+            totals, self._totals = self._totals, {}
+        if totals:
+            self._print_stages(sorted(totals.values(), key=lambda s: s['self_ms'], reverse=True))
+
+
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Abre um span filho do span atual (ou a raiz de um novo trace)."""
+    if not TRACING_ENABLED:
+        yield _NOOP_SPAN
+        return
+    current = tracer.start(name, _current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.end(current)
+
+
+def traced(name: str):
+    """Decorador que executa a função (síncrona ou assíncrona) dentro de um span."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SequentialTaskSpans:
+    """
+    Spans das tasks de uma crew sequencial.
+
+    O CrewAI só avisa quando cada task termina (callback da Task). Por isso
+    cada span vai do fim da task anterior, ou do início do kickoff, até o fim
+    da task atual. Os spans das ferramentas, abertos durante a task como
+    filhos do kickoff, passam a ser filhos da task quando ela termina
+    (executar → crew.kickoff → agent_task → ferramenta).
+    """
+
+    def __init__(self):
+        self.parent: Optional[Span] = None
+        self._last_ns = time.time_ns()
+
+    def start(self, parent: Optional[Span] = None):
+        """Marca o início do kickoff; as tasks viram filhas de `parent`."""
+        self.parent = parent if parent is not None else current_span()
+        self._last_ns = time.time_ns()
+
+    def callback(self, task_name: str):
+        def on_task_done(output):
+            now = time.time_ns()
+            if TRACING_ENABLED:
+                task_span = tracer.record('agent_task', self._last_ns, now, self.parent,
+                                          task=task_name, agent=getattr(output, 'agent', None))
+                if self.parent is not None:
+                    tracer.adopt(task_span, self.parent)
+            self._last_ns = now
+        return on_task_done
@@ -0,0 +1,303 @@
+"""
+Estado do recrawl incremental de sitemaps.
+
+Guarda em SQLite, para cada URL já crawleada, o `lastmod` do sitemap, os
+validadores HTTP (ETag e Last-Modified) e o hash do conteúdo. Em cada
+execução, uma página já conhecida só é baixada de novo quando:
+
+- o `lastmod` do sitemap mudou (ou não existe), e
+- o HEAD condicional (If-None-Match / If-Modified-Since) não responde 304
+  nem devolve os mesmos validadores.
+
+O HEAD não baixa o corpo: o hash é calculado sobre o HTML que o próprio
+crawl baixou, e uma página com o mesmo hash do último salvo conta como
+inalterada. Páginas novas (ou que tinham saído do sitemap) vão direto para
+o crawl, sem revalidação.
+
+Cada execução registra um feed de mudanças com as páginas adicionadas,
+atualizadas e removidas (as que sumiram do sitemap).
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterator, Optional, Set, Tuple
+
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DB = os.getenv("CRAWL_STATE_DB", os.path.join(BASE_DIR, "data", "crawl_state.sqlite"))
+
+# Requisições condicionais simultâneas durante a revalidação
+REVALIDATE_CONCURRENCY = int(os.getenv("CRAWL_REVALIDATE_CONCURRENCY", "10"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    first_seen REAL NOT NULL,
+    last_crawled REAL NOT NULL,
+    last_seen_run INTEGER NOT NULL,
+    removed_at REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    change TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_seen ON pages (last_seen_run, removed_at);
+CREATE INDEX IF NOT EXISTS idx_changes_run ON changes (run_id);
+"""
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class CrawlState:
+    """Banco de estado do recrawl incremental."""
+
+    def __init__(self, path: str = STATE_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def begin_run(self) -> int:
+        cursor = self._conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+        self._conn.commit()
+        return cursor.lastrowid
+
+    def get(self, url: str) -> Optional[sqlite3.Row]:
+        return self._conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+
+    def mark_seen(self, url: str, run_id: int):
+        """Registra que a URL continua no sitemap nesta execução."""
+        self._conn.execute(
+            "UPDATE pages SET last_seen_run = ? WHERE url = ?", (run_id, url)
+        )
+
+    def record_crawled(self, url: str, run_id: int, lastmod: Optional[str], etag: Optional[str],
+                       last_modified: Optional[str], digest: Optional[str]):
+        """Salva os validadores de uma página crawleada com sucesso e registra a mudança."""
+        now = time.time()
+        existing = self.get(url)
+        change = 'added' if existing is None or existing['removed_at'] is not None else 'updated'
+        self._conn.execute(
+            """
+            INSERT INTO pages (url, lastmod, etag, last_modified, content_hash,
+                               first_seen, last_crawled, last_seen_run, removed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)
+            ON CONFLICT(url) DO UPDATE SET
+                lastmod = excluded.lastmod,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                content_hash = excluded.content_hash,
+                last_crawled = excluded.last_crawled,
+                last_seen_run = excluded.last_seen_run,
+                removed_at = NULL
+            """,
+            (url, lastmod, etag, last_modified, digest, now, now, run_id),
+        )
+        self._conn.execute(
+            "INSERT INTO changes (run_id, url, change, at) VALUES (?, ?, ?, ?)",
+            (run_id, url, change, now),
+        )
+        self._conn.commit()
+
+    def refresh(self, url: str, lastmod: Optional[str], etag: Optional[str] = None,
+                last_modified: Optional[str] = None):
+        """Atualiza o lastmod e os validadores de uma página que não mudou."""
+        self._conn.execute(
+            """
+            UPDATE pages SET lastmod = COALESCE(?, lastmod), etag = COALESCE(?, etag),
+                             last_modified = COALESCE(?, last_modified)
+            WHERE url = ?
+            """,
+            (lastmod, etag, last_modified, url),
+        )
+
+    def mark_removed(self, run_id: int) -> int:
+        """Marca como removidas as páginas que não apareceram no sitemap desta execução."""
+        now = time.time()
+        removed = [
+            row['url'] for row in self._conn.execute(
+                "SELECT url FROM pages WHERE last_seen_run < ? AND removed_at IS NULL", (run_id,)
+            )
+        ]
+        self._conn.executemany("UPDATE pages SET removed_at = ? WHERE url = ?", [(now, url) for url in removed])
+        self._conn.executemany(
+            "INSERT INTO changes (run_id, url, change, at) VALUES (?, ?, 'removed', ?)",
+            [(run_id, url, now) for url in removed],
+        )
+        self._conn.commit()
+        return len(removed)
+
+    def changes(self, run_id: int) -> Iterator[sqlite3.Row]:
+        """Feed de mudanças da execução (added, updated, removed)."""
+        return self._conn.execute(
+            "SELECT url, change, at FROM changes WHERE run_id = ? ORDER BY at", (run_id,)
+        )
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+async def _revalidate(client: httpx.AsyncClient, url: str, row: sqlite3.Row) -> Tuple[bool, dict]:
+    """
+    HEAD condicional de uma URL já crawleada.
+
+    Retorna (mudou, validadores). Servidores que ignoram os cabeçalhos
+    condicionais no HEAD respondem 200; aí valem os validadores devolvidos
+    (o ETag, se houver, senão o Last-Modified). Erros de rede e respostas
+    sem validadores contam como mudança para que o crawler tente a página
+    normalmente.
+    """
+    headers = {}
+    if row['etag']:
+        headers['If-None-Match'] = row['etag']
+    if row['last_modified']:
+        headers['If-Modified-Since'] = row['last_modified']
+    try:
+        response = await client.head(url, headers=headers)
+    except httpx.HTTPError as e:
+        print(f"[incremental] Erro ao revalidar {url}: {str(e)}")
+        return True, {}
+
+    if response.status_code == 304:
+        return False, {}
+    validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    if response.status_code != 200:
+        return True, validators
+    if validators['etag']:
+        return validators['etag'] != row['etag'], validators
+    return not validators['last_modified'] or validators['last_modified'] != row['last_modified'], validators
+
+
+class RecrawlPlanner:
+    """
+    Decide quais URLs do sitemap precisam ser crawleadas de novo.
+
+    As entradas do sitemap são consumidas em streaming, e as URLs novas ou
+    alteradas são produzidas conforme a revalidação termina. Assim o crawl
+    começa antes de o sitemap acabar de ser lido.
+
+    Args:
+        state: Banco de estado
+        run_id: Execução atual (ver `CrawlState.begin_run`)
+        concurrency: HEADs condicionais simultâneos
+    """
+
+    def __init__(self, state: CrawlState, run_id: int, concurrency: int = REVALIDATE_CONCURRENCY):
+        self.state = state
+        self.run_id = run_id
+        self.concurrency = concurrency
+        # url -> {lastmod, etag, last_modified} das páginas alteradas ainda não crawleadas
+        self.pending: Dict[str, dict] = {}
+        # URLs já lidas nesta execução: a mesma página pode aparecer duas vezes no
+        # sitemap ou em sitemaps filhos diferentes de um índice
+        self._urls: Set[str] = set()
+        self.seen = 0
+        self.unchanged = 0
+
+    def crawled(self, url: str, html: str):
+        """
+        Registra uma página crawleada com sucesso (callback `on_success` do crawl).
+
+        O hash é calculado sobre o HTML baixado pelo crawl; se for igual ao
+        último salvo, a página conta como inalterada e só os validadores são
+        atualizados.
+        """
+        info = self.pending.pop(url, None)
+        if info is None:
+            return
+        digest = content_hash(html.encode('utf-8'))
+        row = self.state.get(url)
+        if row is not None and row['removed_at'] is None and row['content_hash'] == digest:
+            self.state.refresh(url, info['lastmod'], info.get('etag'), info.get('last_modified'))
+            self.unchanged += 1
+            return
+        self.state.record_crawled(url, self.run_id, info['lastmod'], info.get('etag'),
+                                  info.get('last_modified'), digest)
+
+    async def changed_urls(self, entries: AsyncIterable[Tuple[str, Optional[str]]]) -> AsyncIterator[str]:
+        """Produz as URLs que mudaram desde a última execução, cada uma uma única vez."""
+        candidates: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        changed: asyncio.Queue = asyncio.Queue()
+
+        async def producer():
+            try:
+                async for url, lastmod in entries:
+                    if url in self._urls:
+                        continue
+                    self._urls.add(url)
+                    self.seen += 1
+                    row = self.state.get(url)
+                    if row is not None:
+                        self.state.mark_seen(url, self.run_id)
+                        if lastmod and row['lastmod'] == lastmod and row['removed_at'] is None:
+                            self.unchanged += 1
+                            continue
+                    await candidates.put((url, lastmod, row))
+            finally:
+                for _ in range(self.concurrency):
+                    await candidates.put(None)
+
+        async def worker(client: httpx.AsyncClient):
+            try:
+                while True:
+                    item = await candidates.get()
+                    if item is None:
+                        return
+                    url, lastmod, row = item
+                    if row is None or row['removed_at'] is not None:
+                        # Página nova: não há o que revalidar, o crawl baixa de qualquer forma
+                        is_changed, validators = True, {}
+                    else:
+                        is_changed, validators = await _revalidate(client, url, row)
+                    if is_changed:
+                        self.pending[url] = dict(validators, lastmod=lastmod)
+                        await changed.put(url)
+                    else:
+                        # Mesmo conteúdo: guarda o lastmod novo para pular a página na próxima execução
+                        self.state.refresh(url, lastmod, validators.get('etag'), validators.get('last_modified'))
+                        self.unchanged += 1
+            finally:
+                await changed.put(None)
+
+        async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as client:
+            tasks = [asyncio.create_task(producer())]
+            tasks += [asyncio.create_task(worker(client)) for _ in range(self.concurrency)]
+            try:
+                finished = 0
+                while finished < self.concurrency:
+                    url = await changed.get()
+                    if url is None:
+                        finished += 1
+                        continue
+                    yield url
+                # Propaga erros do producer (por exemplo, falha ao ler o sitemap)
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                self.state.commit()
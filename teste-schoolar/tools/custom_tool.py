@@ -2,38 +2,55 @@ from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
 import asyncio
-import requests
-from xml.etree import ElementTree
+import json
+import math
+import os
 import time
 
-from typing import List
+from typing import AsyncIterable, Callable, Iterable, List, Optional, Union
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 
+from tools.crawl_state import CrawlState, RecrawlPlanner
+from tools.result_sink import ResultSink
+from tools.sitemap import SitemapDiscoverer
+
+# URLs aguardando um worker livre
+CRAWL_QUEUE_SIZE = int(os.getenv("CRAWL_QUEUE_SIZE", "10000"))
+
 
 class MyCustomToolInput(BaseModel):
     """Input schema para a ferramenta MyCustomTool."""
     url: str = Field(..., description="URL do sitemap do site a ser crawleado.")
+    incremental: bool = Field(
+        True, description="Crawlear apenas as páginas novas ou alteradas desde a última execução."
+    )
 
 class MyCustomTool(BaseTool):
     name: str = "Crawl Sitemap"
     description: str = (
-        "Essa ferramenta é capaz de crawlear um sitemap e retornar uma lista de urls a serem crawleadas."
+        "Essa ferramenta é capaz de crawlear todas as urls de um sitemap. O conteúdo de cada página é gravado "
+        "em disco e a ferramenta retorna um manifesto resumido (url, status, tamanho e arquivo)."
     )
     args_schema: Type[BaseModel] = MyCustomToolInput
     
-    def _run(self, sitemap_url: str) -> str:
-        # Implementation goes here
-        urls = get_crewai_docs_urls(sitemap_url)
-        if urls:
-            print(f"Foram encontradas {len(urls)} URLs para crawlear")
-            result = asyncio.run(crawl_parallel(urls, max_concurrent=10))
-            print(result)
-        else:
-            print("Não foram encontradas URLs para crawlear")    
-
-        return result
-    
-async def crawl_parallel(urls: List[str], max_concurrent: int = 3):
+    def _run(self, url: str, incremental: bool = True) -> str:
+        # O conteúdo vai para os shards em disco; o agente recebe só o manifesto resumido
+        with ResultSink() as sink:
+            summary = asyncio.run(crawl_sitemap(url, sink, incremental=incremental, max_concurrent=10))
+        return json.dumps(summary, ensure_ascii=False)
+
+def latency_percentiles(latencies: List[float], percentiles=(50, 90, 95, 99)) -> dict:
+    """Percentis (nearest-rank) das latências por URL, em segundos."""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    return {
+        p: ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+        for p in percentiles
+    }
+
+async def crawl_parallel(urls: Union[Iterable[str], AsyncIterable[str]], sink: ResultSink, max_concurrent: int = 3,
+                         on_success: Optional[Callable[[str, str], None]] = None):
     print("\n*** Crawleando URLs em paralelo ***")
 
     # Minimal browser config
@@ -48,50 +65,100 @@ async def crawl_parallel(urls: List[str], max_concurrent: int = 3):
     crawler = AsyncWebCrawler(config=browser_config)
     await crawler.start()
 
+    # Fila de trabalho: cada worker pega a próxima URL assim que termina a
+    # anterior, então uma página lenta só ocupa o próprio slot. A fila é
+    # limitada e alimentada aos poucos, para as URLs de sitemaps grandes não
+    # ficarem todas em memória
+    queue: asyncio.Queue = asyncio.Queue(maxsize=CRAWL_QUEUE_SIZE)
+
+    async def producer():
+        if hasattr(urls, '__aiter__'):
+            async for url in urls:
+                await queue.put(url)
+        else:
+            for url in urls:
+                await queue.put(url)
+        for _ in range(max_concurrent):
+            await queue.put(None)
+
+    success_count = 0
+    fail_count = 0
+    latencies: List[float] = []
+
+    async def crawl_one(url: str, session_id: str) -> bool:
+        started = time.perf_counter()
+        try:
+            result = await crawler.arun(url=url, config=crawl_config, session_id=session_id)
+        except Exception as e:
+            print(f"Erro no crawleamento da URL: {url}: {e}")
+            sink.write(url, "error", error=str(e))
+            return False
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+        if not result.success:
+            print(f"Falha no crawleamento da URL: {url}")
+            sink.write(url, "failed", error=getattr(result, "error_message", None))
+            return False
+
+        print("Crawleamento da URL com sucesso", url)
+        sink.write(url, "ok", markdown=result.markdown_v2.raw_markdown)
+        if on_success is not None:
+            on_success(url, result.html or "")
+
+        print("--- URL ---")
+        print(url)
+        print("--- MARKDOWN ---")
+        print(result.markdown[:250])
+        print("--------------------------------")
+        return True
+
+    async def worker(worker_id: int):
+        nonlocal success_count, fail_count
+        session_id = f"parallel_session_{worker_id}"
+        while True:
+            url = await queue.get()
+            if url is None:
+                return
+            try:
+                ok = await crawl_one(url, session_id)
+            except Exception as e:
+                # Erro ao gravar o resultado ou no callback: só esta URL é perdida, o worker continua
+                print(f"Erro ao processar a URL: {url}: {e}")
+                ok = False
+            if ok:
+                success_count += 1
+            else:
+                fail_count += 1
+
+    start_time = time.time()
+    # Se o producer ou um worker falhar, as demais tarefas são canceladas: nenhum
+    # worker fica esperando URLs que não virão, e o producer não fica preso na
+    # fila cheia sem ninguém consumindo
+    tasks = [asyncio.create_task(producer())]
+    tasks += [asyncio.create_task(worker(i)) for i in range(max_concurrent)]
     try:
-        success_count = 0
-        fail_count = 0
-        start_time = time.time()
         print(f"Start Time: {time.ctime(start_time)}")
-        for i in range(0, len(urls), max_concurrent):
-            batch = urls[i : i + max_concurrent]
-            tasks = []
-
-            for j, url in enumerate(batch):
-                session_id = f"parallel_session_{i + j}"
-                task = crawler.arun(url=url, config=crawl_config, session_id=session_id)
-                tasks.append(task)
-
-            # Gather results
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            markdown_results = []
-            
-            for url, result in zip(batch, results):
-                if isinstance(result, Exception):
-                    print(f"Erro no crawleamento da URL: {url}: {result}")
-                    fail_count += 1
-                elif result.success:
-                    print("Crawleamento da URL com sucesso", url)
-                    success_count += 1
-                    markdown_results.append(result.markdown_v2.raw_markdown[:1000])
-                    
-                    print("--- URL ---")
-                    print(url)
-                    print("--- MARKDOWN ---")
-                    print(result.markdown[:250])
-                    print("--------------------------------")
-                else:
-                    print(f"Falha no crawleamento da URL: {url}")
-                    fail_count += 1
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
 
         print(f"\nResumo:")
         print(f"  - URLs crawleadas com sucesso: {success_count}")
         print(f"  - URLs não crawleadas: {fail_count}")
+        percentiles = latency_percentiles(latencies)
+        if percentiles:
+            print("  - Latência por URL: " + ", ".join(
+                f"p{p}={value:.2f}s" for p, value in percentiles.items()
+            ) + f", máx={max(latencies):.2f}s")
+
+        print(f"  - Resultados gravados em: {sink.run_dir}")
 
-        return markdown_results
+        return sink.summary()
 
     finally:
+        for task in tasks:
+            task.cancel()
         end_time = time.time()
         print(f"End Time: {time.ctime(end_time)}")
         print(f"Total Time Taken: {end_time - start_time:.2f} seconds")
@@ -105,29 +172,66 @@ def get_crewai_docs_urls(sitemap_url: str):
     
     Returns:
         List[str]: List of URLs
-    """            
+    """
+    async def collect():
+        return [entry.url async for entry in SitemapDiscoverer().entries(sitemap_url)]
+
+    return asyncio.run(collect())
 
+
+async def crawl_incremental(sitemap_url: str, sink: ResultSink, max_concurrent: int = 3) -> dict:
+    """
+    Crawleia só as páginas novas ou alteradas desde a última execução.
+
+    O feed de mudanças (added, updated, removed) é gravado em `changes.jsonl`
+    junto dos shards da execução.
+    """
+    discoverer = SitemapDiscoverer()
+    state = CrawlState()
     try:
-        response = requests.get(sitemap_url)
-        response.raise_for_status()
-        
-        # Parse the XML
-        root = ElementTree.fromstring(response.content)
-        
-        # Extract all URLs from the sitemap
-        # The namespace is usually defined in the root element
-        namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-        urls = [loc.text for loc in root.findall('.//ns:loc', namespace)]
-        
-        return urls
-    except Exception as e:
-        print(f"Error fetching sitemap: {e}")
-        return []        
+        run_id = state.begin_run()
+        planner = RecrawlPlanner(state, run_id)
+        await crawl_parallel(planner.changed_urls(discoverer.entries(sitemap_url)), sink,
+                             max_concurrent=max_concurrent, on_success=planner.crawled)
+        print(f"[incremental] {planner.seen} URLs no sitemap, {planner.unchanged} inalteradas")
+        if not planner.seen:
+            return {"error": f"Nenhuma URL encontrada no sitemap {sitemap_url}"}
+
+        # Com o sitemap lido pela metade, as URLs não vistas não foram necessariamente removidas
+        if discoverer.errors:
+            print(f"[incremental] {discoverer.errors} sitemaps com erro; remoções não serão registradas")
+            removed = 0
+        else:
+            removed = state.mark_removed(run_id)
+
+        counts = {'added': 0, 'updated': 0, 'removed': removed, 'unchanged': planner.unchanged}
+        feed_path = os.path.join(sink.run_dir, "changes.jsonl")
+        with open(feed_path, "w", encoding="utf-8") as f:
+            for row in state.changes(run_id):
+                if row['change'] != 'removed':
+                    counts[row['change']] += 1
+                f.write(json.dumps(dict(row), ensure_ascii=False) + "\n")
+    finally:
+        state.close()
+
+    return dict(sink.summary(), changes=counts, change_feed=feed_path)
+
+
+async def crawl_sitemap(sitemap_url: str, sink: ResultSink, incremental: bool = True,
+                        max_concurrent: int = 3) -> dict:
+    """Crawleia as páginas do sitemap (todas ou só as alteradas) e retorna o resumo da execução."""
+    if incremental:
+        return await crawl_incremental(sitemap_url, sink, max_concurrent=max_concurrent)
+
+    discoverer = SitemapDiscoverer()
+    urls = (entry.url async for entry in discoverer.entries(sitemap_url))
+    summary = await crawl_parallel(urls, sink, max_concurrent=max_concurrent)
+    if not discoverer.urls:
+        print("Não foram encontradas URLs para crawlear")
+        return {"error": f"Nenhuma URL encontrada no sitemap {sitemap_url}"}
+    return summary
 
 async def main():
-    urls = get_crewai_docs_urls()
-    if urls:
-        print(f"Found {len(urls)} URLs to crawl")
-        await crawl_parallel(urls, max_concurrent=10)
-    else:
-        print("No URLs found to crawl")    
\ No newline at end of file
+    with ResultSink() as sink:
+        summary = await crawl_sitemap("https://docs.crewai.com/sitemap.xml", sink, max_concurrent=10)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
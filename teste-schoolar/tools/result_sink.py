@@ -0,0 +1,112 @@
+"""
+Gravação incremental dos resultados do crawl.
+
+Cada página crawleada é gravada assim que chega em shards JSONL
+comprimidos (gzip), que são apenas acrescentados. Um manifesto com URL,
+status, tamanho e shard de cada página também é gravado em disco. Nada
+fica acumulado em memória além de contadores e de uma prévia curta do
+manifesto, então sitemaps grandes rodam com memória constante e só um
+resumo compacto volta para o agente.
+"""
+import gzip
+import json
+import os
+import time
+from typing import List, Optional
+
+OUTPUT_DIR = os.getenv("CRAWL_OUTPUT_DIR", os.path.join("data", "crawl"))
+
+# Registros por shard antes de abrir o próximo arquivo
+SHARD_MAX_RECORDS = int(os.getenv("CRAWL_SHARD_MAX_RECORDS", "1000"))
+
+# Entradas do manifesto devolvidas ao agente (o manifesto completo fica em disco)
+MANIFEST_PREVIEW = 20
+
+
+class ResultSink:
+    """
+    Destino dos resultados de um crawl.
+
+    Args:
+        output_dir: Diretório base; cada execução ganha um subdiretório com timestamp
+        shard_max_records: Registros por shard `.jsonl.gz`
+    """
+
+    def __init__(self, output_dir: str = OUTPUT_DIR, shard_max_records: int = SHARD_MAX_RECORDS):
+        self.run_dir = os.path.join(output_dir, time.strftime("%Y%m%d_%H%M%S"))
+        self.shard_max_records = shard_max_records
+        self.manifest_path = os.path.join(self.run_dir, "manifest.jsonl")
+        self.shards: List[str] = []
+        self.records = 0
+        self.failures = 0
+        self.bytes_written = 0
+        self.preview: List[dict] = []
+        self._shard = None
+        self._shard_records = 0
+        self._manifest = None
+
+    def __enter__(self):
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._manifest = open(self.manifest_path, "a", encoding="utf-8")
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _current_shard(self):
+        if self._shard is None or self._shard_records >= self.shard_max_records:
+            if self._shard is not None:
+                self._shard.close()
+            path = os.path.join(self.run_dir, f"shard-{len(self.shards):05d}.jsonl.gz")
+            self._shard = gzip.open(path, "at", encoding="utf-8")
+            self._shard_records = 0
+            self.shards.append(path)
+        return self._shard
+
+    def write(self, url: str, status: str, markdown: Optional[str] = None, error: Optional[str] = None) -> dict:
+        """Grava o resultado de uma URL e retorna a entrada correspondente do manifesto."""
+        entry = {"url": url, "status": status, "bytes": 0, "path": None}
+        if markdown is not None:
+            record = json.dumps({
+                "url": url,
+                "status": status,
+                "crawled_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "markdown": markdown,
+            }, ensure_ascii=False)
+            shard = self._current_shard()
+            shard.write(record + "\n")
+            self._shard_records += 1
+            self.records += 1
+            entry["bytes"] = len(markdown.encode("utf-8"))
+            entry["path"] = self.shards[-1]
+            self.bytes_written += entry["bytes"]
+        else:
+            self.failures += 1
+            if error:
+                entry["error"] = error[:200]
+
+        self._manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._manifest.flush()
+        if len(self.preview) < MANIFEST_PREVIEW:
+            self.preview.append(entry)
+        return entry
+
+    def summary(self) -> dict:
+        """Resumo compacto para o agente: contadores, arquivos e uma prévia do manifesto."""
+        return {
+            "run_dir": self.run_dir,
+            "manifest": self.manifest_path,
+            "shards": self.shards,
+            "pages_saved": self.records,
+            "failures": self.failures,
+            "bytes": self.bytes_written,
+            "preview": self.preview,
+        }
+
+    def close(self):
+        if self._shard is not None:
+            self._shard.close()
+            self._shard = None
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
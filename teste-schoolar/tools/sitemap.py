@@ -0,0 +1,150 @@
+"""
+Descoberta assíncrona de URLs em sitemaps.
+
+Suporta `urlset` e `sitemapindex` (com recursão até `MAX_SITEMAP_DEPTH`) e
+sitemaps comprimidos (`.xml.gz`), descomprimidos incrementalmente com zlib.
+O XML é lido em streaming com `XMLPullParser`, alimentado pelos blocos da
+resposta conforme chegam. Cada `<url>` é entregue assim que termina de ser
+parseado e logo descartado da árvore. O uso de memória não depende do
+tamanho do sitemap.
+"""
+import os
+import zlib
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+from xml.etree import ElementTree
+
+import httpx
+
+# Níveis de sitemapindex seguidos a partir do sitemap inicial
+MAX_SITEMAP_DEPTH = int(os.getenv("SITEMAP_MAX_DEPTH", "5"))
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+class SitemapEntry(NamedTuple):
+    url: str
+    lastmod: Optional[str]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_text(elem, name: str) -> Optional[str]:
+    for child in elem:
+        if _local_name(child.tag) == name:
+            return child.text.strip() if child.text else None
+    return None
+
+
+class _StreamParser:
+    """Parser incremental: recebe blocos de bytes (gzip ou não) e devolve as entradas completas."""
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._decompressor = None
+        self._head = b''
+        self._root = None
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, str, Optional[str]]]:
+        if self._head is not None:
+            # Os dois primeiros bytes decidem se o corpo é gzip
+            self._head += chunk
+            if len(self._head) < 2:
+                return []
+            chunk, self._head = self._head, None
+            if chunk.startswith(_GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Tuple[str, str, Optional[str]]]:
+        if self._head:
+            self._parser.feed(self._head)
+        elif self._decompressor is not None:
+            self._parser.feed(self._decompressor.flush())
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Tuple[str, str, Optional[str]]]:
+        items = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                continue
+            kind = _local_name(elem.tag)
+            if kind not in ('url', 'sitemap'):
+                continue
+            loc = _child_text(elem, 'loc')
+            if loc:
+                items.append((kind, loc, _child_text(elem, 'lastmod')))
+            # Descarta o elemento já lido para a árvore não crescer
+            if self._root is not None and len(self._root) and self._root[0] is elem:
+                del self._root[0]
+            else:
+                elem.clear()
+        return items
+
+
+class SitemapDiscoverer:
+    """
+    Percorre um sitemap (ou índice de sitemaps) e produz as URLs de forma preguiçosa.
+
+    Args:
+        client: Cliente httpx compartilhado (um cliente próprio é criado se omitido)
+        max_depth: Níveis de sitemapindex a seguir
+
+    Depois da iteração, `sitemaps`, `urls` e `errors` trazem os totais. Com
+    `errors > 0` a lista de URLs está incompleta.
+    """
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, max_depth: int = MAX_SITEMAP_DEPTH):
+        self._client = client
+        self.max_depth = max_depth
+        self.sitemaps = 0
+        self.urls = 0
+        self.errors = 0
+
+    async def entries(self, sitemap_url: str) -> AsyncIterator[SitemapEntry]:
+        """Produz as entradas (url, lastmod) de todos os sitemaps alcançáveis a partir de `sitemap_url`."""
+        client = self._client or httpx.AsyncClient(follow_redirects=True, timeout=30.0)
+        try:
+            seen = set()
+            stack = [(sitemap_url, 0)]
+            while stack:
+                url, depth = stack.pop()
+                if url in seen:
+                    continue
+                seen.add(url)
+                children = []
+                async for kind, loc, lastmod in self._stream(client, url):
+                    if kind == 'url':
+                        self.urls += 1
+                        yield SitemapEntry(loc, lastmod)
+                    elif depth < self.max_depth:
+                        children.append(loc)
+                    else:
+                        print(f"[sitemap] Profundidade máxima atingida, ignorando {loc}")
+                # Pilha em ordem reversa para visitar os filhos na ordem do índice
+                stack.extend((child, depth + 1) for child in reversed(children))
+        finally:
+            if self._client is None:
+                await client.aclose()
+
+    async def _stream(self, client: httpx.AsyncClient, url: str) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        self.sitemaps += 1
+        parser = _StreamParser()
+        try:
+            async with client.stream('GET', url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    for item in parser.feed(chunk):
+                        yield item
+            for item in parser.close():
+                yield item
+        except (httpx.HTTPError, ElementTree.ParseError, zlib.error) as e:
+            self.errors += 1
+            print(f"[sitemap] Erro ao ler {url}: {str(e)}")